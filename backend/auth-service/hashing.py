@@ -0,0 +1,95 @@
+# Cifrado y verificación de contraseñas con bcrypt en un pool de procesos acotado
+# Así una ráfaga de logins no consume la CPU del worker que atiende el resto de rutas
+import asyncio                                                     # Espera no bloqueante de los resultados
+import multiprocessing                                             # Contexto "spawn" para los procesos del pool
+import os                                                          # Configuración desde variables de entorno
+import time                                                        # Medición de latencias
+from concurrent.futures import ProcessPoolExecutor                 # Pool de procesos (usa todos los núcleos)
+import bcrypt                                                      # Cifrado de contraseñas
+from common.metrics import observe_phase                           # Tiempo de bcrypt en el desglose de cada petición
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))          # Procesos del pool
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))     # Operaciones admitidas a la vez
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))                            # Costo de bcrypt
+
+
+# Error lanzado cuando la cola de cifrado está llena; el servicio responde 503
+class HasherBusy(Exception):
+    pass
+
+
+# Funciones ejecutadas dentro de los procesos del pool
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _check_password(password, hashed):
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+# Pool de procesos con control de admisión y métricas de cola y latencia
+class PasswordHasher:
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING, rounds=BCRYPT_ROUNDS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor = None
+        self._pending = 0
+        self._rejected = 0
+        self._latency = {"hash": [0, 0.0, 0.0], "verify": [0, 0.0, 0.0]}   # Operación -> [cantidad, total, máximo]
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # Envía una operación al pool; si ya hay max_pending en curso se rechaza sin encolarla
+    async def _submit(self, operation, fn, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HasherBusy("La cola de cifrado está llena.")
+        future = self._executor.submit(fn, *args)
+        self._pending += 1
+        # Se descuenta cuando termina el trabajo en el pool, no cuando deja de esperarlo la petición: si el cliente
+        # se desconecta, el proceso sigue cifrando y debe seguir contando para el control de admisión
+        # El callback corre en un hilo del executor; el contador se toca solo desde el event loop
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._terminar))
+        started = time.monotonic()
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            elapsed = time.monotonic() - started
+            observe_phase(f"bcrypt_{operation}", elapsed)
+            stats = self._latency[operation]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+    def _terminar(self):
+        self._pending -= 1
+
+    async def hash(self, password):
+        return await self._submit("hash", _hash_password, password, self.rounds)
+
+    async def verify(self, password, hashed):
+        return await self._submit("verify", _check_password, password, hashed)
+
+    # Profundidad de cola y latencias (incluye la espera en cola) para exponer en el servicio
+    def stats(self):
+        result = {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._pending,
+            "queued": max(self._pending - self.workers, 0),
+            "rejected": self._rejected,
+        }
+        for operation, (count, total, maximum) in self._latency.items():
+            result[f"{operation}_count"] = count
+            result[f"{operation}_ms_avg"] = round(total / count * 1000, 3) if count else 0.0
+            result[f"{operation}_ms_max"] = round(maximum * 1000, 3)
+        return result
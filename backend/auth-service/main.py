@@ -2,18 +2,28 @@
 from fastapi import FastAPI, HTTPException, Depends, status                     # Herramientas principales de FastAPI
 from fastapi.middleware.cors import CORSMiddleware                             # Middleware para habilitar CORS (Cross-Origin Resource Sharing)
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm   # Seguridad con tokens tipo OAuth2
+from fastapi.responses import JSONResponse, Response                            # Respuestas JSON personalizadas
 from pydantic import BaseModel, EmailStr, Field, validator                      # Validación de datos con Pydantic
-import mysql.connector                                                          # Conexión con base de datos MySQL
-import bcrypt                                                                   # Cifrado de contraseñas
-import time                                                                     # Esperas entre intentos de conexión
 from jose import JWTError, jwt                                                  # Manejo de tokens JWT (Json Web Token)
 from datetime import datetime, timedelta                                        # Manejo de fechas y tiempos
+import os                                                                       # Configuración desde variables de entorno
+from common.db import DatabaseUnavailable, IntegrityViolation, ER_DUP_ENTRY    # Errores de base de datos
+from common.async_db import create_pool                                         # Pool asíncrono compartido de conexiones MySQL
+from common.cache import TTLCache                                               # Caché en memoria con expiración
+from common.metrics import CONTENT_TYPE, MetricsMiddleware, register_collector, render_metrics# Métricas Prometheus
+from common.startup import ServiceStartup                                       # Arranque en segundo plano y /ready
+from hashing import PasswordHasher, HasherBusy                                  # Cifrado de contraseñas en un pool de procesos
 
 # Configuración del sistema de autenticación con JWT
 SECRET_KEY = "mysecretkey"                          # Clave secreta usada para firmar los tokens JWT
 ALGORITHM = "HS256"                                 # Algoritmo de encriptación utilizado
 ACCESS_TOKEN_EXPIRE_MINUTES = 30                    # Tiempo que durará el token activo (en minutos)
 
+# Cachés en memoria del worker: tokens ya verificados y perfiles consultados
+token_cache = TTLCache("tokens", maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+profile_cache = TTLCache("profiles", maxsize=int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+                         ttl=int(os.getenv("PROFILE_CACHE_TTL", "300")))
+
 # Instancia principal de la aplicación FastAPI
 app = FastAPI(title="Auth Service", version="2.0")
 
@@ -26,6 +36,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Middleware de métricas: latencia por ruta y peticiones en curso (se exponen en /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Modelo de datos para el registro de un usuario
 class RegisterData(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
@@ -53,39 +66,46 @@ class UserOut(BaseModel):
 # Esquema para extraer el token enviado por el cliente y usarlo en rutas protegidas
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-# Función para obtener una conexión activa con la base de datos
-# Intenta conectarse hasta 20 veces con pausas de 3 segundos entre intentos
-def get_connection():
-    for attempt in range(20):
-        try:
-            return mysql.connector.connect(
-                host="db",
-                user="root",
-                password="12345",
-                database="users_db"
-            )
-        except mysql.connector.Error:
-            print(f"[auth-service] Intento {attempt+1} fallido, esperando...")
-            time.sleep(3)
-    raise Exception("No se pudo conectar a la base de datos.")
+# Pool de conexiones del servicio (driver y tamaño configurables por variables de entorno)
+pool = create_pool("auth-service")
+
+# Pool de procesos para bcrypt (tamaño y cola configurables por variables de entorno)
+hasher = PasswordHasher()
+
+# Conexión y migraciones en segundo plano, con reintentos; /ready indica cuándo terminó
+arranque = ServiceStartup("auth-service", pool)
+
+# Estadísticas del pool, del cifrado y de las cachés incluidas en /metrics
+register_collector("db_pool", pool.stats, labels=("pool", "driver"))
+register_collector("password_hasher", hasher.stats)
+register_collector("startup", arranque.stats, labels=("service",))
+register_collector("cache", token_cache.stats, labels=("cache",))
+register_collector("cache", profile_cache.stats, labels=("cache",))
+
+# Si la base de datos no responde se devuelve 503 en lugar de bloquear la petición
+@app.exception_handler(DatabaseUnavailable)
+def db_unavailable_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Base de datos no disponible"})
+
+# Si la cola de cifrado está llena se rechaza la petición en lugar de acumularla
+@app.exception_handler(HasherBusy)
+def hasher_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Servicio ocupado, intenta de nuevo"},
+                        headers={"Retry-After": "1"})
 
 # Evento que se ejecuta cuando el servidor inicia
-# Se asegura de que la tabla de usuarios exista
+# Arranca el pool de cifrado; la conexión a MySQL y las migraciones siguen en segundo plano (ver /ready)
 @app.on_event("startup")
-def create_table():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(100),
-            email VARCHAR(100) UNIQUE,
-            password VARCHAR(255)
-        )
-    """)                    # Crea la tabla solo si no existe
-    conn.commit()
-    cursor.close()
-    conn.close()
+async def startup():
+    hasher.start()
+    arranque.start()
+
+# Evento que se ejecuta al apagar el servidor: cierra las conexiones y el pool de cifrado
+@app.on_event("shutdown")
+async def close_pool():
+    await arranque.stop()
+    await pool.close()
+    hasher.shutdown()
 
 # Función para crear un token JWT válido con una fecha de expiración
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -95,50 +115,53 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 # Verifica que el token JWT sea válido. Si no lo es, lanza un error 401
-def verify_token(token: str = Depends(oauth2_scheme)):
+# Los tokens ya verificados se guardan en caché hasta su "exp", evitando repetir jwt.decode
+async def verify_token(token: str = Depends(oauth2_scheme)):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload                          # Retorna el contenido decodificado del token
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido")
+    token_cache.set(token, payload, expires_at=payload.get("exp"))
+    return payload                              # Retorna el contenido decodificado del token
 
 # Ruta para registrar un nuevo usuario
 @app.post("/api/auth/register")
-def register_user(data: RegisterData):
-    # Cifrar la contraseña antes de guardarla
-    hashed = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
-
-    # Conectarse a la base de datos
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Verificar si ya existe un usuario con ese correo
-    cursor.execute("SELECT * FROM users WHERE email = %s", (data.email,))
-    if cursor.fetchone():
-        raise HTTPException(status_code=409, detail="Correo ya registrado")
-
-    # Insertar el nuevo usuario
-    cursor.execute("INSERT INTO users (name, email, password) VALUES (%s, %s, %s)",
-                   (data.name, data.email, hashed))
-    conn.commit()
-    cursor.close()
-    conn.close()
+async def register_user(data: RegisterData):
+    async with pool.acquire() as conn:
+        # Verificar si ya existe un usuario con ese correo (antes de gastar CPU en el cifrado)
+        if await conn.fetch_one("SELECT id FROM users WHERE email = %s", (data.email,)):
+            raise HTTPException(status_code=409, detail="Correo ya registrado")
+
+    # Cifrar la contraseña antes de guardarla (en el pool de procesos, sin retener la conexión)
+    hashed = await hasher.hash(data.password)
+
+    # Insertar el nuevo usuario; dos registros simultáneos del mismo correo pueden pasar la consulta anterior,
+    # y el índice UNIQUE de email rechaza al segundo
+    async with pool.acquire() as conn:
+        try:
+            await conn.execute("INSERT INTO users (name, email, password) VALUES (%s, %s, %s)",
+                               (data.name, data.email, hashed))
+        except IntegrityViolation as exc:
+            if exc.code == ER_DUP_ENTRY:
+                raise HTTPException(status_code=409, detail="Correo ya registrado")
+            raise
+
+    # Cualquier perfil guardado para este correo deja de ser válido
+    profile_cache.invalidate(data.email)
     return {"message": "Usuario registrado exitosamente"}
 
 # Ruta para iniciar sesión. Devuelve un token JWT si las credenciales son válidas
 @app.post("/api/auth/login", response_model=Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
     # Buscar al usuario por correo electrónico
-    cursor.execute("SELECT * FROM users WHERE email = %s", (form_data.username,))
-    user = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    async with pool.acquire() as conn:
+        user = await conn.fetch_one("SELECT email, password FROM users WHERE email = %s", (form_data.username,))
 
     # Verificar si el usuario existe y si la contraseña es correcta
-    if not user or not bcrypt.checkpw(form_data.password.encode(), user["password"].encode()):
+    if not user or not await hasher.verify(form_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
     # Crear y devolver el token JWT
@@ -152,22 +175,50 @@ def logout():
 
 # Ruta para obtener los datos del perfil de usuario autenticado
 @app.get("/api/auth/profile", response_model=UserOut)
-def get_profile(token_data=Depends(verify_token)):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+# Un perfil repetido se responde desde la caché, sin consultar la base de datos
+async def get_profile(token_data=Depends(verify_token)):
+    email = token_data["sub"]
+    user = profile_cache.get(email)
+    if user is not None:
+        return user
 
-    # Buscar al usuario por el correo que está en el token
-    cursor.execute("SELECT id, name, email FROM users WHERE email = %s", (token_data["sub"],))
-    user = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    async with pool.acquire() as conn:
+        # Buscar al usuario por el correo que está en el token
+        user = await conn.fetch_one("SELECT id, name, email FROM users WHERE email = %s", (email,))
 
     # Si no se encuentra, se lanza un error
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    profile_cache.set(email, user)
     return user
 
 # Ruta para probar si el servicio está activo
 @app.get("/api/auth/health")
-def health():
+async def health():
     return {"status": "auth-service ok"}
+
+# Ruta de readiness: 200 solo con la base conectada, el esquema al día y la base respondiendo
+@app.get("/api/auth/ready")
+async def ready():
+    listo, estado = await arranque.ready()
+    return JSONResponse(status_code=200 if listo else 503, content=estado)
+
+# Ruta con las estadísticas del pool de conexiones (en uso, en espera, latencia de préstamo)
+@app.get("/api/auth/pool")
+async def pool_stats():
+    return pool.stats()
+
+# Ruta con las métricas del pool de cifrado (profundidad de cola, rechazos, latencia de bcrypt)
+@app.get("/api/auth/hashing")
+async def hashing_stats():
+    return hasher.stats()
+
+# Ruta con los aciertos y fallos de las cachés de tokens y perfiles
+@app.get("/api/auth/cache")
+async def cache_stats():
+    return {"tokens": token_cache.stats(), "profiles": profile_cache.stats()}
+
+# Ruta con las métricas del servicio en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,137 @@
+# Reporte de ocupación e ingresos: resumen occupancy_stats frente al GROUP BY sobre bookings JOIN workshops
+# Siembra hasta --bookings reservas (10M por defecto), marca como pagadas una fracción, reconstruye el resumen
+# y mide cada agrupación con ambas consultas; también verifica que den los mismos totales y que
+# GET /api/booking/analitica (booking-service lanzado sobre la base del benchmark) responda lo mismo por HTTP
+# Uso: python -m benchmarks.bench_analytics --bookings 10000000 --workshops 50000 --users 200000 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import json                                                        # Resultado legible por máquinas
+import statistics                                                  # Mediana de las repeticiones
+import time                                                        # Medición de latencias
+from datetime import date, timedelta                               # Filtro por rango de fechas
+from decimal import Decimal                                        # Comparación exacta de ingresos
+import httpx                                                       # Consulta del endpoint del reporte
+from common.analytics import AGRUPACIONES, consulta_resumen, reconstruir
+from benchmarks.loadgen import start_service, stop_service
+from benchmarks.seed import BENCH_DATABASE, connect_bench, seed_bookings, seed_users, seed_workshops
+
+
+# Consultas ad hoc que reemplaza el resumen: talleres por grupo y reservas vigentes por grupo
+def consultas_directas(agrupar, desde=None, hasta=None):
+    claves = ", ".join(f"w.{columna}" for columna in AGRUPACIONES[agrupar])
+    condiciones, params = ["w.category IS NOT NULL", "w.date IS NOT NULL"], []
+    if desde is not None:
+        condiciones.append("w.date >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append("w.date <= %s")
+        params.append(hasta)
+    filtro = " AND ".join(condiciones)
+    talleres = (f"SELECT {claves}, COUNT(*) AS workshops, SUM(w.max_participants) AS capacity "
+                f"FROM workshops w WHERE {filtro} GROUP BY {claves}")
+    reservas = (f"SELECT {claves}, COUNT(*) AS booked, SUM(b.payment_status = 'Pagado') AS paid, "
+                f"SUM(IF(b.payment_status = 'Pagado', w.price, 0)) AS revenue "
+                f"FROM bookings b JOIN workshops w ON w.id = b.workshop_id "
+                f"WHERE b.status <> 'Cancelada' AND {filtro} GROUP BY {claves}")
+    return [(talleres, params), (reservas, params)]
+
+
+# Ejecuta las consultas "repeat" veces; devuelve la mediana en ms y los totales por grupo de la última corrida
+def medir(cursor, consultas, claves, repeat):
+    samples = []
+    for _ in range(repeat):
+        totales = {}
+        started = time.perf_counter()
+        for sql, params in consultas:
+            cursor.execute(sql, params)
+            for fila in cursor.fetchall():
+                grupo = totales.setdefault(tuple(fila[columna] for columna in claves), {})
+                grupo.update({columna: Decimal(fila[columna] or 0) for columna in
+                              ("workshops", "capacity", "booked", "paid", "revenue") if columna in fila})
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "max_ms": round(max(samples), 3)}, totales
+
+
+# Pide el reporte a booking-service por cada agrupación y lo compara con los totales del resumen
+# (valida el response_model OccupancyRow con fechas y categorías reales)
+def verificar_endpoint(port, totales_por_agrupacion):
+    process = start_service("booking-service", port, {"MYSQL_DATABASE": BENCH_DATABASE, "SEAT_COUNTER": "0"},
+                            "/api/booking/ready")
+    resultado = {}
+    try:
+        for agrupar, totales in totales_por_agrupacion.items():
+            response = httpx.get(f"http://127.0.0.1:{port}/api/booking/analitica",
+                                 params={"agrupar": agrupar}, timeout=60)
+            filas = response.json() if response.status_code == 200 else []
+            resultado[agrupar] = {
+                "status": response.status_code,
+                "groups": len(filas),
+                "same_totals": response.status_code == 200 and len(filas) == len(totales) and all(
+                    sum(int(fila[columna]) for fila in filas) == sum(int(grupo.get(columna, 0))
+                                                                   for grupo in totales.values())
+                    for columna in ("workshops", "capacity", "booked", "paid")),
+            }
+    finally:
+        stop_service(process)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=10_000_000)
+    parser.add_argument("--workshops", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--paid-ratio", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8500)
+    args = parser.parse_args()
+
+    conn = connect_bench()
+    seed_workshops(conn, args.workshops)
+    seed_users(conn, args.users)
+    seed_bookings(conn, args.bookings, args.users)
+    cursor = conn.cursor(dictionary=True)
+
+    # Datos sembrados sin pasar por los servicios: cupos iguales a las reservas y una fracción pagada
+    cursor.execute("""
+        UPDATE workshops w LEFT JOIN (SELECT workshop_id, COUNT(*) AS total FROM bookings
+                                      WHERE status <> 'Cancelada' GROUP BY workshop_id) b ON b.workshop_id = w.id
+        SET w.current_participants = COALESCE(b.total, 0)
+    """)
+    cursor.execute("SELECT COALESCE(MAX(id), 0) AS maximo FROM bookings")
+    maximo = cursor.fetchone()["maximo"]
+    for inicio in range(0, maximo, 100_000):
+        cursor.execute("UPDATE bookings SET payment_status = IF(MOD(id, 100) < %s, 'Pagado', 'Pendiente') "
+                       "WHERE id > %s AND id <= %s", (int(args.paid_ratio * 100), inicio, inicio + 100_000))
+        conn.commit()
+    conn.commit()
+
+    started = time.perf_counter()
+    grupos = reconstruir(BENCH_DATABASE)
+    rebuild_s = round(time.perf_counter() - started, 3)
+
+    results, coinciden, totales_completos = [], True, {}
+    hoy = date.today()
+    for agrupar, claves in AGRUPACIONES.items():
+        for rango, (desde, hasta) in {"todo": (None, None), "30_dias": (hoy, hoy + timedelta(days=30))}.items():
+            resumen, totales_resumen = medir(cursor, [consulta_resumen(agrupar, desde, hasta)], claves, args.repeat)
+            if rango == "todo":
+                totales_completos[agrupar] = totales_resumen
+            directa, totales_directa = medir(cursor, consultas_directas(agrupar, desde, hasta), claves, args.repeat)
+            iguales = totales_resumen == {clave: {"booked": 0, "paid": 0, "revenue": 0, **valores}
+                                          for clave, valores in totales_directa.items()}
+            coinciden = coinciden and iguales
+            results.append({"group_by": agrupar, "range": rango, "groups": len(totales_resumen),
+                            "summary": resumen, "on_the_fly": directa,
+                            "speedup": round(directa["median_ms"] / resumen["median_ms"], 1),
+                            "same_totals": iguales})
+    cursor.close()
+    conn.close()
+    endpoint = verificar_endpoint(args.port, totales_completos)
+    coinciden = coinciden and all(grupo["same_totals"] for grupo in endpoint.values())
+    print(json.dumps({"bookings": args.bookings, "workshops": args.workshops, "summary_groups": grupos,
+                      "rebuild_s": rebuild_s, "all_match": coinciden, "results": results, "endpoint": endpoint},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Compara el driver asíncrono (aiomysql) con el pool síncrono en el threadpool de Starlette
+# Uso (con MySQL accesible según MYSQL_HOST/MYSQL_USER/...):
+#   python -m benchmarks.bench_async_db --requests 5000 --concurrency 200 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import asyncio                                                     # Ejecución del generador de carga
+import json                                                        # Resultado legible por máquinas
+from benchmarks.loadgen import run_load, start_service, stop_service
+
+# Escenarios: (servicio, ruta de salud, función que envía una petición)
+SCENARIOS = {
+    "listar_talleres": ("workshops-service", "/api/workshops/ready",
+                        lambda client, i: client.get("/api/workshops")),
+    "buscar_talleres": ("workshops-service", "/api/workshops/ready",
+                        lambda client, i: client.get("/api/workshops/buscar", params={"palabra": "pasta"})),
+    "listar_reservas": ("booking-service", "/api/booking/ready",
+                        lambda client, i: client.get("/api/booking/usuario/admin@mastercook.com")),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        service, health_path, send = SCENARIOS[name]
+        results[name] = {}
+        for driver in ("threadpool", "aiomysql"):
+            process = start_service(service, args.port, {"DB_DRIVER": driver}, health_path)
+            try:
+                # 404 es válido cuando la tabla está vacía: se mide igualmente el camino completo
+                results[name][driver] = asyncio.run(run_load(
+                    f"http://127.0.0.1:{args.port}", send, args.requests, args.concurrency, ok_status=(200, 404)))
+            finally:
+                stop_service(process)
+    print(json.dumps({"concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Costo en Python de responder listas grandes: response_model (validación Pydantic + encoder estándar),
+# jsonable_encoder + JSONResponse (páginas) y el modo rápido FAST_JSON (filas del cursor serializadas con orjson)
+# Sin base de datos: filas sintéticas con los mismos tipos que devuelve el cursor (int, str, date, Decimal),
+# servidas por una app ASGI en memoria con los modelos reales de cada servicio
+# También verifica que los tres caminos produzcan el mismo JSON y el mismo esquema OpenAPI
+# Uso: python -m benchmarks.bench_json --rows 1000 10000 --repeat 50 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import asyncio                                                     # Cliente HTTP asíncrono en memoria
+import importlib.util                                              # Carga de main.py de cada servicio
+import json                                                        # Resultado legible por máquinas
+import os                                                          # Rutas del código de los servicios
+import statistics                                                  # Mediana de las repeticiones
+import sys                                                         # Módulos propios de cada servicio
+import time                                                        # Medición de latencias
+from datetime import date, timedelta                               # Fechas de los talleres
+from decimal import Decimal                                        # Precios (DECIMAL en MySQL)
+from typing import List                                            # Tipo del response_model
+import httpx                                                       # Peticiones a la app ASGI
+from fastapi import FastAPI                                        # App de prueba con las tres variantes
+from fastapi.encoders import jsonable_encoder                      # Camino actual de las páginas
+from fastapi.responses import JSONResponse
+from benchmarks.loadgen import BACKEND_DIR
+from common.fastjson import FastJSONResponse                       # Modo rápido
+
+
+# Importa main.py de un servicio con un nombre propio (todos se llaman main)
+def cargar_servicio(servicio):
+    directorio = os.path.join(BACKEND_DIR, f"{servicio}-service")
+    sys.path.insert(0, directorio)
+    spec = importlib.util.spec_from_file_location(f"{servicio}_main", os.path.join(directorio, "main.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def filas_talleres(n):
+    hoy = date.today()
+    return [{"id": i, "title": f"Taller de cocina {i}", "description": "Técnicas básicas de pastelería " * 4,
+             "category": ("Pastelería", "Panadería", "Cocina")[i % 3], "date": hoy + timedelta(days=i % 365),
+             "max_participants": 20, "current_participants": i % 20, "price": Decimal("49.90") + i % 50}
+            for i in range(1, n + 1)]
+
+
+def filas_historial(n):
+    hoy = date.today()
+    return [{"id": n - i, "user_email": "ana@empresa.com", "workshop_id": i, "status": "Confirmada",
+             "payment_status": ("Pagado", "Pendiente")[i % 2], "title": f"Taller de cocina {i}",
+             "category": ("Pastelería", "Panadería", "Cocina")[i % 3], "date": hoy + timedelta(days=i % 365),
+             "price": Decimal("49.90") + i % 50}
+            for i in range(n)]
+
+
+# Una ruta por variante, todas con el mismo response_model
+def crear_app(modelo, filas):
+    app = FastAPI()
+
+    @app.get("/modelo", response_model=List[modelo])
+    async def con_modelo():
+        return filas
+
+    @app.get("/jsonable", response_model=List[modelo])
+    async def con_jsonable():
+        return JSONResponse(content=jsonable_encoder(filas))
+
+    @app.get("/rapido", response_model=List[modelo])
+    async def rapido():
+        return FastJSONResponse(content=filas)
+
+    return app
+
+
+def esquema(app, ruta):
+    return app.openapi()["paths"][ruta]["get"]["responses"]["200"]
+
+
+async def medir(app, repeat):
+    resultados, cuerpos = {}, {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for ruta in ("/modelo", "/jsonable", "/rapido"):
+            await client.get(ruta)                                 # Calentamiento
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await client.get(ruta)
+                samples.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+            cuerpos[ruta] = response.content
+            resultados[ruta.strip("/")] = {"median_ms": round(statistics.median(samples), 3),
+                                           "p95_ms": round(sorted(samples)[int(len(samples) * 0.95) - 1], 3)}
+    return resultados, cuerpos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    listas = {
+        "GET /api/workshops/buscar": (cargar_servicio("workshops").Workshop, filas_talleres),
+        "GET /api/booking/usuario/{email}": (cargar_servicio("booking").BookingHistoryItem, filas_historial),
+    }
+    results = []
+    for endpoint, (modelo, generar) in listas.items():
+        for n in args.rows:
+            app = crear_app(modelo, generar(n))
+            tiempos, cuerpos = asyncio.run(medir(app, args.repeat))
+            esperado = json.loads(cuerpos["/modelo"])
+            results.append({
+                "endpoint": endpoint,
+                "rows": n,
+                "bytes": len(cuerpos["/rapido"]),
+                **tiempos,
+                "speedup_vs_modelo": round(tiempos["modelo"]["median_ms"] / tiempos["rapido"]["median_ms"], 1),
+                "same_output": all(json.loads(cuerpo) == esperado for cuerpo in cuerpos.values()),
+                "same_schema": esquema(app, "/modelo") == esquema(app, "/rapido"),
+            })
+    print(json.dumps({"repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
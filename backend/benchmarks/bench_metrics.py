@@ -0,0 +1,46 @@
+# Costo del middleware de métricas sobre la ruta más simple (POST /api/v0/hello de payment-service)
+# Alterna corridas con METRICS_ENABLED=0 y =1 para repartir el ruido entre ambos modos; el objetivo es < 2 %
+# Uso: python -m benchmarks.bench_metrics --requests 20000 --concurrency 50 --rounds 3 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import asyncio                                                     # Ejecución del generador de carga
+import json                                                        # Resultado legible por máquinas
+import statistics                                                  # Mediana entre rondas
+from benchmarks.loadgen import run_load, start_service, stop_service
+
+OBJETIVO_PCT = 2.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    runs = {"sin_metricas": [], "con_metricas": []}
+    for _ in range(args.rounds):
+        for mode, enabled in (("sin_metricas", "0"), ("con_metricas", "1")):
+            process = start_service("payment-service", args.port, {"METRICS_ENABLED": enabled}, "/api/payment/ready")
+            try:
+                runs[mode].append(asyncio.run(run_load(
+                    f"http://127.0.0.1:{args.port}", lambda client, i: client.post("/api/v0/hello"),
+                    args.requests, args.concurrency)))
+            finally:
+                stop_service(process)
+
+    rps = {mode: statistics.median(run["rps"] for run in results) for mode, results in runs.items()}
+    p50 = {mode: statistics.median(run["p50_ms"] for run in results) for mode, results in runs.items()}
+    overhead = (rps["sin_metricas"] - rps["con_metricas"]) / rps["sin_metricas"] * 100
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "rps": rps,
+        "p50_ms": p50,
+        "overhead_pct": round(overhead, 2),
+        "within_target": overhead < OBJETIVO_PCT,
+        "runs": runs,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
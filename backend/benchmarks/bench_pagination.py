@@ -0,0 +1,62 @@
+# Latencia por página de la paginación keyset (date, id) frente a LIMIT/OFFSET a medida que crece la tabla
+# Uso: python -m benchmarks.bench_pagination --sizes 10000 100000 1000000 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import json                                                        # Resultado legible por máquinas
+import statistics                                                  # Mediana de las repeticiones
+import time                                                        # Medición de latencias
+from common.pagination import keyset_condition                     # Misma condición que usa workshops-service
+from benchmarks.seed import connect_bench, seed_workshops
+
+COLUMNAS = "id, title, category, date, max_participants, current_participants, price"   # Proyección sin description
+FILTRO = "has_seats = 1"
+
+
+# Ejecuta una consulta "repeat" veces y devuelve la mediana y el máximo en milisegundos
+def time_query(cursor, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "max_ms": round(max(samples), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = connect_bench()
+    cursor = conn.cursor()
+    results = []
+    for size in sorted(args.sizes):
+        seed_workshops(conn, size)
+        cursor.execute(f"SELECT COUNT(*) FROM workshops WHERE {FILTRO}")
+        available = cursor.fetchone()[0]
+
+        # Páginas al inicio, a la mitad y al final del catálogo
+        for position in (0.0, 0.5, 0.99):
+            offset = int(available * position)
+            cursor.execute(f"SELECT date, id FROM workshops WHERE {FILTRO} ORDER BY date, id LIMIT 1 OFFSET %s",
+                           (offset,))
+            anchor = cursor.fetchone()
+            condicion, condicion_params = keyset_condition(("date", "id"), anchor)
+            keyset_sql = (f"SELECT {COLUMNAS} FROM workshops WHERE {FILTRO} AND {condicion} "
+                          "ORDER BY date, id LIMIT %s")
+            offset_sql = f"SELECT {COLUMNAS} FROM workshops WHERE {FILTRO} ORDER BY date, id LIMIT %s OFFSET %s"
+            results.append({
+                "rows": size,
+                "position": position,
+                "keyset": time_query(cursor, keyset_sql, (*condicion_params, args.limit), args.repeat),
+                "offset": time_query(cursor, offset_sql, (args.limit, offset), args.repeat),
+            })
+    cursor.close()
+    conn.close()
+    print(json.dumps({"limit": args.limit, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Throughput del pipeline de pagos: 10k pagos enviados en paralelo a payment-service (con reintentos duplicados)
+# Mide la aceptación HTTP, el tiempo hasta que todos quedan cobrados y escritos en lotes, y verifica
+# que ningún pago se cobró dos veces ni quedó una reserva pagada sin su pago
+# Uso: python -m benchmarks.bench_payments --payments 10000 --concurrency 1000 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import asyncio                                                     # Ejecución del generador de carga
+import json                                                        # Resultado legible por máquinas
+import random                                                      # Elección de los reintentos duplicados
+import time                                                        # Espera hasta que se procesen los pagos
+import uuid                                                        # Claves de idempotencia únicas por corrida
+import httpx                                                       # Estadísticas del pipeline al terminar
+from benchmarks.loadgen import run_load, start_service, stop_service
+from benchmarks.seed import BENCH_DATABASE, connect_bench, create_schema, seed_bookings, seed_users, seed_workshops
+
+
+# Deja todas las reservas sin pagar y borra los pagos de corridas anteriores
+def reset_payments(conn, total):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM payments")
+    cursor.execute("UPDATE bookings SET payment_status = 'Pendiente', status = 'Confirmada'")
+    cursor.execute("SELECT id FROM bookings ORDER BY id LIMIT %s", (total,))
+    ids = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    cursor.close()
+    return ids
+
+
+# Espera hasta que no queden pagos pendientes; devuelve los segundos transcurridos
+def wait_settled(conn, timeout):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    while time.perf_counter() - started < timeout:
+        cursor.execute("SELECT COUNT(*) FROM payments WHERE status = 'Pendiente'")
+        pending = cursor.fetchone()[0]
+        conn.commit()
+        if not pending:
+            break
+        time.sleep(0.1)
+    cursor.close()
+    return time.perf_counter() - started
+
+
+# Pagos por estado, reservas cobradas dos veces y reservas pagadas sin pago registrado
+def verify(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) FROM payments GROUP BY status")
+    by_status = dict(cursor.fetchall())
+    cursor.execute("""
+        SELECT COUNT(*) FROM (SELECT booking_id FROM payments WHERE status = 'Pagado'
+                              GROUP BY booking_id HAVING COUNT(*) > 1) AS dobles
+    """)
+    double_charged = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM bookings b
+        WHERE b.payment_status = 'Pagado'
+          AND NOT EXISTS (SELECT 1 FROM payments p WHERE p.booking_id = b.id AND p.status = 'Pagado')
+    """)
+    paid_without_payment = cursor.fetchone()[0]
+    conn.commit()
+    cursor.close()
+    return {"payments": by_status, "double_charged": double_charged, "paid_without_payment": paid_without_payment}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payments", type=int, default=10_000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Fracción extra de reintentos con la misma clave")
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--gateway-latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, default=64, help="PAYMENT_WORKERS del servicio")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--port", type=int, default=8300)
+    args = parser.parse_args()
+
+    conn = connect_bench()
+    create_schema(conn)
+    users = max(args.payments // 5, 1)
+    seed_users(conn, users)
+    seed_workshops(conn, max(args.payments // 5, 100))
+    seed_bookings(conn, args.payments, users)
+    booking_ids = reset_payments(conn, args.payments)
+
+    run_id = uuid.uuid4().hex[:8]
+    rng = random.Random(42)
+    duplicates = [rng.randrange(len(booking_ids)) for _ in range(int(len(booking_ids) * args.duplicates))]
+    # Primero un pago por reserva y después los reintentos, mezclados al azar con los originales
+    orden = list(range(len(booking_ids))) + duplicates
+    rng.shuffle(orden)
+
+    def send(client, i):
+        indice = orden[i]
+        return client.post("/api/payment/pagos", json={"booking_id": booking_ids[indice]},
+                           headers={"Idempotency-Key": f"bench-{run_id}-{indice}"})
+
+    env = {"MYSQL_DATABASE": BENCH_DATABASE, "FAKE_GATEWAY_LATENCY_MS": str(args.gateway_latency_ms),
+           "PAYMENT_WORKERS": str(args.workers), "PAYMENT_QUEUE_SIZE": str(len(orden))}
+    process = start_service("payment-service", args.port, env, "/api/payment/ready")
+    try:
+        started = time.perf_counter()
+        # 202 = pago nuevo, 200 = reintento que devolvió el pago existente
+        submissions = asyncio.run(run_load(f"http://127.0.0.1:{args.port}", send, len(orden), args.concurrency,
+                                           ok_status=(200, 202)))
+        settle = wait_settled(conn, args.timeout)
+        total = time.perf_counter() - started
+        pipeline = httpx.get(f"http://127.0.0.1:{args.port}/api/payment/pipeline").json()
+    finally:
+        stop_service(process)
+
+    checks = verify(conn)
+    conn.close()
+    print(json.dumps({
+        "payments": len(booking_ids),
+        "requests": len(orden),
+        "concurrency": args.concurrency,
+        "gateway_latency_ms": args.gateway_latency_ms,
+        "submissions": submissions,
+        "settle_after_load_s": round(settle, 3),
+        "end_to_end_s": round(total, 3),
+        "settled_per_s": round(len(booking_ids) / total, 1),
+        "pipeline": pipeline,
+        "checks": {**checks, "gateway_charges_equal_payments": pipeline["charges"] == len(booking_ids)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Prueba de estrés de reservas concurrentes sobre un taller con pocos cupos ("flash sale")
+# Compara la secuencia anterior de reservar_taller (SELECTs + chequeo en Python) con el UPDATE condicional actual
+# y verifica que no haya sobreventa. Con --url ataca además a un booking-service en ejecución.
+# Uso: python -m benchmarks.bench_reservation --users 2000 --capacity 100 --threads 64
+import argparse                                                    # Parámetros de línea de comandos
+import asyncio                                                     # Carga HTTP opcional
+import json                                                        # Resultado legible por máquinas
+import threading                                                   # Reservas concurrentes
+import time                                                        # Medición de throughput
+import httpx                                                       # Sincronización del contador de cupos
+import mysql.connector                                             # Conexión con base de datos MySQL
+from benchmarks.loadgen import run_load
+from benchmarks.seed import connect_bench, create_schema, reset_hot_workshop, seed_users, user_email
+
+RESERVAR_CUPO_SQL = """
+    UPDATE workshops
+    SET current_participants = current_participants + 1
+    WHERE id = %s AND current_participants < max_participants
+"""
+
+
+# Secuencia anterior: SELECT usuario, SELECT taller, chequeo en Python, SELECT duplicado, INSERT + UPDATE
+def reservar_anterior(conn, email, workshop_id):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
+        if not cursor.fetchone():
+            return "usuario"
+        cursor.execute("SELECT * FROM workshops WHERE id = %s", (workshop_id,))
+        taller = cursor.fetchone()
+        if taller["current_participants"] >= taller["max_participants"]:
+            return "lleno"
+        cursor.execute("SELECT * FROM bookings WHERE user_email = %s AND workshop_id = %s", (email, workshop_id))
+        if cursor.fetchone():
+            return "duplicado"
+        cursor.execute("INSERT INTO bookings (user_email, workshop_id) VALUES (%s, %s)", (email, workshop_id))
+        cursor.execute("UPDATE workshops SET current_participants = current_participants + 1 WHERE id = %s",
+                       (workshop_id,))
+        conn.commit()
+        cursor.execute("SELECT * FROM bookings WHERE user_email = %s AND workshop_id = %s", (email, workshop_id))
+        cursor.fetchone()
+        return "ok"
+    finally:
+        conn.rollback()
+        cursor.close()
+
+
+# Secuencia actual (misma que reservar_taller): UPDATE condicional + INSERT en una transacción
+def reservar_atomico(conn, email, workshop_id):
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.execute(RESERVAR_CUPO_SQL, (workshop_id,))
+        if not cursor.rowcount:
+            conn.rollback()
+            return "lleno"
+        cursor.execute("INSERT INTO bookings (user_email, workshop_id) VALUES (%s, %s)", (email, workshop_id))
+        conn.commit()
+        return "ok"
+    except mysql.connector.IntegrityError:
+        conn.rollback()
+        return "duplicado"
+    finally:
+        cursor.close()
+
+
+# Estado final del taller: reservas reales, contador y sobreventa
+def verificar(conn, workshop_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT current_participants, max_participants FROM workshops WHERE id = %s", (workshop_id,))
+    current, maximum = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM bookings WHERE workshop_id = %s", (workshop_id,))
+    bookings = cursor.fetchone()[0]
+    conn.commit()
+    cursor.close()
+    return {"bookings": bookings, "current_participants": current, "max_participants": maximum,
+            "oversold": max(bookings - maximum, 0), "counter_drift": current - bookings}
+
+
+# booking-service con contador de cupos: recarga el taller reiniciado o, sin taller, escribe en MySQL los
+# cupos pendientes antes de verificar (404 si el servicio corre con SEAT_COUNTER=0)
+def sync_counter(url, workshop_id=None):
+    path = f"/api/booking/asientos/{workshop_id}/conciliar" if workshop_id else "/api/booking/asientos/escribir"
+    httpx.post(url + path, timeout=30)
+
+
+# Ejecuta "users" reservas con "threads" hilos, cada uno con su propia conexión
+def run_sql(strategy, users, threads, workshop_id):
+    outcomes = {}
+    lock = threading.Lock()
+    counter = iter(range(users))
+
+    def worker():
+        conn = connect_bench()
+        try:
+            for i in counter:
+                result = strategy(conn, user_email(i), workshop_id)
+                with lock:
+                    outcomes[result] = outcomes.get(result, 0) + 1
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {"outcomes": outcomes, "duration_s": round(elapsed, 3), "attempts_per_s": round(users / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--url", help="URL de un booking-service que use la base de benchmarks")
+    args = parser.parse_args()
+
+    conn = connect_bench()
+    create_schema(conn)
+    seed_users(conn, args.users)
+
+    results = {}
+    for name, strategy in (("anterior", reservar_anterior), ("atomico", reservar_atomico)):
+        workshop_id = reset_hot_workshop(conn, args.capacity)
+        results[name] = run_sql(strategy, args.users, args.threads, workshop_id)
+        results[name].update(verificar(conn, workshop_id))
+
+    if args.url:
+        workshop_id = reset_hot_workshop(conn, args.capacity)
+        sync_counter(args.url, workshop_id)
+        send = lambda client, i: client.post("/api/booking/reservar",
+                                             json={"user_email": user_email(i), "workshop_id": workshop_id})
+        # 400 (sin cupo) es una respuesta esperada una vez agotado el taller
+        results["http"] = asyncio.run(run_load(args.url, send, args.users, args.threads, ok_status=(200, 400)))
+        sync_counter(args.url)
+        results["http"].update(verificar(conn, workshop_id))
+
+    conn.close()
+    print(json.dumps({"users": args.users, "capacity": args.capacity, "threads": args.threads,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Compara la búsqueda con LIKE '%palabra%' contra el índice FULLTEXT que usa buscar_talleres
+# Uso: python -m benchmarks.bench_search --sizes 10000 100000 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import json                                                        # Resultado legible por máquinas
+import os                                                          # Ruta del código de workshops-service
+import sys                                                         # Importación de search.py
+from benchmarks.bench_pagination import time_query
+from benchmarks.loadgen import BACKEND_DIR
+from benchmarks.seed import connect_bench, seed_workshops
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "workshops-service"))
+from search import COINCIDENCIA, consulta_fulltext                 # Misma preparación que el servicio
+
+FILTRO = "has_seats = 1"
+CONSULTAS = [("pasta", None), ("masa madre", None), ("Repostería", None), ("sushi", "asiatica")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    conn = connect_bench()
+    cursor = conn.cursor()
+    results = []
+    for size in sorted(args.sizes):
+        seed_workshops(conn, size)
+        for palabra, categoria in CONSULTAS:
+            filtro = FILTRO + (" AND category = %s" if categoria else "")
+            extra = [categoria] if categoria else []
+
+            like_sql = f"SELECT * FROM workshops WHERE {filtro} AND (title LIKE %s OR description LIKE %s) ORDER BY date"
+            like_params = [*extra, f"%{palabra}%", f"%{palabra}%"]
+
+            busqueda = consulta_fulltext(palabra)
+            fulltext_sql = (f"SELECT *, {COINCIDENCIA} AS relevancia FROM workshops WHERE {filtro} AND {COINCIDENCIA} "
+                            "ORDER BY relevancia DESC, date, id")
+            fulltext_params = [busqueda, *extra, busqueda]
+
+            cursor.execute(f"SELECT COUNT(*) FROM workshops WHERE {filtro} AND {COINCIDENCIA}", [*extra, busqueda])
+            results.append({
+                "rows": size,
+                "palabra": palabra,
+                "categoria": categoria,
+                "matches": cursor.fetchone()[0],
+                "like": time_query(cursor, like_sql, like_params, args.repeat),
+                "fulltext": time_query(cursor, fulltext_sql, fulltext_params, args.repeat),
+            })
+    cursor.close()
+    conn.close()
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Tiempo de arranque en frío de cada servicio: desde que se lanza el proceso hasta que /health (liveness)
+# y /ready (base conectada, esquema al día e inicialización propia terminada) responden 200
+# Compara MIGRATE_ON_START=1 (verifica y aplica migraciones) con =0 (solo verifica la versión del esquema)
+# Uso: python -m benchmarks.bench_startup --runs 5 > resultado.json
+import argparse                                                    # Parámetros de línea de comandos
+import json                                                        # Resultado legible por máquinas
+import os                                                          # Variables de entorno del servicio lanzado
+import statistics                                                  # Mediana de las repeticiones
+import subprocess                                                  # Arranque de los servicios bajo prueba
+import sys                                                         # Intérprete actual para lanzar uvicorn
+import time                                                        # Medición del arranque
+import httpx                                                       # Sondeo de /health y /ready
+from benchmarks.loadgen import BACKEND_DIR, stop_service
+
+SERVICIOS = ("auth", "booking", "payment", "reservation", "workshops")
+MODOS = {"migrar": {"MIGRATE_ON_START": "1"}, "verificar": {"MIGRATE_ON_START": "0"}}
+
+
+def _responde(url):
+    try:
+        return httpx.get(url, timeout=1).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+# Lanza el servicio y sondea cada 20 ms; devuelve los segundos hasta /health y /ready y las fases que reporta
+def medir(servicio, port, env, timeout):
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=os.path.join(BACKEND_DIR, f"{servicio}-service"),
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR, **env},
+    )
+    base = f"http://127.0.0.1:{port}/api/{servicio}"
+    live = None
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{servicio}-service terminó durante el arranque")
+            if live is None and _responde(f"{base}/health"):
+                live = time.perf_counter() - started
+            if live is not None and _responde(f"{base}/ready"):
+                ready = time.perf_counter() - started
+                fases = httpx.get(f"{base}/ready", timeout=1).json()["phases"]
+                return {"live_s": round(live, 3), "ready_s": round(ready, 3), "phases": fases}
+            time.sleep(0.02)
+        raise RuntimeError(f"{servicio}-service no quedó listo en {timeout} s")
+    finally:
+        stop_service(process)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--services", nargs="+", choices=SERVICIOS, default=list(SERVICIOS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--timeout", type=float, default=90)
+    args = parser.parse_args()
+
+    results = []
+    for servicio in args.services:
+        for modo, env in MODOS.items():
+            corridas = [medir(servicio, args.port, env, args.timeout) for _ in range(args.runs)]
+            results.append({
+                "service": f"{servicio}-service",
+                "mode": modo,
+                "live_s_median": round(statistics.median(c["live_s"] for c in corridas), 3),
+                "ready_s_median": round(statistics.median(c["ready_s"] for c in corridas), 3),
+                "ready_s_max": max(c["ready_s"] for c in corridas),
+                "phases_last": corridas[-1]["phases"],
+            })
+    print(json.dumps({"runs": args.runs, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
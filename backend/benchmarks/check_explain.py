@@ -0,0 +1,112 @@
+# Revisión de planes de ejecución: cada consulta frecuente de los endpoints debe usar su índice
+# Ejecuta EXPLAIN sobre la base de benchmarks (con las migraciones aplicadas y datos sembrados) y termina
+# con código 1 si alguna consulta recorre la tabla completa, usa otro índice u ordena en memoria sin permiso
+# Uso: python -m benchmarks.check_explain --workshops 100000 > planes.json
+import argparse                                                    # Parámetros de línea de comandos
+import json                                                        # Resultado legible por máquinas
+import os                                                          # Ruta del código de workshops-service
+import sys                                                         # Importación de search.py y código de salida
+from datetime import date                                          # Valor del cursor de paginación
+from benchmarks.loadgen import BACKEND_DIR
+from benchmarks.seed import connect_bench, seed_bookings, seed_users, seed_workshops, user_email
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "workshops-service"))
+from search import COINCIDENCIA, consulta_fulltext                 # Misma preparación que el servicio
+
+COLUMNAS = "id, title, description, category, date, max_participants, current_participants, price"
+HISTORIAL = "b.id, b.user_email, b.workshop_id, b.status, b.payment_status, w.title, w.category, w.date, w.price"
+
+# (endpoint, consulta, parámetros, índice esperado, se permite "Using filesort")
+# Las consultas replican las de cada servicio; si una cambia, debe actualizarse aquí también
+CONSULTAS = [
+    ("GET /api/workshops (catálogo)",
+     f"SELECT {COLUMNAS} FROM workshops WHERE has_seats = 1 ORDER BY date ASC, id ASC",
+     (), "idx_workshops_cupo_fecha", False),
+    ("GET /api/workshops?cursor= (página siguiente)",
+     f"SELECT {COLUMNAS} FROM workshops WHERE has_seats = 1 AND (date, id) > (%s, %s) "
+     "ORDER BY date ASC, id ASC LIMIT %s",
+     (date.today().isoformat(), 0, 51), "idx_workshops_cupo_fecha", False),
+    ("GET /api/workshops/buscar?categoria=",
+     f"SELECT {COLUMNAS} FROM workshops WHERE has_seats = 1 AND category = %s ORDER BY date ASC, id ASC",
+     ("cocina",), "idx_workshops_categoria", False),
+    ("GET /api/workshops/buscar?palabra=",
+     f"SELECT {COLUMNAS}, {COINCIDENCIA} AS relevancia FROM workshops WHERE has_seats = 1 AND {COINCIDENCIA}",
+     (consulta_fulltext("pasta"), consulta_fulltext("pasta")), "ft_workshops_texto", True),
+    ("POST /api/workshops/importar (títulos existentes)",
+     "SELECT title FROM workshops WHERE title IN (%s, %s)",
+     ("Taller 1 de pasta", "Taller 2 de sushi"), "uq_workshops_title", False),
+    ("POST /api/auth/login",
+     "SELECT email, password FROM users WHERE email = %s",
+     (user_email(1),), "email", False),
+    ("POST /api/booking/reservar (cupo)",
+     "UPDATE workshops SET current_participants = current_participants + 1 "
+     "WHERE id = %s AND current_participants < max_participants",
+     (1,), "PRIMARY", False),
+    ("POST /api/booking/reservar/lote (reservas existentes)",
+     "SELECT user_email, workshop_id FROM bookings WHERE (user_email, workshop_id) IN ((%s, %s), (%s, %s))",
+     (user_email(1), 1, user_email(2), 2), "user_email", False),
+    ("GET /api/booking/usuario/{email}",
+     f"SELECT {HISTORIAL} FROM bookings b JOIN workshops w ON w.id = b.workshop_id "
+     "WHERE b.user_email = %s ORDER BY b.id DESC LIMIT %s",
+     (user_email(1), 51), "idx_bookings_usuario", False),
+    ("GET /api/booking/usuario/{email}?cursor= (página siguiente)",
+     f"SELECT {HISTORIAL} FROM bookings b JOIN workshops w ON w.id = b.workshop_id "
+     "WHERE b.user_email = %s AND ((b.id < %s)) ORDER BY b.id DESC LIMIT %s",
+     (user_email(1), 1_000_000, 51), "idx_bookings_usuario", False),
+    ("Reservas confirmadas de un taller",
+     "SELECT COUNT(*) FROM bookings WHERE workshop_id = %s AND status = 'Confirmada'",
+     (1,), "idx_bookings_workshop", False),
+]
+
+
+# Revisa el plan de una consulta y devuelve la lista de problemas encontrados
+def revisar(plan, indice, permite_filesort):
+    problemas = []
+    fila = plan[0]
+    if fila["type"] == "ALL":
+        problemas.append("recorre la tabla completa")
+    if fila["key"] != indice:
+        problemas.append(f"usa el índice {fila['key']} en lugar de {indice}")
+    extra = fila["Extra"] or ""
+    if "Using filesort" in extra and not permite_filesort:
+        problemas.append("ordena en memoria (Using filesort)")
+    if "Using temporary" in extra:
+        problemas.append("usa una tabla temporal")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workshops", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--bookings", type=int, default=50_000)
+    args = parser.parse_args()
+
+    conn = connect_bench()
+    seed_workshops(conn, args.workshops)
+    seed_users(conn, args.users)
+    seed_bookings(conn, args.bookings, args.users)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("ANALYZE TABLE users, workshops, bookings")
+    cursor.fetchall()
+
+    results, fallidas = [], 0
+    for endpoint, sql, params, indice, permite_filesort in CONSULTAS:
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = cursor.fetchall()
+        problemas = revisar(plan, indice, permite_filesort)
+        fallidas += bool(problemas)
+        results.append({
+            "endpoint": endpoint,
+            "ok": not problemas,
+            "problems": problemas,
+            "plan": [{key: fila[key] for key in ("table", "type", "key", "rows", "Extra")} for fila in plan],
+        })
+    cursor.close()
+    conn.close()
+    print(json.dumps({"failed": fallidas, "results": results}, indent=2, default=str))
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == "__main__":
+    main()
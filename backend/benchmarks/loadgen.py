@@ -0,0 +1,93 @@
+# Generador de carga asíncrono: mide throughput, percentiles de latencia y tasa de error
+import asyncio                                                     # Clientes concurrentes en un solo proceso
+import os                                                          # Variables de entorno para los servicios lanzados
+import subprocess                                                  # Arranque de los servicios bajo prueba
+import sys                                                         # Intérprete actual para lanzar uvicorn
+import time                                                        # Medición de latencias
+import httpx                                                       # Cliente HTTP asíncrono
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Percentil por rango más cercano sobre una lista ya ordenada
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# Resume las latencias (en segundos) y errores de una corrida
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "duration_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+# Ejecuta "send(client, i)" con "concurrency" clientes hasta completar "requests" peticiones
+# send devuelve la respuesta httpx; se cuentan como error las excepciones y los códigos no esperados
+async def run_load(base_url, send, requests, concurrency, ok_status=(200,)):
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    response = await send(client, i)
+                    ok = response.status_code in ok_status
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed)
+
+
+# Lanza un servicio con uvicorn (sin --reload) y espera a que su ruta de readiness responda 200
+def start_service(service, port, env=None, health_path="/", workers=1, timeout=90):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.join(BACKEND_DIR, service),
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR, **(env or {})},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{service} terminó durante el arranque")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}{health_path}", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{service} no respondió en {timeout} s")
+
+
+def stop_service(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
@@ -0,0 +1,138 @@
+# Creación de una base de datos aislada para benchmarks y carga masiva de talleres
+import os                                                          # Nombre de la base de datos de benchmarks
+import random                                                      # Datos sintéticos reproducibles
+from datetime import date, timedelta                               # Fechas de los talleres
+import bcrypt                                                      # Hash de la contraseña de los usuarios sintéticos
+import mysql.connector                                             # Conexión con base de datos MySQL
+from common.db import DB_CONFIG                                    # Host y credenciales compartidos con los servicios
+from common.migrations import migrate                              # Mismo esquema que los servicios
+
+BENCH_DATABASE = os.getenv("BENCH_DATABASE", "mastercook_bench")
+CATEGORIAS = ["cocina", "reposteria", "panaderia", "vinos", "cocteleria", "vegana", "asiatica", "mexicana"]
+PALABRAS = ["pasta", "risotto", "sushi", "tacos", "pan", "masa madre", "chocolate", "postres", "mariscos",
+            "parrilla", "cafe", "salsas", "fermentos", "ramen", "tapas", "ceviche", "empanadas", "helados"]
+
+# Contraseña de todos los usuarios sintéticos; el hash se calcula una sola vez con el costo de producción
+BENCH_PASSWORD = "Password123"
+BENCH_BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+
+# Conexión a la base de datos de benchmarks (se crea si no existe)
+def connect_bench():
+    config = {key: value for key, value in DB_CONFIG.items() if key != "database"}
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {BENCH_DATABASE}")
+    cursor.close()
+    conn.database = BENCH_DATABASE
+    return conn
+
+
+# Fila sintética de taller; la semilla hace que cada corrida genere los mismos datos
+def fake_workshop(rng, index):
+    palabra = rng.choice(PALABRAS)
+    maximo = rng.randint(5, 40)
+    return (
+        f"Taller {index} de {palabra}",
+        f"Aprende {palabra} y {rng.choice(PALABRAS)} con chefs invitados. " * rng.randint(2, 6),
+        rng.choice(CATEGORIAS),
+        date.today() + timedelta(days=rng.randint(1, 730)),
+        maximo,
+        rng.randint(0, maximo),
+        round(rng.uniform(10, 250), 2),
+    )
+
+
+# Completa la tabla de talleres hasta "total" filas con INSERT de varias filas
+def seed_workshops(conn, total, batch=5000, seed=42):
+    create_schema(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM workshops")
+    existing = cursor.fetchone()[0]
+    rng = random.Random(seed + existing)
+    for start in range(existing, total, batch):
+        rows = [fake_workshop(rng, i) for i in range(start, min(start + batch, total))]
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+        cursor.execute(
+            "INSERT INTO workshops (title, description, category, date, max_participants, current_participants, price) "
+            f"VALUES {placeholders}",
+            [value for row in rows for value in row],
+        )
+        conn.commit()
+    cursor.close()
+
+
+# Aplica a la base de benchmarks las mismas migraciones que usan los servicios
+def create_schema(conn):
+    migrate(conn.database, nombre="benchmarks")
+
+
+# Correo del usuario sintético número i
+def user_email(index):
+    return f"usuario{index}@bench.mastercook.com"
+
+
+# Completa la tabla de usuarios hasta "total" usuarios sintéticos
+def seed_users(conn, total, batch=5000):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM users WHERE email LIKE %s", ("%@bench.mastercook.com",))
+    existing = cursor.fetchone()[0]
+    hashed = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(BENCH_BCRYPT_ROUNDS)).decode()
+    for start in range(existing, total, batch):
+        rows = [(f"Usuario {i}", user_email(i), hashed) for i in range(start, min(start + batch, total))]
+        cursor.execute(
+            "INSERT IGNORE INTO users (name, email, password) VALUES " + ", ".join(["(%s, %s, %s)"] * len(rows)),
+            [value for row in rows for value in row],
+        )
+        conn.commit()
+    cursor.close()
+
+
+# Crea (o reinicia) un taller con "capacity" cupos y sin reservas; devuelve su id
+def reset_hot_workshop(conn, capacity, title="Taller flash sale"):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM workshops WHERE title = %s", (title,))
+    row = cursor.fetchone()
+    if row:
+        workshop_id = row[0]
+        cursor.execute("DELETE FROM bookings WHERE workshop_id = %s", (workshop_id,))
+        cursor.execute("UPDATE workshops SET current_participants = 0, max_participants = %s WHERE id = %s",
+                       (capacity, workshop_id))
+    else:
+        cursor.execute(
+            "INSERT INTO workshops (title, description, category, date, max_participants, price) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            (title, "Taller con alta demanda para pruebas de concurrencia", "cocina",
+             date.today() + timedelta(days=30), capacity, 99.0),
+        )
+        workshop_id = cursor.lastrowid
+    conn.commit()
+    cursor.close()
+    return workshop_id
+
+
+# Completa la tabla de reservas hasta "total" reservas de usuarios sintéticos en talleres al azar
+# Al final los cupos usados de cada taller se igualan a sus reservas (ampliando el máximo si hace falta)
+def seed_bookings(conn, total, users, batch=5000, seed=42):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM bookings")
+    existing = cursor.fetchone()[0]
+    cursor.execute("SELECT MIN(id), MAX(id) FROM workshops")
+    first, last = cursor.fetchone()
+    rng = random.Random(seed + existing)
+    while existing < total:
+        rows = [(user_email(rng.randrange(users)), rng.randint(first, last))
+                for _ in range(min(batch, total - existing))]
+        cursor.execute(
+            "INSERT IGNORE INTO bookings (user_email, workshop_id) VALUES " + ", ".join(["(%s, %s)"] * len(rows)),
+            [value for row in rows for value in row],
+        )
+        conn.commit()
+        existing += cursor.rowcount
+    cursor.execute("""
+        UPDATE workshops w
+        JOIN (SELECT workshop_id, COUNT(*) AS total FROM bookings GROUP BY workshop_id) b ON b.workshop_id = w.id
+        SET w.current_participants = b.total, w.max_participants = GREATEST(w.max_participants, b.total)
+    """)
+    conn.commit()
+    cursor.close()
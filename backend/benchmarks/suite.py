@@ -0,0 +1,169 @@
+# Suite de carga reproducible del backend: siembra la base de benchmarks y ejecuta escenarios mixtos
+# contra los servicios reales (lanzados con uvicorn sobre BENCH_DATABASE)
+#   login_storm:    ráfaga de POST /api/auth/login de usuarios distintos (bcrypt y caché de perfiles)
+#   catalog_browse: catálogo completo (con y sin If-None-Match), páginas con fields= y búsquedas
+#   flash_sale:     muchos usuarios reservando el mismo taller con pocos cupos (verifica la sobreventa)
+# El resultado es JSON con el commit y la configuración, para comparar corridas entre commits:
+#   python -m benchmarks.suite run --users 5000 --workshops 20000 --bookings 50000 --output base.json
+#   python -m benchmarks.suite compare base.json nuevo.json
+import argparse                                                    # Parámetros de línea de comandos
+import asyncio                                                     # Ejecución del generador de carga
+import json                                                        # Resultado legible por máquinas
+import platform                                                    # Datos de la máquina en el resultado
+import random                                                      # Mezcla reproducible de peticiones
+import subprocess                                                  # Commit actual
+import time                                                        # Fecha de la corrida
+from benchmarks.bench_reservation import sync_counter, verificar
+from benchmarks.loadgen import BACKEND_DIR, run_load, start_service, stop_service
+from benchmarks.seed import (BENCH_DATABASE, BENCH_PASSWORD, CATEGORIAS, PALABRAS, connect_bench, create_schema,
+                             reset_hot_workshop, seed_bookings, seed_users, seed_workshops, user_email)
+
+# Servicio, puerto y ruta de salud de cada escenario
+SERVICIOS = {
+    "login_storm": ("auth-service", 8201, "/api/auth/ready"),
+    "catalog_browse": ("workshops-service", 8202, "/api/workshops/ready"),
+    "flash_sale": ("booking-service", 8203, "/api/booking/ready"),
+}
+
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Login de usuarios sintéticos distintos; 503 (cola de cifrado llena) cuenta como error
+def login_storm(args, conn):
+    send = lambda client, i: client.post("/api/auth/login", data={
+        "username": user_email(i % args.users), "password": BENCH_PASSWORD})
+    return asyncio.run(run_load(args.url, send, args.requests, args.concurrency))
+
+
+# Mezcla de navegación: 50 % catálogo completo (la mitad revalidando con ETag), 25 % páginas, 25 % búsquedas
+def catalog_browse(args, conn):
+    rng = random.Random(args.seed)
+    acciones = [rng.random() for _ in range(args.requests)]
+    etag = None
+
+    async def send(client, i):
+        nonlocal etag
+        accion = acciones[i]
+        if accion < 0.25:
+            response = await client.get("/api/workshops")
+            etag = response.headers.get("etag", etag)
+            return response
+        if accion < 0.5:
+            return await client.get("/api/workshops", headers={"If-None-Match": etag or '"0"'})
+        if accion < 0.75:
+            return await client.get("/api/workshops", params={"limit": 50, "fields": "id,title,date,price"})
+        params = {"palabra": PALABRAS[i % len(PALABRAS)], "limit": 20}
+        if accion > 0.9:
+            params["categoria"] = CATEGORIAS[i % len(CATEGORIAS)]
+        return await client.get("/api/workshops/buscar", params=params)
+
+    # 304 (ETag vigente) y 404 (búsqueda sin resultados) son respuestas válidas
+    return asyncio.run(run_load(args.url, send, args.requests, args.concurrency, ok_status=(200, 304, 404)))
+
+
+# Todos los usuarios intentan reservar el mismo taller; 400 (sin cupo) es la respuesta esperada al agotarse
+def flash_sale(args, conn):
+    workshop_id = reset_hot_workshop(conn, args.capacity)
+    sync_counter(args.url, workshop_id)
+    send = lambda client, i: client.post("/api/booking/reservar",
+                                         json={"user_email": user_email(i), "workshop_id": workshop_id})
+    result = asyncio.run(run_load(args.url, send, min(args.requests, args.users), args.concurrency,
+                                  ok_status=(200, 400)))
+    sync_counter(args.url)
+    result.update(verificar(conn, workshop_id))
+    return result
+
+
+ESCENARIOS = {"login_storm": login_storm, "catalog_browse": catalog_browse, "flash_sale": flash_sale}
+
+
+def run(args):
+    conn = connect_bench()
+    create_schema(conn)
+    seed_users(conn, args.users)
+    seed_workshops(conn, args.workshops)
+    seed_bookings(conn, args.bookings, args.users)
+
+    results = {}
+    for name in args.scenario or list(ESCENARIOS):
+        service, port, health_path = SERVICIOS[name]
+        env = {"MYSQL_DATABASE": BENCH_DATABASE, "SEAT_COUNTER": args.seat_counter}
+        process = start_service(service, port, env, health_path, args.workers)
+        args.url = f"http://127.0.0.1:{port}"
+        try:
+            if args.warmup:                              # Calentamiento: conexiones, cachés e instantáneas
+                ESCENARIOS[name](argparse.Namespace(**{**vars(args), "requests": args.warmup}), conn)
+            results[name] = ESCENARIOS[name](args, conn)
+        finally:
+            stop_service(process)
+    conn.close()
+
+    report = {
+        "commit": commit_actual(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("func", "url", "output")},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+# Diferencia porcentual de throughput y latencias entre dos corridas (positivo en rps = mejora)
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    cambios = {}
+    for name in base["results"].keys() & new["results"].keys():
+        antes, despues = base["results"][name], new["results"][name]
+        cambios[name] = {
+            metric: {"base": antes[metric], "new": despues[metric],
+                     "change_pct": round((despues[metric] - antes[metric]) / antes[metric] * 100, 2)
+                     if antes[metric] else None}
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "error_rate")
+        }
+    print(json.dumps({"base": base["commit"], "new": new["commit"], "results": cambios}, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="Siembra la base y ejecuta los escenarios")
+    run_parser.add_argument("--users", type=int, default=5000)
+    run_parser.add_argument("--workshops", type=int, default=20000)
+    run_parser.add_argument("--bookings", type=int, default=50000)
+    run_parser.add_argument("--scenario", choices=list(ESCENARIOS), action="append")
+    run_parser.add_argument("--requests", type=int, default=5000)
+    run_parser.add_argument("--concurrency", type=int, default=100)
+    run_parser.add_argument("--capacity", type=int, default=100, help="Cupos del taller de la flash sale")
+    run_parser.add_argument("--warmup", type=int, default=200, help="Peticiones de calentamiento (no se miden)")
+    run_parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn por servicio")
+    run_parser.add_argument("--seat-counter", choices=("1", "0"), default="1",
+                            help="Contador de cupos de booking-service (0 = UPDATE condicional por reserva)")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="Archivo donde guardar el resultado")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compara dos resultados guardados")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Exportación de reservas en streaming como NDJSON o CSV
+# Las filas llegan por bloques desde un cursor del lado del servidor; cada bloque se serializa y se envía
+# antes de leer el siguiente, así la memoria no depende de cuántas reservas haya
+import csv                                                         # Escritura CSV con el escapado estándar
+import io                                                          # Búfer de texto por bloque
+import json                                                        # Una línea JSON por reserva
+from datetime import date                                          # Fecha del taller
+from decimal import Decimal                                        # Precio del taller (DECIMAL en MySQL)
+
+# Columnas exportadas, en orden: datos de la reserva y del taller reservado
+COLUMNAS_EXPORTACION = ("id", "user_email", "workshop_id", "status", "payment_status",
+                        "title", "category", "date", "price")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+# Mismos tipos JSON que jsonable_encoder en las respuestas normales: DECIMAL como número, fechas en ISO 8601
+def _valor_json(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def ndjson(filas):
+    return "".join(json.dumps(fila, ensure_ascii=False, separators=(",", ":"), default=_valor_json) + "\n"
+                   for fila in filas).encode()
+
+
+def csv_encabezado():
+    return (",".join(COLUMNAS_EXPORTACION) + "\r\n").encode()
+
+
+def csv_filas(filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([fila[columna] for columna in COLUMNAS_EXPORTACION] for fila in filas)
+    return buffer.getvalue().encode()
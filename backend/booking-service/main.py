@@ -1,9 +1,28 @@
 # Importación de librerías necesarias
-from fastapi import FastAPI, HTTPException                     # FastAPI para crear el servicio web y manejar errores
+from fastapi import FastAPI, HTTPException, Header, Query      # FastAPI para crear el servicio web y manejar errores
 from fastapi.middleware.cors import CORSMiddleware             # Middleware para permitir peticiones desde otros dominios (como un frontend)
-from pydantic import BaseModel, EmailStr, Field                # Validación de datos con Pydantic
-import mysql.connector                                         # Conexión a base de datos MySQL
-import time                                                    # Usado para esperar entre reintentos de conexión
+from fastapi.responses import JSONResponse, Response, StreamingResponse   # Respuestas JSON y exportaciones
+from pydantic import BaseModel, EmailStr, Field, validator     # Validación de datos con Pydantic
+from typing import List, Literal, Optional                     # Tipos para listas, valores permitidos y opcionales
+from datetime import date                                      # Fecha del taller en el historial
+import datetime                                                # Tipo de campos llamados "date" con valor por defecto
+from common.db import (DatabaseUnavailable, IntegrityViolation, # Errores de base de datos
+                       ER_DUP_ENTRY, ER_NO_REFERENCED_ROW)
+from common.async_db import create_pool                        # Pool asíncrono compartido de conexiones MySQL
+from common.startup import ServiceStartup                      # Arranque en segundo plano y /ready
+from common.outbox import (RESERVA_CANCELADA, RESERVA_CREADA,  # Eventos entre servicios
+                           OutboxRelay, publicar)
+from common.metrics import (CONTENT_TYPE, MetricsMiddleware,   # Métricas Prometheus
+                            register_collector, render_metrics)
+from common.analytics import con_ocupacion, consulta_resumen, registrar   # Resumen de ocupación e ingresos
+from common.pagination import InvalidCursor, decode_cursor, keyset_condition, split_page   # Paginación keyset
+from common.fastjson import respuesta_lista                    # Respuestas JSON sin revalidar filas (FAST_JSON)
+from collections import Counter                                # Cupos pedidos por taller en un lote
+from seats import SeatCounter                                  # Contador de cupos compartido entre workers
+from export import MEDIA_TYPES, csv_encabezado, csv_filas, ndjson   # Exportación en streaming
+import asyncio                                                 # Límite de exportaciones simultáneas
+import hmac                                                    # Comparación de la clave de administración
+import os                                                      # Configuración desde variables de entorno
 
 # Instancia principal de la aplicación FastAPI
 app = FastAPI(title="Booking Service", version="1.0")
@@ -15,8 +34,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Middleware de métricas: latencia por ruta y peticiones en curso (se exponen en /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Modelo de entrada para hacer una reserva
 class BookingRequest(BaseModel):
     user_email: EmailStr
@@ -30,113 +53,472 @@ class BookingResponse(BaseModel):
     status: str
     payment_status: str
 
-# Función que intenta conectarse a la base de datos hasta 20 veces antes de fallar
-def get_connection():
-    for attempt in range(20):
+# Reserva del historial de un usuario junto con los datos del taller (una sola consulta con JOIN)
+class BookingHistoryItem(BookingResponse):
+    title: str
+    category: str
+    date: date
+    price: float
+
+# Fila del reporte de ocupación: la clave del grupo (categoría, fecha o ambas) y sus totales
+class OccupancyRow(BaseModel):
+    category: Optional[str] = None
+    date: Optional[datetime.date] = None      # Con "date: Optional[date] = None" el nombre del campo tapa al tipo
+    workshops: int
+    capacity: int
+    booked: int
+    paid: int
+    revenue: float
+    occupancy: float
+
+# Máximo de reservas por lote y filas por cada INSERT de varias filas
+MAX_RESERVAS_LOTE = 1000
+FILAS_POR_INSERT = 500
+
+# Historial: reservas por página y columnas de la reserva y del taller
+LIMITE_HISTORIAL = 50
+COLUMNAS_HISTORIAL = """
+    b.id, b.user_email, b.workshop_id, b.status, b.payment_status, w.title, w.category, w.date, w.price
+"""
+
+# Exportación: filas por bloque leído del cursor y exportaciones simultáneas por worker (cada una ocupa una conexión)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+exportaciones = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
+# Clave que deben enviar las rutas administrativas en X-Admin-Key; sin configurar, esas rutas responden 403
+ADMIN_KEY = os.getenv("ADMIN_KEY", "")
+
+def verificar_admin(clave):
+    if not ADMIN_KEY or clave is None or not hmac.compare_digest(clave.encode(), ADMIN_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Se requiere la clave de administración")
+
+# Exportación en streaming que devuelve su lugar en el límite al terminar, se haya leído todo o no
+# Se libera aquí y no solo en el generador: si el cliente se desconecta antes de la primera lectura,
+# el generador nunca llega a ejecutarse
+class ExportacionResponse(StreamingResponse):
+    async def __call__(self, scope, receive, send):
         try:
-            return mysql.connector.connect(
-                host="db",                   # Nombre del host o servicio
-                user="root",                 # Usuario de base de datos
-                password="12345",            # Contraseña
-                database="users_db"          # Nombre de la base de datos
-            )
-        except mysql.connector.Error:
-            print(f"[booking-service] Intento {attempt+1} fallido, esperando...")
-            time.sleep(3)
-    raise Exception("No se pudo conectar a la base de datos.")
-
-# Evento que se ejecuta al iniciar el servidor
-# Crea la tabla de reservas si no existe
+            await super().__call__(scope, receive, send)
+        finally:
+            exportaciones.release()
+
+# Modelo de entrada para reservar varios talleres y usuarios a la vez
+# "todo_o_nada" confirma solo si todas las reservas son válidas; "mejor_esfuerzo" confirma las válidas
+class BookingBatchRequest(BaseModel):
+    reservas: List[BookingRequest]
+    modo: Literal["todo_o_nada", "mejor_esfuerzo"] = "mejor_esfuerzo"
+
+    @validator("reservas")
+    def validar_tamano(cls, v):
+        if not v or len(v) > MAX_RESERVAS_LOTE:
+            raise ValueError(f"El lote debe tener entre 1 y {MAX_RESERVAS_LOTE} reservas.")
+        return v
+
+# Resultado de cada reserva del lote: ok, duplicado, lleno o desconocido (usuario o taller inexistente)
+class BookingBatchItem(BaseModel):
+    user_email: EmailStr
+    workshop_id: int
+    resultado: str
+    id: Optional[int] = None
+
+# Modelo de salida del lote
+class BookingBatchResponse(BaseModel):
+    modo: str
+    aplicado: bool
+    confirmadas: int
+    resultados: List[BookingBatchItem]
+
+# Pool de conexiones del servicio (driver y tamaño configurables por variables de entorno)
+pool = create_pool("booking-service")
+register_collector("db_pool", pool.stats, labels=("pool", "driver"))
+
+# Contador de cupos con escritura diferida a MySQL; SEAT_COUNTER=0 vuelve al UPDATE condicional por reserva
+asientos = SeatCounter("booking-service") if os.getenv("SEAT_COUNTER", "1") == "1" else None
+if asientos is not None:
+    register_collector("seat_counter", asientos.stats, labels=("counter",))
+
+# Las cancelaciones (reservation-service) liberan cupos en el contador al recibir el evento; si el cupo pasó
+# a alguien de la lista de espera (cupo_liberado falso) no hay nada que liberar
+relay = OutboxRelay("booking-service")
+
+async def liberar_cupos(eventos):
+    await asientos.liberar([(evento["id"], evento["workshop_id"]) for evento in eventos
+                            if evento["datos"].get("cupo_liberado")])
+
+if asientos is not None:
+    relay.suscribir((RESERVA_CANCELADA,), liberar_cupos)
+    register_collector("outbox_relay", relay.stats, labels=("relay",))
+
+async def iniciar_eventos():
+    await relay.start(pool)
+
+async def iniciar_contador():
+    await asientos.start(pool)
+
+# Conexión, migraciones y recuperación del contador en segundo plano, con reintentos; /ready indica cuándo terminó
+arranque = ServiceStartup("booking-service", pool,
+                          pasos=(iniciar_eventos, iniciar_contador) if asientos is not None else ())
+register_collector("startup", arranque.stats, labels=("service",))
+
+# Si la base de datos no responde se devuelve 503 en lugar de bloquear la petición
+@app.exception_handler(DatabaseUnavailable)
+def db_unavailable_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Base de datos no disponible"})
+
+# Evento que se ejecuta al iniciar el servidor: no espera a MySQL, el arranque sigue en segundo plano
 @app.on_event("startup")
-def create_table():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS bookings (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_email VARCHAR(100),
-            workshop_id INT,
-            status ENUM('Confirmada', 'Cancelada', 'Completada') DEFAULT 'Confirmada',
-            payment_status ENUM('Pendiente', 'Pagado') DEFAULT 'Pendiente',
-            UNIQUE(user_email, workshop_id)  -- Impide que un mismo usuario reserve el mismo taller dos veces
-        )
-    """)
-    conn.commit()
-    cursor.close()
-    conn.close()
+async def startup():
+    arranque.start()
+
+# Evento que se ejecuta al apagar el servidor: escribe los cupos pendientes y cierra las conexiones del pool
+@app.on_event("shutdown")
+async def close_pool():
+    await arranque.stop()
+    if asientos is not None:
+        await relay.stop()
+        await asientos.stop()
+    await pool.close()
+
+# Sentencia que reclama un cupo de forma atómica: solo actualiza si todavía queda lugar
+RESERVAR_CUPO_SQL = """
+    UPDATE workshops
+    SET current_participants = current_participants + 1
+    WHERE id = %s AND current_participants < max_participants
+"""
+
+# Traduce las restricciones FOREIGN KEY y UNIQUE de bookings a respuestas HTTP
+def error_reserva(exc):
+    if exc.code == ER_DUP_ENTRY:
+        return HTTPException(status_code=409, detail="Ya tienes una reserva para este taller")
+    if exc.code == ER_NO_REFERENCED_ROW:
+        return HTTPException(status_code=404, detail="El usuario no está registrado")
+    return exc
+
+# Evento reserva_creada, guardado en la outbox en la misma transacción que la reserva
+def evento_reserva(reserva_id, user_email, workshop_id):
+    return RESERVA_CREADA, workshop_id, {"booking_id": reserva_id, "user_email": user_email}
 
 # Ruta para reservar un taller
+# Con el contador de cupos, el cupo se toma en memoria compartida (sin bloquear la fila del taller) y solo
+# se inserta la reserva; un taller agotado se rechaza sin consultar MySQL
+# Sin contador, el cupo se reclama con un UPDATE condicional en la misma transacción que el INSERT
+# Usuario inexistente y reserva duplicada se detectan por las restricciones FOREIGN KEY y UNIQUE
 @app.post("/api/booking/reservar", summary="Reservar un taller con validación completa")
-def reservar_taller(data: BookingRequest):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Verificar si el usuario existe en la base de datos
-    cursor.execute("SELECT * FROM users WHERE email = %s", (data.user_email,))
-    usuario = cursor.fetchone()
-    if not usuario:
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="El usuario no está registrado")
-
-    # Verificar si el taller existe
-    cursor.execute("SELECT * FROM workshops WHERE id = %s", (data.workshop_id,))
-    taller = cursor.fetchone()
-    if not taller:
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="Taller no encontrado")
-
-    # Validar que aún haya cupos disponibles en el taller
-    if taller["current_participants"] >= taller["max_participants"]:
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=400, detail="No hay cupos disponibles para este taller")
-
-    # Verificar si el usuario ya tiene una reserva para este taller
-    cursor.execute("SELECT * FROM bookings WHERE user_email = %s AND workshop_id = %s", 
-                   (data.user_email, data.workshop_id))
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=409, detail="Ya tienes una reserva para este taller")
-
-    # Insertar la nueva reserva
-    cursor.execute("""
-        INSERT INTO bookings (user_email, workshop_id)
-        VALUES (%s, %s)
-    """, (data.user_email, data.workshop_id))
-
-    # Actualizar el número de participantes del taller
-    cursor.execute("""
-        UPDATE workshops
-        SET current_participants = current_participants + 1
-        WHERE id = %s
-    """, (data.workshop_id,))
-
-    # Confirmar cambios y devolver la reserva recién creada
-    conn.commit()
-    cursor.execute("SELECT * FROM bookings WHERE user_email = %s AND workshop_id = %s",
-                   (data.user_email, data.workshop_id))
-    reserva = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return reserva
-
-# Ruta para listar todas las reservas hechas por un usuario dado
-@app.get("/api/booking/usuario/{email}", response_model=list[BookingResponse], summary="Listar reservas por usuario")
-def listar_reservas(email: EmailStr):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM bookings WHERE user_email = %s", (email,))
-    reservas = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    if not reservas:
+async def reservar_taller(data: BookingRequest):
+    if asientos is not None:
+        cupo = await asientos.tomar(data.workshop_id)
+        if cupo is None:
+            raise HTTPException(status_code=404, detail="Taller no encontrado")
+        if not cupo:
+            raise HTTPException(status_code=400, detail="No hay cupos disponibles para este taller")
+        confirmada = False
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("INSERT INTO bookings (user_email, workshop_id) VALUES (%s, %s)",
+                                       (data.user_email, data.workshop_id))
+                    reserva_id = conn.lastrowid
+                    await publicar(conn, [evento_reserva(reserva_id, data.user_email, data.workshop_id)])
+            confirmada = True
+        except IntegrityViolation as exc:
+            raise error_reserva(exc)
+        finally:
+            # El cupo queda pendiente de escribir en workshops o vuelve a estar libre
+            await asientos.cerrar(data.workshop_id, int(confirmada), int(not confirmada))
+    else:
+        async with pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    cupo = await conn.execute(RESERVAR_CUPO_SQL, (data.workshop_id,))
+                    if cupo:
+                        await conn.execute("INSERT INTO bookings (user_email, workshop_id) VALUES (%s, %s)",
+                                           (data.user_email, data.workshop_id))
+                        reserva_id = conn.lastrowid
+                        await registrar(conn, {data.workshop_id: (0, 1, 0)})
+                        await publicar(conn, [evento_reserva(reserva_id, data.user_email, data.workshop_id)])
+            except IntegrityViolation as exc:
+                # La transacción ya se deshizo, incluido el cupo reclamado
+                raise error_reserva(exc)
+
+            # Sin cupo reclamado: solo en este caso se consulta si el taller existe
+            if not cupo:
+                if not await conn.fetch_one("SELECT id FROM workshops WHERE id = %s", (data.workshop_id,)):
+                    raise HTTPException(status_code=404, detail="Taller no encontrado")
+                raise HTTPException(status_code=400, detail="No hay cupos disponibles para este taller")
+
+    # Devolver la reserva recién creada (los estados son los valores por defecto de la tabla)
+    return {
+        "id": reserva_id,
+        "user_email": data.user_email,
+        "workshop_id": data.workshop_id,
+        "status": "Confirmada",
+        "payment_status": "Pendiente",
+    }
+
+# Lote todo_o_nada con una reserva que falló al insertarse: deshace la transacción completa
+class LoteRechazado(Exception):
+    pass
+
+# Marcadores "(%s, %s), (%s, %s), ..." para un INSERT o IN de varias filas
+def marcadores(filas, columnas):
+    return ", ".join(["(" + ", ".join(["%s"] * columnas) + ")"] * filas)
+
+# Ruta para reservar en lote (grupos y empresas)
+# Usuarios, talleres y duplicados se validan con una consulta cada uno. Los cupos se toman del contador
+# (los que sobran se devuelven al terminar) o, sin contador, se bloquean las filas de los talleres
+# (FOR UPDATE, en orden de id) para repartirlos sin sobreventa
+@app.post("/api/booking/reservar/lote", response_model=BookingBatchResponse, summary="Reservar varios talleres en lote")
+async def reservar_lote(data: BookingBatchRequest):
+    pares = [(r.user_email.lower(), r.workshop_id) for r in data.reservas]
+    correos = sorted({correo for correo, _ in pares})
+    talleres_ids = sorted({taller for _, taller in pares})
+    resultados = [None] * len(pares)
+
+    talleres = {}                           # Taller -> cupos que se pueden asignar en este lote
+    nuevos = {}                             # Taller -> cupos asignados en este lote
+    confirmado = False
+    try:
+        if asientos is not None:
+            for taller, pedidos in sorted(Counter(taller for _, taller in pares).items()):
+                tomados = await asientos.tomar(taller, pedidos)
+                if tomados is not None:
+                    talleres[taller] = tomados
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                usuarios = {fila["email"].lower() for fila in await conn.fetch_all(
+                    f"SELECT email FROM users WHERE email IN ({', '.join(['%s'] * len(correos))})", correos)}
+                if asientos is None:
+                    talleres = {fila["id"]: fila["max_participants"] - fila["current_participants"]
+                                for fila in await conn.fetch_all(
+                                    f"SELECT id, max_participants, current_participants FROM workshops "
+                                    f"WHERE id IN ({', '.join(['%s'] * len(talleres_ids))}) ORDER BY id FOR UPDATE",
+                                    talleres_ids)}
+                unicos = list(dict.fromkeys(pares))
+                existentes = {(fila["user_email"].lower(), fila["workshop_id"]) for fila in await conn.fetch_all(
+                    f"SELECT user_email, workshop_id FROM bookings WHERE (user_email, workshop_id) IN ({marcadores(len(unicos), 2)})",
+                    [valor for par in unicos for valor in par])}
+
+                # Repartir los cupos en el orden recibido
+                vistos = set()
+                for i, par in enumerate(pares):
+                    correo, taller = par
+                    if correo not in usuarios or taller not in talleres:
+                        resultados[i] = "desconocido"
+                    elif par in existentes or par in vistos:
+                        resultados[i] = "duplicado"
+                    elif nuevos.get(taller, 0) >= talleres[taller]:
+                        resultados[i] = "lleno"
+                    else:
+                        resultados[i] = "ok"
+                        nuevos[taller] = nuevos.get(taller, 0) + 1
+                    vistos.add(par)
+
+                aplicado = data.modo == "mejor_esfuerzo" or all(r == "ok" for r in resultados)
+                confirmar = [par for par, resultado in zip(pares, resultados) if resultado == "ok"] if aplicado else []
+
+                ids = {}
+                if confirmar:
+                    # INSERT de varias filas por bloques y, sin contador, un UPDATE agrupado por taller
+                    fallidas = {}
+                    for inicio in range(0, len(confirmar), FILAS_POR_INSERT):
+                        bloque = confirmar[inicio:inicio + FILAS_POR_INSERT]
+                        try:
+                            await conn.execute(f"INSERT INTO bookings (user_email, workshop_id) VALUES {marcadores(len(bloque), 2)}",
+                                               [valor for par in bloque for valor in par])
+                        except IntegrityViolation:
+                            # La comprobación de duplicados no bloquea: otra petición pudo reservar el mismo par
+                            # (o se borró el usuario) entretanto. Solo se deshizo este INSERT; se repite fila por fila
+                            for par in bloque:
+                                try:
+                                    await conn.execute("INSERT INTO bookings (user_email, workshop_id) VALUES (%s, %s)", par)
+                                except IntegrityViolation as exc:
+                                    if exc.code not in (ER_DUP_ENTRY, ER_NO_REFERENCED_ROW):
+                                        raise
+                                    fallidas[par] = "duplicado" if exc.code == ER_DUP_ENTRY else "desconocido"
+                    if fallidas:
+                        resultados = [fallidas.get(par, resultado) if resultado == "ok" else resultado
+                                      for par, resultado in zip(pares, resultados)]
+                        for _, taller in fallidas:
+                            nuevos[taller] -= 1
+                        confirmar = [par for par in confirmar if par not in fallidas]
+                        if data.modo == "todo_o_nada":
+                            aplicado, confirmar = False, []
+                            raise LoteRechazado()
+                if confirmar:
+                    if asientos is None:
+                        for taller, cantidad in sorted(nuevos.items()):
+                            await conn.execute("UPDATE workshops SET current_participants = current_participants + %s WHERE id = %s",
+                                               (cantidad, taller))
+                    ids = {(fila["user_email"].lower(), fila["workshop_id"]): fila["id"] for fila in await conn.fetch_all(
+                        f"SELECT id, user_email, workshop_id FROM bookings WHERE (user_email, workshop_id) IN ({marcadores(len(confirmar), 2)})",
+                        [valor for par in confirmar for valor in par])}
+                    if asientos is None:
+                        await registrar(conn, {taller: (0, cantidad, 0) for taller, cantidad in nuevos.items()})
+                    await publicar(conn, [evento_reserva(ids[par], *par) for par in confirmar])
+        confirmado = aplicado
+    except LoteRechazado:
+        pass                            # La transacción ya se deshizo; se responde 409
+    finally:
+        # Los cupos asignados quedan pendientes de escribir; los que sobraron vuelven al contador
+        if asientos is not None:
+            for taller, tomados in talleres.items():
+                asignados = nuevos.get(taller, 0) if confirmado else 0
+                await asientos.cerrar(taller, asignados, tomados - asignados)
+
+    respuesta = {
+        "modo": data.modo,
+        "aplicado": aplicado,
+        "confirmadas": len(confirmar),
+        "resultados": [
+            {"user_email": r.user_email, "workshop_id": r.workshop_id, "resultado": resultado,
+             "id": ids.get(par) if resultado == "ok" else None}
+            for r, par, resultado in zip(data.reservas, pares, resultados)
+        ],
+    }
+    # En modo todo_o_nada, si alguna reserva falla no se confirma ninguna y se responde 409
+    if not aplicado:
+        return JSONResponse(status_code=409, content=respuesta)
+    return respuesta
+
+# Ruta para listar las reservas de un usuario, de la más reciente a la más antigua, con los datos de cada taller
+# Paginación keyset por id (índice idx_bookings_usuario); el cursor de la página siguiente va en X-Next-Cursor
+@app.get("/api/booking/usuario/{email}", response_model=list[BookingHistoryItem], summary="Listar reservas por usuario")
+async def listar_reservas(
+    email: EmailStr,
+    response: Response,
+    limit: int = Query(LIMITE_HISTORIAL, ge=1, le=500, description="Reservas por página"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+):
+    sql = f"""
+        SELECT {COLUMNAS_HISTORIAL} FROM bookings b JOIN workshops w ON w.id = b.workshop_id
+        WHERE b.user_email = %s
+    """
+    params = [email]
+    if cursor:
+        try:
+            valores = decode_cursor(cursor, (int,))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        condicion, condicion_params = keyset_condition(("b.id",), valores, descending=("b.id",))
+        sql += " AND " + condicion
+        params.extend(condicion_params)
+    sql += " ORDER BY b.id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    async with pool.acquire() as conn:
+        filas = await conn.fetch_all(sql, params)
+    if not filas and not cursor:
         raise HTTPException(status_code=404, detail="No se encontraron reservas")
-    return reservas
+    pagina, siguiente = split_page(filas, limit, ("id",))
+    return respuesta_lista(pagina, response, {"X-Next-Cursor": siguiente} if siguiente else None)
+
+# Ruta administrativa: exporta todas las reservas (o las de un taller) con los datos del taller, en NDJSON o CSV
+# Se lee con un cursor del lado del servidor y se envía por bloques, sin cargar el resultado completo en memoria
+@app.get("/api/booking/exportar", summary="Exportar reservas en streaming (NDJSON o CSV)")
+async def exportar_reservas(
+    formato: Literal["ndjson", "csv"] = Query("ndjson"),
+    workshop_id: Optional[int] = Query(None, gt=0, description="Solo las reservas de este taller"),
+    admin_key: Optional[str] = Header(None, alias="X-Admin-Key"),
+):
+    verificar_admin(admin_key)
+    # Cada exportación retiene una conexión del pool mientras dura; las que exceden el límite se rechazan
+    # El lugar se toma aquí, antes de devolver la respuesta: con el semáforo libre acquire() no cede el control,
+    # así que dos peticiones no pueden pasar a la vez la comprobación y quedar esperando dentro del generador
+    if exportaciones.locked():
+        return JSONResponse(status_code=503, content={"detail": "Hay demasiadas exportaciones en curso"},
+                            headers={"Retry-After": "5"})
+    await exportaciones.acquire()
+    sql = f"SELECT {COLUMNAS_HISTORIAL} FROM bookings b JOIN workshops w ON w.id = b.workshop_id"
+    params = ()
+    if workshop_id is not None:
+        sql += " WHERE b.workshop_id = %s"
+        params = (workshop_id,)
+    sql += " ORDER BY b.id"
+    serializar = ndjson if formato == "ndjson" else csv_filas
+
+    async def generar():
+        if formato == "csv":
+            yield csv_encabezado()
+        async with pool.acquire() as conn:
+            # Un cliente lento no debe hacer que MySQL corte el envío del resultado pendiente
+            await conn.execute("SET SESSION net_write_timeout = 600")
+            bloques = conn.stream(sql, params, EXPORT_BATCH_SIZE)
+            try:
+                async for filas in bloques:
+                    yield serializar(filas)
+            finally:
+                # La conexión vuelve al pool con el valor por defecto, no con el de la exportación. Primero se
+                # cierra el cursor; si el envío se cortó y eso cerró la conexión, el pool la descarta
+                await bloques.aclose()
+                if not conn.cerrada:
+                    await conn.execute("SET SESSION net_write_timeout = DEFAULT")
+
+    nombre = f"reservas{f'_taller_{workshop_id}' if workshop_id else ''}.{formato}"
+    return ExportacionResponse(generar(), media_type=MEDIA_TYPES[formato],
+                               headers={"Content-Disposition": f'attachment; filename="{nombre}"'})
+
+# Reporte de ocupación e ingresos por categoría, por fecha o por ambas
+# Se lee del resumen occupancy_stats (O(grupos)), que se mantiene en la misma transacción que cada cambio
+@app.get("/api/booking/analitica", response_model=List[OccupancyRow], summary="Ocupación e ingresos por categoría y fecha")
+async def analitica(
+    agrupar: Literal["categoria", "fecha", "categoria_fecha"] = Query("categoria_fecha"),
+    desde: Optional[date] = Query(None, description="Fecha mínima del taller"),
+    hasta: Optional[date] = Query(None, description="Fecha máxima del taller"),
+    categoria: Optional[str] = Query(None),
+):
+    sql, params = consulta_resumen(agrupar, desde, hasta, categoria)
+    async with pool.acquire() as conn:
+        filas = await conn.fetch_all(sql, params)
+    return [con_ocupacion(fila) for fila in filas]
 
 # Ruta para verificar que el servicio está activo
 @app.get("/api/booking/health")
-def health():
+async def health():
     return {"status": "booking-service ok"}
+
+# Ruta de readiness: 200 solo con el esquema al día, el contador recuperado y la base respondiendo
+@app.get("/api/booking/ready")
+async def ready():
+    listo, estado = await arranque.ready()
+    return JSONResponse(status_code=200 if listo else 503, content=estado)
+
+# Ruta con las estadísticas del pool de conexiones (en uso, en espera, latencia de préstamo)
+@app.get("/api/booking/pool")
+async def pool_stats():
+    return pool.stats()
+
+def contador_activo():
+    if asientos is None:
+        raise HTTPException(status_code=404, detail="El contador de cupos está desactivado (SEAT_COUNTER=0)")
+    return asientos
+
+# Ruta con las estadísticas del contador de cupos de este worker (tomados, rechazados, escrituras)
+@app.get("/api/booking/asientos")
+async def asientos_stats():
+    return contador_activo().stats()
+
+# Ruta con el estado de un taller en el contador (libres, en curso y pendientes de escribir en MySQL)
+@app.get("/api/booking/asientos/{workshop_id}")
+async def asientos_taller(workshop_id: int):
+    fila = await contador_activo().taller(workshop_id)
+    if fila is None:
+        raise HTTPException(status_code=404, detail="Taller no cargado en el contador")
+    return fila
+
+# Ruta para escribir ya en MySQL los cupos pendientes de todos los workers
+@app.post("/api/booking/asientos/escribir")
+async def asientos_escribir():
+    return {"workshops": await contador_activo().flush()}
+
+# Ruta para conciliar un taller con MySQL sin esperar a la conciliación periódica (por ejemplo tras editarlo a mano)
+@app.post("/api/booking/asientos/{workshop_id}/conciliar")
+async def asientos_conciliar(workshop_id: int):
+    await contador_activo().conciliar([workshop_id])
+    return await asientos_taller(workshop_id)
+
+# Ruta con las métricas del servicio en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,482 @@
+# Contador de cupos compartido por los workers de booking-service
+# Las reservas descuentan el cupo en un almacén local (SQLite en /dev/shm, una transacción corta) en lugar
+# de bloquear la fila del taller en MySQL: un taller agotado se rechaza sin consultar MySQL y los cupos
+# confirmados se suman a workshops.current_participants por lotes, en segundo plano (write-behind)
+#
+# Cada fila del almacén lleva la cuenta de un taller:
+#   disponibles   cupos que todavía se pueden tomar
+#   en_curso      cupos tomados cuya reserva aún no se confirmó (o descartó) en MySQL
+#   pendientes    reservas confirmadas (menos las canceladas) que falta sumar a current_participants
+#   en_escritura  reservas que un worker está sumando en este momento
+#   escritos      total sumado a MySQL por este almacén (sirve para conciliar sin sobrevender)
+#
+# Los cupos en curso también se anotan por worker (tabla en_curso): si un worker muere a mitad de una reserva,
+# el siguiente que arranca (o concilia) pasa sus cupos a pendientes, como si las reservas se hubieran guardado.
+# Cada worker se identifica por su pid y el instante
+# en que arrancó el proceso, así un pid reutilizado no se confunde con el worker muerto
+#
+# Las cancelaciones (reservation-service) no tocan current_participants: llegan como eventos reserva_cancelada
+# y liberan el cupo aquí (disponibles + 1, pendientes - 1). Cada evento se aplica una sola vez aunque lo
+# entreguen varios workers o se entregue de nuevo (tabla liberaciones); los anteriores a la última
+# recuperación ya están contados en ella (meta "frontera")
+import asyncio                                                     # Tareas de escritura y conciliación
+import os                                                          # Configuración desde variables de entorno
+import sqlite3                                                     # Almacén compartido entre procesos
+import tempfile                                                    # Ruta por defecto si no existe /dev/shm
+import threading                                                   # Una conexión SQLite por hilo
+import time                                                        # Espera a la recuperación de otro worker
+from starlette.concurrency import run_in_threadpool                # SQLite es bloqueante
+from common.db import DB_CONFIG, DatabaseUnavailable               # Base del servicio y contador sin recuperar (503)
+from common.analytics import SINCRONIZAR_RESERVADAS_SQL, registrar   # Resumen de ocupación por (categoría, fecha)
+from common.outbox import CUPOS_ACTUALIZADOS, publicar              # Aviso a los catálogos de otros servicios
+
+_DIRECTORIO = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+# Un almacén por base de datos: dos booking-service en el mismo host (desarrollo y benchmarks) no se pisan
+SEATS_STORE_PATH = os.getenv("SEATS_STORE_PATH",
+                             os.path.join(_DIRECTORIO, f"mastercook_seats_{DB_CONFIG['database']}.sqlite3"))
+SEATS_FLUSH_INTERVAL = float(os.getenv("SEATS_FLUSH_INTERVAL", "0.2"))       # Segundos entre escrituras a MySQL
+SEATS_RECONCILE_INTERVAL = float(os.getenv("SEATS_RECONCILE_INTERVAL", "30"))  # Segundos entre conciliaciones
+SEATS_BATCH_SIZE = int(os.getenv("SEATS_BATCH_SIZE", "5000"))                 # Talleres por consulta al cargar
+SEATS_RELEASE_RETENTION = 86400                                               # Segundos que se recuerda un evento aplicado
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS seats (
+    workshop_id INTEGER PRIMARY KEY,
+    maximo INTEGER NOT NULL,
+    disponibles INTEGER NOT NULL,
+    en_curso INTEGER NOT NULL DEFAULT 0,
+    pendientes INTEGER NOT NULL DEFAULT 0,
+    en_escritura INTEGER NOT NULL DEFAULT 0,
+    escritos INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS en_curso (
+    pid INTEGER NOT NULL,
+    workshop_id INTEGER NOT NULL,
+    cupos INTEGER NOT NULL,
+    PRIMARY KEY (pid, workshop_id)
+);
+CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, inicio TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS liberaciones (evento_id INTEGER PRIMARY KEY, creado REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+"""
+
+# Reconstruye current_participants desde las reservas (recupera lo que no alcanzó a escribirse)
+RECONTAR_SQL = """
+    UPDATE workshops w
+    SET current_participants = (SELECT COUNT(*) FROM bookings b
+                                WHERE b.workshop_id = w.id AND b.status <> 'Cancelada')
+"""
+
+
+_PROC = os.path.isdir("/proc/self")
+
+
+# Instante de arranque de un proceso (campo starttime de /proc/<pid>/stat), o None si ya no existe
+# Sin /proc solo se puede saber si el pid existe: se devuelve "" para cualquier proceso vivo
+def inicio_proceso(pid):
+    if _PROC:
+        try:
+            with open(f"/proc/{pid}/stat") as archivo:
+                return archivo.read().rsplit(")", 1)[1].split()[19]
+        except OSError:
+            return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return ""
+
+
+class SeatCounter:
+    def __init__(self, name, path=SEATS_STORE_PATH, flush_interval=SEATS_FLUSH_INTERVAL,
+                 reconcile_interval=SEATS_RECONCILE_INTERVAL):
+        self.name = name
+        self.path = path
+        self.flush_interval = flush_interval
+        self.reconcile_interval = reconcile_interval
+        self.pid = None                 # Identidad del worker en el almacén (se fija en start)
+        self.inicio = None
+        self._local = threading.local()
+        self._pool = None
+        self._tasks = []
+        self.listo = False              # Recuperado y con las tareas en marcha (ver start)
+        self._taken = 0
+        self._rejected = 0
+        self._released = 0
+        self._cancelled = 0
+        self._flushes = 0
+        self._rows_written = 0
+        self._reconciles = 0
+        self._reclaimed = 0
+
+    # Conexión SQLite del hilo actual; sin journal en disco: MySQL es la fuente de verdad
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=OFF")
+            db.executescript(ESQUEMA)
+            self._local.db = db
+        return db
+
+    # Ejecuta "operacion(db)" dentro de una transacción con el almacén bloqueado para escritura
+    def _atomico(self, operacion):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = operacion(db)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return resultado
+
+    # --- Operaciones sobre el almacén (bloqueantes, se llaman desde el threadpool) ---
+
+    def _tomar(self, workshop_id, cantidad):
+        def operacion(db):
+            fila = db.execute("SELECT disponibles FROM seats WHERE workshop_id = ?", (workshop_id,)).fetchone()
+            if fila is None:
+                return None
+            tomados = min(cantidad, fila[0])
+            if tomados:
+                db.execute("UPDATE seats SET disponibles = disponibles - ?, en_curso = en_curso + ? "
+                           "WHERE workshop_id = ?", (tomados, tomados, workshop_id))
+                db.execute("INSERT INTO en_curso VALUES (?, ?, ?) "
+                           "ON CONFLICT (pid, workshop_id) DO UPDATE SET cupos = cupos + excluded.cupos",
+                           (self.pid, workshop_id, tomados))
+            return tomados
+        return self._atomico(operacion)
+
+    def _cerrar(self, workshop_id, confirmadas, liberadas):
+        def operacion(db):
+            db.execute(
+                "UPDATE seats SET en_curso = en_curso - ?, pendientes = pendientes + ?, disponibles = disponibles + ? "
+                "WHERE workshop_id = ?", (confirmadas + liberadas, confirmadas, liberadas, workshop_id))
+            db.execute("UPDATE en_curso SET cupos = cupos - ? WHERE pid = ? AND workshop_id = ?",
+                       (confirmadas + liberadas, self.pid, workshop_id))
+            db.execute("DELETE FROM en_curso WHERE pid = ? AND workshop_id = ? AND cupos <= 0",
+                       (self.pid, workshop_id))
+        self._atomico(operacion)
+
+    # Agrega talleres que el almacén no tenía; si otro worker ya los cargó se conserva su fila
+    def _cargar(self, filas):
+        self._atomico(lambda db: db.executemany(
+            "INSERT OR IGNORE INTO seats (workshop_id, maximo, disponibles) VALUES (?, ?, ?)",
+            [(fila["id"], fila["max_participants"], max(fila["max_participants"] - fila["current_participants"], 0))
+             for fila in filas]))
+
+    # Libera los cupos de reservas canceladas: [(id del evento, taller)]; devuelve los talleres que el almacén
+    # no tiene (sus eventos quedan sin aplicar hasta cargarlos)
+    def _liberar(self, eventos):
+        def operacion(db):
+            frontera = int(self._meta(db, "frontera") or 0)
+            faltantes = set()
+            for evento_id, workshop_id in eventos:
+                if evento_id <= frontera or db.execute(
+                        "SELECT 1 FROM liberaciones WHERE evento_id = ?", (evento_id,)).fetchone():
+                    continue
+                if not db.execute("UPDATE seats SET pendientes = pendientes - 1, disponibles = disponibles + 1 "
+                                  "WHERE workshop_id = ?", (workshop_id,)).rowcount:
+                    faltantes.add(workshop_id)
+                    continue
+                db.execute("INSERT INTO liberaciones VALUES (?, ?)", (evento_id, time.time()))
+            return faltantes
+        return self._atomico(operacion)
+
+    def _podar_liberaciones(self):
+        self._db().execute("DELETE FROM liberaciones WHERE creado < ?", (time.time() - SEATS_RELEASE_RETENTION,))
+
+    # Toma todas las reservas pendientes de escribir (o descontar) y las marca "en escritura"
+    def _extraer_pendientes(self):
+        def operacion(db):
+            filas = db.execute("SELECT workshop_id, pendientes FROM seats WHERE pendientes <> 0").fetchall()
+            db.executemany("UPDATE seats SET pendientes = pendientes - ?, en_escritura = en_escritura + ? "
+                           "WHERE workshop_id = ?", [(n, n, workshop_id) for workshop_id, n in filas])
+            return filas
+        return self._atomico(operacion)
+
+    def _terminar_escritura(self, filas, escrito):
+        columna = "escritos" if escrito else "pendientes"
+        self._atomico(lambda db: db.executemany(
+            f"UPDATE seats SET en_escritura = en_escritura - ?, {columna} = {columna} + ? WHERE workshop_id = ?",
+            [(n, n, workshop_id) for workshop_id, n in filas]))
+
+    # Instantánea de "escritos" de los talleres indicados o, sin ids, del siguiente bloque después de "desde"
+    def _escritos(self, ids=None, desde=0):
+        if ids is None:
+            return dict(self._db().execute(
+                "SELECT workshop_id, escritos FROM seats WHERE workshop_id > ? ORDER BY workshop_id LIMIT ?",
+                (desde, SEATS_BATCH_SIZE)).fetchall())
+        return dict(self._db().execute(
+            f"SELECT workshop_id, escritos FROM seats WHERE workshop_id IN ({', '.join('?' * len(ids))})",
+            ids).fetchall())
+
+    # Recalcula los cupos libres con los datos de MySQL leídos entre dos instantáneas de "escritos"
+    # Un lote escrito mientras se leía MySQL puede estar o no en current_participants: se cuenta como ocupado,
+    # así el error queda del lado de rechazar de más (se corrige en la siguiente conciliación), nunca de sobrevender
+    def _conciliar(self, filas, escritos_antes):
+        def operacion(db):
+            for fila in filas:
+                actual = db.execute(
+                    "SELECT en_curso, pendientes, en_escritura, escritos FROM seats WHERE workshop_id = ?",
+                    (fila["id"],)).fetchone()
+                if actual is None:
+                    continue
+                en_curso, pendientes, en_escritura, escritos = actual
+                ocupados = (fila["current_participants"] + en_curso + pendientes + en_escritura
+                            + escritos - escritos_antes.get(fila["id"], escritos))
+                db.execute("UPDATE seats SET maximo = ?, disponibles = ? WHERE workshop_id = ?",
+                           (fila["max_participants"], max(fila["max_participants"] - ocupados, 0), fila["id"]))
+        self._atomico(operacion)
+
+    # Pasa a pendientes los cupos en curso de los workers que ya no existen y los quita del registro
+    # No se sabe cuáles de esas reservas alcanzaron a guardarse en MySQL: devolverlos a disponibles vendería dos
+    # veces el cupo de las guardadas (current_participants nunca las contaría). Se cuentan todas como ocupadas;
+    # las que no se guardaron solo dejan cupos sin vender hasta la próxima recuperación completa (RECONTAR_SQL)
+    # Devuelve cuántos otros workers siguen vivos
+    def _purgar_muertos(self, db):
+        vivos = 0
+        for pid, inicio in db.execute("SELECT pid, inicio FROM workers").fetchall():
+            if pid == self.pid and inicio == self.inicio:
+                continue
+            if inicio_proceso(pid) == inicio:
+                vivos += 1
+                continue
+            for workshop_id, cupos in db.execute(
+                    "SELECT workshop_id, cupos FROM en_curso WHERE pid = ?", (pid,)).fetchall():
+                db.execute("UPDATE seats SET en_curso = en_curso - ?, pendientes = pendientes + ? "
+                           "WHERE workshop_id = ?", (cupos, cupos, workshop_id))
+                self._reclaimed += cupos
+            db.execute("DELETE FROM en_curso WHERE pid = ?", (pid,))
+            db.execute("DELETE FROM workers WHERE pid = ?", (pid,))
+        return vivos
+
+    def _purgar(self):
+        return self._atomico(self._purgar_muertos)
+
+    # Registra este worker y decide si le toca recuperar el almacén; devuelve True si le tocó
+    # Sin otros workers vivos es una corrida nueva (primer arranque o reinicio de todos): se recupera desde cero.
+    # Con otros vivos se une a la corrida, salvo que la recuperación se haya liberado o su dueño haya muerto
+    def _reclamar_recuperacion(self):
+        def operacion(db):
+            vivos = self._purgar_muertos(db)
+            db.execute("INSERT OR REPLACE INTO workers VALUES (?, ?)", (self.pid, self.inicio))
+            if vivos:
+                fila = db.execute("SELECT valor FROM meta WHERE clave = 'recupera'").fetchone()
+                dueno = db.execute("SELECT pid FROM workers WHERE pid = ?", (int(fila[0]),)).fetchone() if fila else None
+                if self._estado_en(db) == "listo" or dueno is not None:
+                    return False
+            db.execute("DELETE FROM seats")
+            db.execute("DELETE FROM en_curso")
+            db.execute("DELETE FROM liberaciones")
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('recupera', ?), ('estado', 'recuperando')", (str(self.pid),))
+            return True
+        return self._atomico(operacion)
+
+    def _liberar_recuperacion(self):
+        self._atomico(lambda db: db.execute("DELETE FROM meta WHERE clave IN ('recupera', 'estado')"))
+
+    def _salir(self):
+        self._atomico(lambda db: db.execute("DELETE FROM workers WHERE pid = ? AND inicio = ?", (self.pid, self.inicio)))
+
+    @staticmethod
+    def _meta(db, clave):
+        fila = db.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _estado_en(self, db):
+        return self._meta(db, "estado")
+
+    def _estado(self):
+        return self._estado_en(self._db())
+
+    def _fila(self, workshop_id):
+        cursor = self._db().execute("SELECT * FROM seats WHERE workshop_id = ?", (workshop_id,))
+        fila = cursor.fetchone()
+        return dict(zip([columna[0] for columna in cursor.description], fila)) if fila else None
+
+    # --- API asíncrona usada por las rutas ---
+
+    # Toma hasta "cantidad" cupos; devuelve cuántos obtuvo (0 = agotado) o None si el taller no existe
+    async def tomar(self, workshop_id, cantidad=1):
+        if not self.listo:
+            raise DatabaseUnavailable(f"[{self.name}] El contador de cupos todavía se está recuperando.")
+        tomados = await run_in_threadpool(self._tomar, workshop_id, cantidad)
+        if tomados is None:
+            # Taller creado después de la carga inicial: se trae de MySQL una sola vez
+            async with self._pool.acquire() as conn:
+                fila = await conn.fetch_one(
+                    "SELECT id, max_participants, current_participants FROM workshops WHERE id = %s", (workshop_id,))
+            if fila is None:
+                return None
+            await run_in_threadpool(self._cargar, [fila])
+            tomados = await run_in_threadpool(self._tomar, workshop_id, cantidad)
+        self._taken += tomados
+        if tomados < cantidad:
+            self._rejected += cantidad - tomados
+        return tomados
+
+    # Cierra cupos tomados: los confirmados quedan pendientes de escribir y los liberados vuelven a estar libres
+    async def cerrar(self, workshop_id, confirmadas, liberadas=0):
+        if confirmadas or liberadas:
+            await run_in_threadpool(self._cerrar, workshop_id, confirmadas, liberadas)
+            self._released += liberadas
+
+    # Libera los cupos de reservas canceladas (manejador de reserva_cancelada); idempotente por evento
+    async def liberar(self, eventos):
+        if not self.listo:
+            raise DatabaseUnavailable(f"[{self.name}] El contador de cupos todavía se está recuperando.")
+        faltantes = await run_in_threadpool(self._liberar, eventos)
+        if faltantes:
+            ids = sorted(faltantes)
+            async with self._pool.acquire() as conn:
+                filas = await conn.fetch_all(
+                    "SELECT id, max_participants, current_participants FROM workshops "
+                    f"WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            await run_in_threadpool(self._cargar, filas)
+            await run_in_threadpool(self._liberar, [evento for evento in eventos if evento[1] in faltantes])
+        self._cancelled += len(eventos)
+
+    # Suma a MySQL las reservas confirmadas (y resta las canceladas) de todos los workers en un solo UPDATE
+    # y publica cupos_actualizados por taller y actualiza el resumen de ocupación en la misma transacción
+    async def flush(self):
+        filas = await run_in_threadpool(self._extraer_pendientes)
+        if not filas:
+            return 0
+        filas.sort()
+        casos = " ".join(["WHEN %s THEN %s"] * len(filas))
+        try:
+            async with self._pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        f"UPDATE workshops SET current_participants = current_participants + CASE id {casos} END "
+                        f"WHERE id IN ({', '.join(['%s'] * len(filas))})",
+                        [valor for fila in filas for valor in fila] + [workshop_id for workshop_id, _ in filas])
+                    await registrar(conn, {workshop_id: (0, n, 0) for workshop_id, n in filas})
+                    await publicar(conn, [(CUPOS_ACTUALIZADOS, workshop_id, {"reservas": n})
+                                          for workshop_id, n in filas])
+        except BaseException:
+            # Vuelven a quedar pendientes para la próxima escritura
+            await run_in_threadpool(self._terminar_escritura, filas, False)
+            raise
+        await run_in_threadpool(self._terminar_escritura, filas, True)
+        self._flushes += 1
+        self._rows_written += len(filas)
+        return len(filas)
+
+    # Corrige los cupos con los cambios hechos fuera de este servicio (cancelaciones, cambios de máximo)
+    # Recorre por bloques los talleres del almacén; la instantánea se toma antes de leer MySQL
+    async def conciliar(self, workshop_ids=None):
+        ultimo = 0
+        while True:
+            escritos_antes = await run_in_threadpool(
+                self._escritos, list(workshop_ids) if workshop_ids is not None else None, ultimo)
+            if not escritos_antes:
+                break
+            ids = sorted(escritos_antes)
+            async with self._pool.acquire() as conn:
+                filas = await conn.fetch_all(
+                    "SELECT id, max_participants, current_participants FROM workshops "
+                    f"WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            await run_in_threadpool(self._conciliar, filas, escritos_antes)
+            if workshop_ids is not None or len(ids) < SEATS_BATCH_SIZE:
+                break
+            ultimo = ids[-1]
+        self._reconciles += 1
+
+    # Recuperación al reiniciar: current_participants se recalcula desde bookings y se precargan los talleres
+    # El recuento bloquea las reservas que lee: una cancelación en curso termina antes y queda contada, y su
+    # evento tiene un id menor o igual a la frontera que se lee a continuación (no se vuelve a liberar)
+    async def recuperar(self):
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(RECONTAR_SQL)
+                await conn.execute(SINCRONIZAR_RESERVADAS_SQL)
+                frontera = (await conn.fetch_one("SELECT COALESCE(MAX(id), 0) AS id FROM outbox"))["id"]
+        ultimo = 0
+        while True:
+            async with self._pool.acquire() as conn:
+                filas = await conn.fetch_all(
+                    "SELECT id, max_participants, current_participants FROM workshops "
+                    "WHERE id > %s ORDER BY id LIMIT %s", (ultimo, SEATS_BATCH_SIZE))
+            if not filas:
+                break
+            await run_in_threadpool(self._cargar, filas)
+            ultimo = filas[-1]["id"]
+        await run_in_threadpool(self._db().execute,
+                                "INSERT OR REPLACE INTO meta VALUES ('frontera', ?), ('estado', 'listo')", (str(frontera),))
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as exc:
+                print(f"[{self.name}] No se pudieron escribir los cupos: {exc}")
+
+    async def _reconciliador(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await run_in_threadpool(self._purgar)
+                await run_in_threadpool(self._podar_liberaciones)
+                await self.conciliar()
+            except Exception as exc:
+                print(f"[{self.name}] No se pudieron conciliar los cupos: {exc}")
+
+    # Recupera el almacén (solo el primer worker de la corrida; los demás esperan) y arranca las tareas
+    # Si la recuperación falla se libera el reclamo, así el reintento de arranque (de este u otro worker) la repite
+    async def start(self, pool, timeout=120):
+        self._pool = pool
+        self.pid = os.getpid()
+        self.inicio = inicio_proceso(self.pid)
+        deadline = time.monotonic() + timeout
+        while True:
+            if await run_in_threadpool(self._reclamar_recuperacion):
+                started = time.monotonic()
+                try:
+                    await self.recuperar()
+                except BaseException:
+                    await run_in_threadpool(self._liberar_recuperacion)
+                    raise
+                print(f"[{self.name}] Cupos recuperados desde bookings en {time.monotonic() - started:.1f} s.")
+                break
+            if await run_in_threadpool(self._estado) == "listo":
+                break
+            if time.monotonic() > deadline:
+                raise RuntimeError("Otro worker no terminó de recuperar el contador de cupos.")
+            await asyncio.sleep(0.1)
+        self._tasks = [asyncio.create_task(self._flusher()), asyncio.create_task(self._reconciliador())]
+        self.listo = True
+
+    # Detiene las tareas y escribe lo pendiente antes de cerrar
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.listo:                  # Sin arranque completo no hay pool abierto ni cupos tomados por este worker
+            await self.flush()
+            self.listo = False
+        if self.pid is not None:
+            await run_in_threadpool(self._salir)
+
+    async def taller(self, workshop_id):
+        return await run_in_threadpool(self._fila, workshop_id)
+
+    def stats(self):
+        return {
+            "counter": self.name,
+            "taken": self._taken,
+            "rejected": self._rejected,
+            "released": self._released,
+            "cancelled": self._cancelled,
+            "flushes": self._flushes,
+            "rows_written": self._rows_written,
+            "reconciles": self._reconciles,
+            "reclaimed": self._reclaimed,
+        }
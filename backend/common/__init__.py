@@ -0,0 +1 @@
+# Módulos compartidos por todos los microservicios del backend
@@ -0,0 +1,138 @@
+# Resumen de ocupación e ingresos por (categoría, fecha): tabla occupancy_stats (migración 0007)
+# Cada cambio se suma al resumen en la misma transacción que lo produce: crear talleres, cambiar
+# current_participants (reservas, cancelaciones, escrituras del contador de cupos) y confirmar pagos.
+# Los reportes leen O(grupos) filas en lugar de agrupar bookings JOIN workshops junto al tráfico de reservas
+# Uso como comando de mantenimiento (reconstruye el resumen desde cero): python -m common.analytics
+import time                                                        # Duración de la reconstrucción
+from decimal import Decimal                                        # Ingresos exactos (DECIMAL en MySQL)
+import mysql.connector                                             # Conexión síncrona del comando
+from common.db import DB_CONFIG                                    # Host y credenciales compartidos
+
+# Agrupaciones del reporte -> columnas del resumen
+AGRUPACIONES = {"categoria": ("category",), "fecha": ("date",), "categoria_fecha": ("category", "date")}
+
+COLUMNAS = ("category", "date", "workshops", "capacity", "booked", "paid", "revenue")
+
+INSERTAR_SQL = (
+    f"INSERT INTO occupancy_stats ({', '.join(COLUMNAS)}) VALUES {{filas}} AS nuevo "
+    "ON DUPLICATE KEY UPDATE "
+    + ", ".join(f"{columna} = occupancy_stats.{columna} + nuevo.{columna}" for columna in COLUMNAS[2:])
+)
+
+# Con el contador de cupos, current_participants se recalcula al recuperar; booked se alinea en la misma transacción
+SINCRONIZAR_RESERVADAS_SQL = """
+    UPDATE occupancy_stats s
+    JOIN (SELECT category, date, SUM(current_participants) AS booked FROM workshops
+          WHERE category IS NOT NULL AND date IS NOT NULL GROUP BY category, date) w
+        ON w.category = s.category AND w.date = s.date
+    SET s.booked = w.booked
+"""
+
+# Consultas de la reconstrucción (con FOR SHARE: los cambios concurrentes esperan a que termine)
+TALLERES_POR_GRUPO_SQL = """
+    SELECT category, date, COUNT(*), SUM(COALESCE(max_participants, 0)), SUM(COALESCE(current_participants, 0))
+    FROM workshops WHERE category IS NOT NULL AND date IS NOT NULL
+    GROUP BY category, date
+"""
+PAGADAS_POR_GRUPO_SQL = """
+    SELECT w.category, w.date, COUNT(*), SUM(w.price)
+    FROM bookings b JOIN workshops w ON w.id = b.workshop_id
+    WHERE b.status <> 'Cancelada' AND b.payment_status = 'Pagado' AND w.category IS NOT NULL AND w.date IS NOT NULL
+    GROUP BY w.category, w.date
+"""
+
+
+def _marcadores(filas):
+    return ", ".join(["(" + ", ".join(["%s"] * len(COLUMNAS)) + ")"] * filas)
+
+
+# Suma al resumen los cambios de cada taller: {workshop_id: (talleres_nuevos, reservadas, pagadas)}
+# La capacidad y los ingresos salen de max_participants y price del taller
+# Se llama al final de la transacción del cambio: occupancy_stats es siempre la última tabla que se bloquea
+# (después de workshops y bookings) y sus filas se bloquean en orden, así no se forman deadlocks
+async def registrar(conn, cambios):
+    cambios = {workshop_id: delta for workshop_id, delta in cambios.items() if any(delta)}
+    if not cambios:
+        return
+    ids = sorted(cambios)
+    talleres = await conn.fetch_all(
+        "SELECT id, category, date, max_participants, price FROM workshops "
+        f"WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+    grupos = {}
+    for taller in talleres:
+        if taller["category"] is None or taller["date"] is None:
+            continue
+        nuevos, reservadas, pagadas = cambios[taller["id"]]
+        grupo = grupos.setdefault((taller["category"], taller["date"]), [0, 0, 0, 0, Decimal(0)])
+        grupo[0] += nuevos
+        grupo[1] += nuevos * (taller["max_participants"] or 0)
+        grupo[2] += reservadas
+        grupo[3] += pagadas
+        grupo[4] += pagadas * taller["price"]
+    if grupos:
+        filas = sorted(grupos.items())
+        await conn.execute(INSERTAR_SQL.format(filas=_marcadores(len(filas))),
+                           [valor for clave, valores in filas for valor in (*clave, *valores)])
+
+
+# Consulta del reporte sobre el resumen: (sql, parámetros)
+def consulta_resumen(agrupar, desde=None, hasta=None, categoria=None):
+    claves = ", ".join(AGRUPACIONES[agrupar])
+    condiciones, params = ["TRUE"], []
+    if desde is not None:
+        condiciones.append("date >= %s")
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append("date <= %s")
+        params.append(hasta)
+    if categoria is not None:
+        condiciones.append("category = %s")
+        params.append(categoria)
+    return (f"SELECT {claves}, SUM(workshops) AS workshops, SUM(capacity) AS capacity, SUM(booked) AS booked, "
+            f"SUM(paid) AS paid, SUM(revenue) AS revenue FROM occupancy_stats "
+            f"WHERE {' AND '.join(condiciones)} GROUP BY {claves} ORDER BY {claves}"), params
+
+
+# Fila del reporte con la ocupación (reservadas / capacidad)
+def con_ocupacion(fila):
+    capacidad = int(fila["capacity"] or 0)
+    return {**fila, "workshops": int(fila["workshops"]), "capacity": capacidad, "booked": int(fila["booked"]),
+            "paid": int(fila["paid"]), "revenue": float(fila["revenue"]),
+            "occupancy": round(int(fila["booked"]) / capacidad, 4) if capacidad else 0.0}
+
+
+# Reconstruye el resumen desde workshops y bookings en una sola transacción y devuelve los grupos escritos
+# Las lecturas usan FOR SHARE: las reservas, cancelaciones y pagos concurrentes esperan hasta el final,
+# así ningún cambio se cuenta dos veces ni se pierde. Es una operación de mantenimiento
+def reconstruir(database=None, lote=1000):
+    conn = mysql.connector.connect(**{**DB_CONFIG, **({"database": database} if database else {})})
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        cursor.execute(TALLERES_POR_GRUPO_SQL + " FOR SHARE")
+        grupos = {(categoria, fecha): [talleres, capacidad, reservadas, 0, Decimal(0)]
+                  for categoria, fecha, talleres, capacidad, reservadas in cursor.fetchall()}
+        cursor.execute(PAGADAS_POR_GRUPO_SQL + " FOR SHARE")
+        for categoria, fecha, pagadas, ingresos in cursor.fetchall():
+            grupo = grupos.setdefault((categoria, fecha), [0, 0, 0, 0, Decimal(0)])
+            grupo[3], grupo[4] = pagadas, ingresos
+        cursor.execute("DELETE FROM occupancy_stats")
+        filas = sorted(grupos.items())
+        for inicio in range(0, len(filas), lote):
+            bloque = filas[inicio:inicio + lote]
+            cursor.execute(INSERTAR_SQL.format(filas=_marcadores(len(bloque))),
+                           [valor for clave, valores in bloque for valor in (*clave, *valores)])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return len(filas)
+
+
+if __name__ == "__main__":
+    started = time.monotonic()
+    grupos = reconstruir()
+    print(f"[analytics] Resumen reconstruido: {grupos} grupos en {time.monotonic() - started:.1f} s.")
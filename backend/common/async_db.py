@@ -0,0 +1,280 @@
+# Acceso asíncrono a MySQL para los handlers "async def"
+# DB_DRIVER=aiomysql (por defecto) usa un pool asíncrono: un solo worker atiende cientos de peticiones en vuelo
+# DB_DRIVER=threadpool ejecuta el pool síncrono de common.db en el threadpool de Starlette (modo anterior)
+import asyncio                                                     # Tiempo límite al esperar conexiones
+import os                                                          # Lectura de la configuración desde variables de entorno
+import time                                                        # Medición de latencias y esperas de arranque
+from contextlib import asynccontextmanager                         # Préstamo de conexiones con "async with"
+import aiomysql                                                    # Driver MySQL asíncrono
+import mysql.connector                                             # Errores del driver síncrono
+from starlette.concurrency import run_in_threadpool                # Ejecuta código bloqueante fuera del event loop
+from common.db import (DB_CONFIG, POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_ACQUIRE_TIMEOUT,
+                       POOL_CONNECT_TIMEOUT, POOL_MAX_IDLE_TIME, ConnectionPool, DatabaseUnavailable,
+                       IntegrityViolation)
+from common.metrics import observe_acquire, timed_query            # Métricas de consultas y del pool
+
+DB_DRIVER = os.getenv("DB_DRIVER", "aiomysql")
+
+
+# Conexión prestada por el pool asíncrono
+# Fuera de transaction() cada sentencia se confirma sola (autocommit)
+class AsyncConnection:
+    def __init__(self, raw):
+        self._raw = raw
+        self.lastrowid = None
+
+    # True si la conexión ya se cerró (por ejemplo, un stream cortado); el pool la descarta al devolverla
+    @property
+    def cerrada(self):
+        return self._raw.closed
+
+    async def execute(self, sql, params=None):
+        async with self._raw.cursor() as cursor:
+            with timed_query(sql):
+                try:
+                    await cursor.execute(sql, params)
+                except aiomysql.IntegrityError as exc:
+                    raise IntegrityViolation(exc.args[0], exc.args[1]) from exc
+            self.lastrowid = cursor.lastrowid
+            return cursor.rowcount
+
+    async def fetch_one(self, sql, params=None):
+        async with self._raw.cursor(aiomysql.DictCursor) as cursor:
+            with timed_query(sql):
+                await cursor.execute(sql, params)
+                return await cursor.fetchone()
+
+    async def fetch_all(self, sql, params=None):
+        async with self._raw.cursor(aiomysql.DictCursor) as cursor:
+            with timed_query(sql):
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+
+    # Recorre el resultado con un cursor del lado del servidor (sin bufferizar) en bloques de "size" filas
+    # La memoria queda acotada a un bloque. Si el consumidor se detiene antes del final se cierra la conexión
+    # (el pool la descarta): drenar el resto del resultado podría tardar más que abrir otra
+    async def stream(self, sql, params=None, size=1000):
+        cursor = await self._raw.cursor(aiomysql.SSDictCursor)
+        completo = False
+        try:
+            with timed_query(sql):
+                await cursor.execute(sql, params)
+            while True:
+                filas = await cursor.fetchmany(size)
+                if not filas:
+                    break
+                yield filas
+            completo = True
+        finally:
+            if completo:
+                await cursor.close()
+            else:
+                self._raw.close()
+
+    # Agrupa varias sentencias: commit al salir, rollback si hay error
+    @asynccontextmanager
+    async def transaction(self):
+        await self._raw.begin()
+        try:
+            yield self
+        except BaseException:
+            await self._raw.rollback()
+            raise
+        await self._raw.commit()
+
+
+# Pool asíncrono sobre aiomysql con tiempo límite de espera y estadísticas
+class AsyncPool:
+    driver = "aiomysql"
+
+    def __init__(self, name, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, acquire_timeout=POOL_ACQUIRE_TIMEOUT):
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self._pool = None
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+        self._timeouts = 0
+        self._connect_errors = 0
+
+    # Crea el pool; al arrancar el contenedor MySQL puede tardar en aceptar conexiones
+    async def open(self, retries=20, delay=3):
+        for attempt in range(retries):
+            try:
+                self._pool = await aiomysql.create_pool(
+                    minsize=self.min_size,
+                    maxsize=self.max_size,
+                    host=DB_CONFIG["host"],
+                    user=DB_CONFIG["user"],
+                    password=DB_CONFIG["password"],
+                    db=DB_CONFIG["database"],
+                    connect_timeout=POOL_CONNECT_TIMEOUT,
+                    pool_recycle=POOL_MAX_IDLE_TIME,     # Las conexiones viejas se reemplazan al prestarlas
+                    autocommit=True,
+                )
+                return
+            except (aiomysql.Error, OSError):
+                print(f"[{self.name}] Intento {attempt+1} fallido, esperando...")
+                await asyncio.sleep(delay)
+        raise DatabaseUnavailable(f"[{self.name}] No se pudo conectar a la base de datos.")
+
+    # Presta una conexión; aiomysql descarta al prestar las conexiones cerradas por el servidor
+    @asynccontextmanager
+    async def acquire(self):
+        if self._pool is None:
+            raise DatabaseUnavailable(f"[{self.name}] El pool no está inicializado.")
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            raw = await asyncio.wait_for(self._pool.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise DatabaseUnavailable(f"[{self.name}] No hay conexiones disponibles en el pool.")
+        except (aiomysql.Error, OSError) as exc:
+            self._connect_errors += 1
+            raise DatabaseUnavailable(f"[{self.name}] No se pudo conectar a la base de datos.") from exc
+        finally:
+            self._waiting -= 1
+
+        elapsed = time.monotonic() - started
+        observe_acquire(self.name, elapsed)
+        self._in_use += 1
+        self._checkouts += 1
+        self._checkout_time_total += elapsed
+        self._checkout_time_max = max(self._checkout_time_max, elapsed)
+        try:
+            yield AsyncConnection(raw)
+        finally:
+            self._in_use -= 1
+            self._pool.release(raw)
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def stats(self):
+        checkouts = self._checkouts
+        return {
+            "pool": self.name,
+            "driver": self.driver,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self._pool.size if self._pool else 0,
+            "idle": self._pool.freesize if self._pool else 0,
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "checkouts": checkouts,
+            "checkout_ms_avg": round(self._checkout_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "checkout_ms_max": round(self._checkout_time_max * 1000, 3),
+            "timeouts": self._timeouts,
+            "connect_errors": self._connect_errors,
+        }
+
+
+# Conexión del pool síncrono con la misma interfaz que AsyncConnection
+# Cada operación bloqueante se ejecuta en el threadpool
+class ThreadedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+        self.lastrowid = None
+
+    # Este driver no cierra la conexión al cortar un stream (descarta el resto del resultado)
+    @property
+    def cerrada(self):
+        return False
+
+    def _run(self, sql, params, fetch):
+        cursor = self._conn.cursor(dictionary=True, buffered=True)
+        try:
+            with timed_query(sql):
+                try:
+                    cursor.execute(sql, params)
+                except mysql.connector.IntegrityError as exc:
+                    raise IntegrityViolation(exc.errno, exc.msg) from exc
+            self.lastrowid = cursor.lastrowid
+            if fetch == "one":
+                return cursor.fetchone()
+            if fetch == "all":
+                return cursor.fetchall()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    async def execute(self, sql, params=None):
+        return await run_in_threadpool(self._run, sql, params, None)
+
+    async def fetch_one(self, sql, params=None):
+        return await run_in_threadpool(self._run, sql, params, "one")
+
+    async def fetch_all(self, sql, params=None):
+        return await run_in_threadpool(self._run, sql, params, "all")
+
+    # Igual que AsyncConnection.stream, con un cursor sin bufferizar de mysql.connector
+    # Si el consumidor se detiene antes del final, el resto del resultado se descarta antes de devolver la conexión
+    async def stream(self, sql, params=None, size=1000):
+        cursor = self._conn.cursor(dictionary=True, buffered=False)
+        completo = False
+        try:
+            with timed_query(sql):
+                await run_in_threadpool(cursor.execute, sql, params)
+            while True:
+                filas = await run_in_threadpool(cursor.fetchmany, size)
+                if not filas:
+                    break
+                yield filas
+            completo = True
+        finally:
+            if not completo:
+                await run_in_threadpool(self._conn.consume_results)
+            await run_in_threadpool(cursor.close)
+
+    @asynccontextmanager
+    async def transaction(self):
+        await run_in_threadpool(self._conn.start_transaction)
+        try:
+            yield self
+        except BaseException:
+            await run_in_threadpool(self._conn.rollback)
+            raise
+        await run_in_threadpool(self._conn.commit)
+
+
+# Adaptador del pool síncrono (common.db) para los handlers async; sirve de referencia en los benchmarks
+class ThreadedPool:
+    driver = "threadpool"
+
+    def __init__(self, name, **kwargs):
+        self.name = name
+        self._pool = ConnectionPool(name, autocommit=True, **kwargs)
+
+    async def open(self, retries=20, delay=3):
+        await run_in_threadpool(self._pool.open, retries, delay)
+
+    @asynccontextmanager
+    async def acquire(self):
+        started = time.monotonic()
+        conn = await run_in_threadpool(self._pool.acquire)
+        observe_acquire(self.name, time.monotonic() - started)
+        try:
+            yield ThreadedConnection(conn)
+        finally:
+            await run_in_threadpool(conn.close)
+
+    async def close(self):
+        await run_in_threadpool(self._pool.close_all)
+
+    def stats(self):
+        return {**self._pool.stats(), "driver": self.driver}
+
+
+# Crea el pool según DB_DRIVER
+def create_pool(name, **kwargs):
+    if DB_DRIVER == "threadpool":
+        return ThreadedPool(name, **kwargs)
+    return AsyncPool(name, **kwargs)
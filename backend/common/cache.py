@@ -0,0 +1,62 @@
+# Caché en memoria acotada (LRU) con expiración por entrada y contadores de aciertos/fallos
+import threading                                                   # Acceso seguro desde el threadpool
+import time                                                        # Expiración con hora UNIX (compatible con "exp" de JWT)
+from collections import OrderedDict                                # Orden de uso para descartar lo menos reciente
+
+
+class TTLCache:
+    def __init__(self, name, maxsize, ttl=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl                          # Segundos de vida por defecto (None = hasta que se invalide)
+        self._data = OrderedDict()              # Clave -> (valor, instante de expiración o None)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # Devuelve el valor guardado o "default" si no existe o ya expiró
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+            return default
+
+    # Guarda un valor; expires_at (hora UNIX) tiene prioridad sobre el ttl por defecto
+    def set(self, key, value, expires_at=None):
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cache": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,245 @@
+# Capa compartida de acceso a MySQL con un pool de conexiones acotado
+import os                                                          # Lectura de la configuración desde variables de entorno
+import threading                                                   # Sincronización entre los hilos del threadpool de FastAPI
+import time                                                        # Medición de latencias y esperas de arranque
+from collections import deque                                      # Conexiones libres (LIFO)
+import mysql.connector                                             # Conexión con base de datos MySQL
+
+# Configuración de la base de datos (la definen las variables de docker-compose)
+DB_CONFIG = {
+    "host": os.getenv("MYSQL_HOST", "db"),
+    "user": os.getenv("MYSQL_USER", "root"),
+    "password": os.getenv("MYSQL_PASSWORD", "12345"),
+    "database": os.getenv("MYSQL_DATABASE", "users_db"),
+}
+
+# Tamaño y tiempos del pool, configurables por servicio
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))            # Conexiones que se mantienen abiertas siempre
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))           # Límite de conexiones simultáneas del servicio
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "2"))   # Segundos máximos esperando una conexión
+POOL_CONNECT_TIMEOUT = int(os.getenv("DB_POOL_CONNECT_TIMEOUT", "3"))     # Segundos máximos abriendo una conexión nueva
+POOL_MAX_IDLE_TIME = float(os.getenv("DB_POOL_MAX_IDLE_TIME", "300"))     # Segundos antes de cerrar una conexión ociosa
+
+
+# Error lanzado cuando no se obtiene una conexión a tiempo o MySQL no responde
+# Los servicios lo traducen a una respuesta 503
+class DatabaseUnavailable(Exception):
+    pass
+
+
+# Códigos de error de MySQL para restricciones violadas
+ER_DUP_ENTRY = 1062                 # Clave UNIQUE duplicada
+ER_NO_REFERENCED_ROW = 1452         # La clave foránea apunta a una fila inexistente
+
+
+# Error lanzado por las conexiones async cuando una sentencia viola una restricción UNIQUE o FOREIGN KEY
+# "code" es el código de error de MySQL, igual con cualquier driver
+class IntegrityViolation(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+# Envoltura de una conexión prestada por el pool
+# Se comporta como la conexión original, pero close() la devuelve al pool
+class PooledConnection:
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise DatabaseUnavailable("La conexión ya fue devuelta al pool.")
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Pool de conexiones con tamaño mínimo/máximo, verificación de salud al prestar
+# y tiempo límite de espera (sin reintentos con time.sleep en la petición)
+class ConnectionPool:
+    def __init__(self, name, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 acquire_timeout=POOL_ACQUIRE_TIMEOUT, max_idle_time=POOL_MAX_IDLE_TIME, **config):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamaños de pool inválidos.")
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle_time = max_idle_time
+        self.config = {**DB_CONFIG, "connection_timeout": POOL_CONNECT_TIMEOUT, **config}
+
+        self._cond = threading.Condition()
+        self._idle = deque()            # Pares (conexión, instante en que quedó libre)
+        self._size = 0                  # Conexiones abiertas (libres + prestadas)
+        self._in_use = 0
+        self._waiting = 0
+
+        # Contadores expuestos en stats()
+        self._checkouts = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+        self._timeouts = 0
+        self._connect_errors = 0
+        self._discarded = 0
+
+    # Abre una conexión física nueva con MySQL
+    def _connect(self):
+        return mysql.connector.connect(**self.config)
+
+    # Verifica que una conexión libre siga viva antes de prestarla
+    def _is_healthy(self, raw):
+        try:
+            return raw.is_connected()
+        except mysql.connector.Error:
+            return False
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except mysql.connector.Error:
+            pass
+
+    # Cierra las conexiones ociosas más antiguas por encima del mínimo (se llama con el lock tomado)
+    def _trim_idle(self):
+        now = time.monotonic()
+        expired = []
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.max_idle_time:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+
+    # Presta una conexión del pool; falla con DatabaseUnavailable si no hay una a tiempo
+    def acquire(self, timeout=None):
+        started = time.monotonic()
+        deadline = started + (self.acquire_timeout if timeout is None else timeout)
+
+        while True:
+            raw = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        raw = self._idle.pop()[0]
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1        # Reserva el cupo antes de conectar fuera del lock
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise DatabaseUnavailable(f"[{self.name}] No hay conexiones disponibles en el pool.")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if raw is None:
+                try:
+                    raw = self._connect()
+                except mysql.connector.Error as exc:
+                    with self._cond:
+                        self._size -= 1
+                        self._connect_errors += 1
+                        self._cond.notify()
+                    raise DatabaseUnavailable(f"[{self.name}] No se pudo conectar a la base de datos.") from exc
+            elif not self._is_healthy(raw):
+                # Conexión caída: se descarta y se intenta con otra
+                self._discard(raw)
+                with self._cond:
+                    self._size -= 1
+                    self._discarded += 1
+                    self._cond.notify()
+                continue
+
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._in_use += 1
+                self._checkouts += 1
+                self._checkout_time_total += elapsed
+                self._checkout_time_max = max(self._checkout_time_max, elapsed)
+            return PooledConnection(self, raw)
+
+    # Devuelve una conexión al pool, deshaciendo cualquier transacción abierta
+    def release(self, raw):
+        healthy = True
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except mysql.connector.Error:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((raw, time.monotonic()))
+                expired = self._trim_idle()
+            else:
+                self._size -= 1
+                self._discarded += 1
+                expired = [raw]
+            self._cond.notify()
+
+        for conn in expired:
+            self._discard(conn)
+
+    # Abre las conexiones mínimas; al arrancar el contenedor MySQL puede tardar en aceptar conexiones
+    def open(self, retries=20, delay=3):
+        for attempt in range(retries):
+            try:
+                with self._cond:
+                    missing = max(self.min_size - self._size, 0)
+                    self._size += missing
+                opened = []
+                try:
+                    for _ in range(missing):
+                        opened.append(self._connect())
+                finally:
+                    with self._cond:
+                        self._size -= missing - len(opened)
+                        now = time.monotonic()
+                        self._idle.extend((raw, now) for raw in opened)
+                        self._cond.notify_all()
+                return
+            except mysql.connector.Error:
+                print(f"[{self.name}] Intento {attempt+1} fallido, esperando...")
+                time.sleep(delay)
+        raise DatabaseUnavailable(f"[{self.name}] No se pudo conectar a la base de datos.")
+
+    # Cierra todas las conexiones libres (al apagar el servicio)
+    def close_all(self):
+        with self._cond:
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for raw in idle:
+            self._discard(raw)
+
+    # Estadísticas del pool para exponer en los servicios
+    def stats(self):
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "pool": self.name,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "checkout_ms_avg": round(self._checkout_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "checkout_ms_max": round(self._checkout_time_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "connect_errors": self._connect_errors,
+                "discarded": self._discarded,
+            }
@@ -0,0 +1,45 @@
+# Modo rápido de respuestas JSON para listas grandes (FAST_JSON=1)
+# Las filas del cursor ya llegan tipadas (int, str, date, Decimal): se serializan tal cual con orjson, sin
+# validarlas de nuevo contra el response_model ni pasarlas por jsonable_encoder. El JSON resultante es el mismo
+# (DECIMAL como número, fechas en ISO 8601) y el esquema OpenAPI no cambia porque las rutas conservan su response_model
+import os                                                          # Configuración desde variables de entorno
+from decimal import Decimal                                        # Precios (DECIMAL en MySQL)
+import orjson                                                      # Codificador JSON nativo
+from fastapi.encoders import jsonable_encoder                      # Camino estándar (sin FAST_JSON)
+from fastapi.responses import JSONResponse                         # Respuesta JSON estándar
+
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+
+# orjson ya serializa fechas en ISO 8601; DECIMAL sale como número, igual que un campo float del modelo
+def _valor(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def dumps(contenido):
+    return orjson.dumps(contenido, default=_valor)
+
+
+# Respuesta que serializa filas del cursor directamente; FastAPI no aplica el response_model a un Response
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+
+# Respuesta de una lista de filas: en modo rápido sin pasar por Pydantic; si no, se devuelven las filas para que
+# FastAPI las valide y serialice con el response_model de la ruta. "response" es el Response que FastAPI inyecta
+# en la ruta: sus encabezados se copian a la respuesta final
+def respuesta_lista(filas, response, headers=None):
+    if FAST_JSON:
+        return FastJSONResponse(content=filas, headers=headers)
+    response.headers.update(headers or {})
+    return filas
+
+
+# Lista de filas que a propósito no coincide con el response_model (proyección con fields=): no se valida
+def respuesta_parcial(filas, headers=None):
+    if FAST_JSON:
+        return FastJSONResponse(content=filas, headers=headers)
+    return JSONResponse(content=jsonable_encoder(filas), headers=headers)
@@ -0,0 +1,254 @@
+# Métricas de rendimiento en formato Prometheus: latencia por ruta, tiempo de cada consulta SQL normalizada,
+# espera por conexiones del pool y peticiones en curso; se exponen en GET /metrics de cada servicio
+# METRICS_ENABLED=0 desactiva el middleware (referencia para medir su costo)
+# SLOW_REQUEST_MS > 0 registra las peticiones lentas con el desglose de tiempo (SQL, pool, fases como bcrypt)
+import bisect                                                      # Búsqueda del bucket de cada observación
+import contextvars                                                 # Desglose de tiempo de la petición en curso
+import json                                                        # Registro de peticiones lentas
+import os                                                          # Configuración desde variables de entorno
+import random                                                      # Muestreo del registro de peticiones lentas
+import re                                                          # Normalización de las consultas SQL
+import threading                                                   # Observaciones desde el threadpool
+import time                                                        # Medición de latencias
+from contextlib import contextmanager                              # Medición con "with"
+from functools import lru_cache                                    # Normalización una sola vez por consulta
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))           # 0 = sin registro de peticiones lentas
+SLOW_REQUEST_SAMPLE = float(os.getenv("SLOW_REQUEST_SAMPLE", "1"))   # Fracción de peticiones lentas registradas
+MAX_QUERY_LABELS = 200        # Consultas distintas con serie propia; el resto se agrupa como "otras"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+# Contador o gauge con etiquetas
+class Metric:
+    def __init__(self, name, help, kind, labels=()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labels = labels
+        self._series = {} if labels else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + value
+
+    def dec(self, *labels, value=1):
+        self.inc(*labels, value=-value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in self._series.items():
+                lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value}")
+        return lines
+
+
+# Histograma acumulativo con buckets fijos
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}         # Etiquetas -> [conteo por bucket..., conteo +Inf, suma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(labels)
+            if serie is None:
+                serie = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            serie[index] += 1
+            serie[-2] += value
+            serie[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(serie)) for labels, serie in self._series.items()]
+        for labels, serie in series:
+            acumulado = 0
+            for bound, count in zip((*self.buckets, "+Inf"), serie):
+                acumulado += count
+                lines.append(f"{self.name}_bucket{_format_labels((*self.labels, 'le'), (*labels, bound))} {acumulado}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {round(serie[-2], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {serie[-1]}")
+        return lines
+
+
+REQUESTS = Metric("http_requests_total", "Peticiones HTTP atendidas", "counter", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route"))
+IN_FLIGHT = Metric("http_requests_in_flight", "Peticiones HTTP en curso", "gauge")
+QUERY_DURATION = Histogram("db_query_duration_seconds", "Duración de cada consulta SQL normalizada", ("query",))
+QUERY_ERRORS = Metric("db_query_errors_total", "Consultas SQL que terminaron con error", "counter", ("query",))
+QUERIES_IN_FLIGHT = Metric("db_queries_in_flight", "Consultas SQL en curso", "gauge")
+ACQUIRE_DURATION = Histogram("db_pool_acquire_seconds", "Espera para obtener una conexión del pool", ("pool",))
+PHASE_DURATION = Histogram("app_phase_duration_seconds", "Duración de fases costosas (por ejemplo bcrypt)", ("phase",))
+METRICS = [REQUESTS, REQUEST_DURATION, IN_FLIGHT, QUERY_DURATION, QUERY_ERRORS, QUERIES_IN_FLIGHT,
+           ACQUIRE_DURATION, PHASE_DURATION]
+
+# Estadísticas propias de cada servicio (pool, cachés, catálogo) exportadas como gauges
+_collectors = []
+
+# Desglose de la petición en curso: [segundos en SQL, consultas, segundos esperando conexión, fases]
+_breakdown = contextvars.ContextVar("metrics_breakdown", default=None)
+
+
+# Reemplaza literales y listas de marcadores por "?" para agrupar la misma consulta con distintos valores
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    sql = re.sub(r"'(?:[^'\\]|\\.)*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql.replace("%s", "?"))
+    sql = re.sub(r"\s+", " ", sql).strip()
+    sql = re.sub(r"\(\?(?:, \?)*\)", "(?)", sql)                      # (?, ?, ?) -> (?)
+    sql = re.sub(r"\(\?\)(?:, \(\?\))+", "(?), ...", sql)              # VALUES (?), (?) -> (?), ...
+    sql = re.sub(r"\(\(\?\), \.\.\.\)", "((?), ...)", sql)
+    return sql[:200]
+
+
+_query_labels = set()
+
+
+def _query_label(sql):
+    label = normalize_sql(sql)
+    if label not in _query_labels:
+        if len(_query_labels) >= MAX_QUERY_LABELS:
+            return "otras"
+        _query_labels.add(label)
+    return label
+
+
+# Hook usado por common.async_db alrededor de cada consulta (ejecución y lectura de filas)
+@contextmanager
+def timed_query(sql):
+    QUERIES_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    error = True
+    try:
+        yield
+        error = False
+    finally:
+        seconds = time.perf_counter() - started
+        QUERIES_IN_FLIGHT.dec()
+        label = _query_label(sql)
+        QUERY_DURATION.observe(seconds, label)
+        if error:
+            QUERY_ERRORS.inc(label)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown[0] += seconds
+            breakdown[1] += 1
+
+
+def observe_acquire(pool, seconds):
+    ACQUIRE_DURATION.observe(seconds, pool)
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[2] += seconds
+
+
+# Tiempo de una fase de la petición que no es SQL (por ejemplo "bcrypt_verify")
+def observe_phase(phase, seconds):
+    PHASE_DURATION.observe(seconds, phase)
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown[3][phase] = breakdown[3].get(phase, 0.0) + seconds
+
+
+# Exporta los valores numéricos de stats() como gauges "<prefix>_<clave>"; labels son claves de texto del dict
+def register_collector(prefix, stats, labels=()):
+    _collectors.append((prefix, stats, labels))
+
+
+def _render_collectors():
+    families = {}                 # Las series de un mismo nombre deben ir juntas bajo un solo TYPE
+    for prefix, stats, labels in _collectors:
+        values = stats()
+        label_text = _format_labels(labels, [values.get(label, "") for label in labels])
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and key not in labels:
+                families.setdefault(f"{prefix}_{key}", []).append(f"{prefix}_{key}{label_text} {float(value)}")
+    lines = []
+    for name, series in families.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(series)
+    return lines
+
+
+# Texto completo de GET /metrics
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(_render_collectors())
+    return "\n".join(lines) + "\n"
+
+
+# Middleware ASGI: mide cada petición HTTP y la agrupa por la plantilla de la ruta (/api/x/{id}, no la URL)
+class MetricsMiddleware:
+    def __init__(self, app, enabled=METRICS_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        breakdown = None
+        if SLOW_REQUEST_MS > 0:
+            breakdown = [0.0, 0, 0.0, {}]
+            _breakdown.set(breakdown)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "sin_ruta"
+            REQUEST_DURATION.observe(elapsed, scope["method"], template)
+            REQUESTS.inc(scope["method"], template, status)
+            if breakdown is not None and elapsed * 1000 >= SLOW_REQUEST_MS and random.random() < SLOW_REQUEST_SAMPLE:
+                _log_slow_request(scope, template, status, elapsed, breakdown)
+
+
+def _log_slow_request(scope, template, status, elapsed, breakdown):
+    sql_s, queries, acquire_s, phases = breakdown
+    otros = elapsed - sql_s - acquire_s - sum(phases.values())
+    print("[metrics] Petición lenta " + json.dumps({
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": template,
+        "status": status,
+        "total_ms": round(elapsed * 1000, 2),
+        "sql_ms": round(sql_s * 1000, 2),
+        "queries": queries,
+        "acquire_ms": round(acquire_s * 1000, 2),
+        **{f"{phase}_ms": round(seconds * 1000, 2) for phase, seconds in phases.items()},
+        "otros_ms": round(max(otros, 0.0) * 1000, 2),        # Código Python, serialización y red
+    }, ensure_ascii=False), flush=True)
@@ -0,0 +1,156 @@
+# Ejecutor de migraciones versionadas del esquema (archivos backend/migrations/NNNN_nombre.sql)
+# Cada servicio lo ejecuta al iniciar; un bloqueo con nombre evita que dos servicios migren a la vez
+# y las versiones aplicadas quedan en la tabla schema_migrations
+import hashlib                                                     # Suma de verificación de cada archivo
+import os                                                          # Ubicación de los archivos de migración
+import re                                                          # Nombre de archivo -> versión
+import mysql.connector                                             # Conexión con base de datos MySQL
+from common.db import DB_CONFIG                                    # Host y credenciales compartidos
+
+MIGRATIONS_DIR = os.getenv("MIGRATIONS_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"))
+LOCK_NAME = "mastercook_migrations"
+LOCK_TIMEOUT = 60
+
+# Errores que indican que el cambio ya estaba aplicado: la sentencia se omite y la migración continúa
+# 1050 tabla existe, 1060 columna duplicada, 1061 índice duplicado, 1091 índice o columna inexistente al borrar,
+# 1826 clave foránea duplicada
+ERRORES_YA_APLICADOS = {1050, 1060, 1061, 1091, 1826}
+
+# Solo las migraciones de la línea base (hasta esta versión) toleran esos errores: absorben los esquemas que
+# creaban los servicios antes de existir las migraciones, con o sin algunos índices (0002 borra uno que solo
+# tienen esos esquemas). Desde ahí las migraciones son la única definición del esquema y cualquier error detiene
+# el arranque en lugar de dejar un esquema a medias marcado como aplicado
+VERSION_BASE = 2
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+# Separa un archivo SQL en sentencias (terminadas en ";" al final de la línea), sin comentarios de línea
+def dividir_sentencias(sql):
+    sentencias, actual = [], []
+    for linea in sql.splitlines():
+        if linea.strip().startswith("--") or not linea.strip():
+            continue
+        actual.append(linea)
+        if linea.rstrip().endswith(";"):
+            sentencias.append("\n".join(actual).rstrip().rstrip(";"))
+            actual = []
+    if actual:
+        sentencias.append("\n".join(actual))
+    return sentencias
+
+
+# Lista las migraciones disponibles como (versión, nombre, contenido, checksum), en orden
+def cargar_migraciones(directorio=MIGRATIONS_DIR):
+    migraciones = []
+    for archivo in sorted(os.listdir(directorio)):
+        coincidencia = re.fullmatch(r"(\d+)_(\w+)\.sql", archivo)
+        if not coincidencia:
+            continue
+        with open(os.path.join(directorio, archivo), encoding="utf-8") as f:
+            contenido = f.read()
+        migraciones.append((int(coincidencia.group(1)), coincidencia.group(2), contenido,
+                            hashlib.sha256(contenido.encode()).hexdigest()))
+    return migraciones
+
+
+def _conectar(database):
+    return mysql.connector.connect(**{**DB_CONFIG, **({"database": database} if database else {})})
+
+
+# Versiones aplicadas -> checksum, o None si la tabla schema_migrations todavía no existe
+def _aplicadas(cursor):
+    try:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+    except mysql.connector.Error as exc:
+        if exc.errno == 1146:           # Tabla inexistente: base recién creada
+            return None
+        raise
+    return dict(cursor.fetchall())
+
+
+# Migraciones que faltan aplicar; avisa de las que cambiaron después de aplicarse
+def _pendientes(migraciones, aplicadas, nombre):
+    pendientes = []
+    for migracion in migraciones:
+        version, checksum = migracion[0], migracion[3]
+        if version not in aplicadas:
+            pendientes.append(migracion)
+        elif aplicadas[version] != checksum:
+            print(f"[{nombre}] Aviso: la migración {version} cambió después de aplicarse.")
+    return pendientes
+
+
+# Aplica las migraciones pendientes y devuelve las versiones aplicadas en esta ejecución
+# Si el esquema ya está al día (el caso de casi todos los arranques) sale con una sola consulta,
+# sin tomar el bloqueo ni ejecutar DDL
+def migrate(database=None, directorio=MIGRATIONS_DIR, nombre="migraciones"):
+    migraciones = cargar_migraciones(directorio)
+    conn = _conectar(database)
+    cursor = conn.cursor()
+    aplicadas_ahora = []
+    try:
+        aplicadas = _aplicadas(cursor)
+        if aplicadas is not None and not _pendientes(migraciones, aplicadas, nombre):
+            return aplicadas_ahora
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError(f"[{nombre}] No se obtuvo el bloqueo de migraciones.")
+        try:
+            cursor.execute(SCHEMA_MIGRATIONS_DDL)
+            # Se relee con el bloqueo tomado: otro servicio pudo migrar mientras se esperaba
+            aplicadas = _aplicadas(cursor)
+            for version, nombre_migracion, contenido, checksum in migraciones:
+                if version in aplicadas:
+                    continue
+                for sentencia in dividir_sentencias(contenido):
+                    try:
+                        cursor.execute(sentencia)
+                    except mysql.connector.Error as exc:
+                        if version > VERSION_BASE or exc.errno not in ERRORES_YA_APLICADOS:
+                            raise
+                conn.commit()
+                cursor.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                               (version, nombre_migracion, checksum))
+                conn.commit()
+                aplicadas_ahora.append(version)
+                print(f"[{nombre}] Migración {version} ({nombre_migracion}) aplicada.")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    return aplicadas_ahora
+
+
+# Comprueba sin modificar nada que el esquema tenga todas las migraciones (MIGRATE_ON_START=0)
+# Devuelve la última versión aplicada; si falta alguna, el servicio no se declara listo
+def verificar_esquema(database=None, directorio=MIGRATIONS_DIR, nombre="migraciones"):
+    migraciones = cargar_migraciones(directorio)
+    conn = _conectar(database)
+    cursor = conn.cursor()
+    try:
+        aplicadas = _aplicadas(cursor) or {}
+    finally:
+        cursor.close()
+        conn.close()
+    pendientes = _pendientes(migraciones, aplicadas, nombre)
+    if pendientes:
+        raise RuntimeError(f"[{nombre}] Esquema desactualizado; faltan las migraciones "
+                           f"{', '.join(str(migracion[0]) for migracion in pendientes)}.")
+    return max(aplicadas, default=0)
+
+
+# Uso como paso de despliegue, antes de arrancar los servicios: python -m common.migrations
+if __name__ == "__main__":
+    aplicadas = migrate(nombre="deploy")
+    print(f"[deploy] {len(aplicadas)} migración(es) aplicada(s).")
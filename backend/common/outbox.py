@@ -0,0 +1,179 @@
+# Eventos entre servicios con bandeja de salida transaccional (tabla outbox, migración 0005)
+# Quien cambia el estado llama a publicar() dentro de su transacción, como última sentencia antes del commit:
+# el evento existe si y solo si el cambio se confirmó. Cada servicio suscrito corre un OutboxRelay que lee la
+# tabla en orden de id y entrega los eventos por lotes a sus manejadores; un lote se reintenta hasta que todos
+# lo procesan (al menos una vez), por lo que los manejadores deben ser idempotentes (por ejemplo, releer las
+# filas afectadas o recordar los eventos ya aplicados)
+import asyncio                                                     # Tarea de lectura periódica
+import json                                                        # Contenido de los eventos
+import os                                                          # Configuración desde variables de entorno
+import time                                                        # Limpieza periódica de eventos viejos
+
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.2"))   # Segundos entre lecturas sin eventos nuevos
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))           # Eventos por lectura
+OUTBOX_GAP_TIMEOUT = float(os.getenv("OUTBOX_GAP_TIMEOUT", "5"))         # Segundos de espera ante un id faltante
+OUTBOX_GAP_RETENTION = float(os.getenv("OUTBOX_GAP_RETENTION", "3600"))  # Segundos que se sigue buscando un id saltado
+OUTBOX_MAX_GAPS = 10000                                                  # Ids saltados que se recuerdan como máximo
+OUTBOX_RETENTION_HOURS = int(os.getenv("OUTBOX_RETENTION_HOURS", "24"))  # Antigüedad de los eventos que se borran
+
+# Tipos de evento
+TALLER_CREADO = "taller_creado"
+RESERVA_CREADA = "reserva_creada"
+RESERVA_CANCELADA = "reserva_cancelada"
+CUPOS_ACTUALIZADOS = "cupos_actualizados"
+
+
+# Inserta eventos (tipo, id del taller, datos) en la outbox; se llama dentro de la transacción del cambio
+async def publicar(conn, eventos):
+    if eventos:
+        await conn.execute(
+            "INSERT INTO outbox (event_type, aggregate_id, payload) VALUES "
+            + ", ".join(["(%s, %s, %s)"] * len(eventos)),
+            [valor for tipo, workshop_id, datos in eventos
+             for valor in (tipo, workshop_id, json.dumps(datos, ensure_ascii=False, default=str))])
+
+
+class OutboxRelay:
+    def __init__(self, name, poll_interval=OUTBOX_POLL_INTERVAL, batch_size=OUTBOX_BATCH_SIZE,
+                 gap_timeout=OUTBOX_GAP_TIMEOUT, gap_retention=OUTBOX_GAP_RETENTION):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self.gap_retention = gap_retention
+        self._handlers = []             # (tipos, manejador asíncrono que recibe una lista de eventos)
+        self._pool = None
+        self._task = None
+        self._ultimo = 0                # Id del último evento entregado en orden
+        self._huecos = {}               # Id saltado -> instante en que se saltó (se sigue buscando)
+        self._delivered = 0
+        self._retries = 0
+        self._gaps_skipped = 0
+        self._gaps_recovered = 0
+        self._gaps_expired = 0
+        self._lag = 0.0                 # Segundos entre la creación y la entrega del último evento
+        self._purged_at = 0.0
+
+    def suscribir(self, tipos, manejador):
+        self._handlers.append((set(tipos), manejador))
+
+    @staticmethod
+    def _evento(fila):
+        return {"id": fila["id"], "tipo": fila["event_type"], "workshop_id": fila["aggregate_id"],
+                "datos": json.loads(fila["payload"]), "edad": float(fila["edad"])}
+
+    # Ids saltados que ya no se buscan: los de una transacción deshecha nunca aparecen
+    def _vencer_huecos(self):
+        limite = time.monotonic() - self.gap_retention
+        vencidos = {hueco for hueco, desde in self._huecos.items() if desde < limite}
+        restantes = sorted(set(self._huecos) - vencidos)
+        vencidos.update(restantes[:max(len(restantes) - OUTBOX_MAX_GAPS, 0)])
+        for hueco in vencidos:
+            del self._huecos[hueco]
+        self._gaps_expired += len(vencidos)
+
+    # Eventos de ids saltados que ya aparecieron, seguidos de los siguientes al último entregado hasta el primer
+    # hueco reciente. Un id faltante es una transacción aún sin confirmar (o deshecha): se espera hasta gap_timeout
+    # para entregar en orden y después se sigue adelante, pero el id se vuelve a buscar en cada lectura.
+    # created_at es el momento del INSERT, no del commit: una transacción lenta puede confirmar mucho después
+    async def _leer(self):
+        self._vencer_huecos()
+        huecos = sorted(self._huecos)
+        async with self._pool.acquire() as conn:
+            recuperados = await conn.fetch_all(f"""
+                SELECT id, event_type, aggregate_id, payload,
+                       TIMESTAMPDIFF(MICROSECOND, created_at, NOW(3)) / 1000000 AS edad
+                FROM outbox WHERE id IN ({', '.join(['%s'] * len(huecos))}) ORDER BY id
+            """, huecos) if huecos else []
+            filas = await conn.fetch_all("""
+                SELECT id, event_type, aggregate_id, payload,
+                       TIMESTAMPDIFF(MICROSECOND, created_at, NOW(3)) / 1000000 AS edad
+                FROM outbox WHERE id > %s ORDER BY id LIMIT %s
+            """, (self._ultimo, self.batch_size))
+        eventos = [self._evento(fila) for fila in recuperados]
+        esperado = self._ultimo + 1
+        for fila in filas:
+            if fila["id"] != esperado:
+                if float(fila["edad"]) < self.gap_timeout:
+                    break
+                ahora = time.monotonic()
+                for hueco in range(esperado, fila["id"]):
+                    if hueco not in self._huecos:
+                        self._huecos[hueco] = ahora
+                        self._gaps_skipped += 1
+            if fila["id"] not in self._huecos:     # Si no, ya viene entre los recuperados
+                eventos.append(self._evento(fila))
+            esperado = fila["id"] + 1
+        return eventos, len(filas)
+
+    # Entrega un lote a cada manejador; si alguno falla, el lote completo se vuelve a leer y entregar
+    async def _entregar(self, eventos):
+        for tipos, manejador in self._handlers:
+            suyos = [evento for evento in eventos if evento["tipo"] in tipos]
+            if suyos:
+                await manejador(suyos)
+        for evento in eventos:
+            if self._huecos.pop(evento["id"], None) is not None:
+                self._gaps_recovered += 1
+            else:
+                self._ultimo = max(self._ultimo, evento["id"])
+        self._delivered += len(eventos)
+        self._lag = eventos[-1]["edad"]
+
+    async def _purgar(self):
+        if time.monotonic() - self._purged_at < 3600:
+            return
+        self._purged_at = time.monotonic()
+        async with self._pool.acquire() as conn:
+            await conn.execute("DELETE FROM outbox WHERE created_at < NOW() - INTERVAL %s HOUR LIMIT 10000",
+                               (OUTBOX_RETENTION_HOURS,))
+
+    async def _run(self):
+        while True:
+            leidos = 0
+            try:
+                eventos, leidos = await self._leer()
+                if eventos:
+                    await self._entregar(eventos)
+                await self._purgar()
+            except Exception as exc:
+                self._retries += 1
+                print(f"[{self.name}] No se pudieron entregar los eventos después de {self._ultimo}: {exc}")
+                leidos = 0
+            # Con un lote completo se sigue leyendo sin esperar
+            if leidos < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    # Se llama antes de que el servicio cargue su estado desde MySQL, así ningún cambio posterior a esa carga
+    # queda sin entregar. Empieza gap_timeout segundos atrás: los eventos de transacciones que seguían
+    # abiertas se entregan (algunos dos veces, que los manejadores toleran) en lugar de perderse
+    async def start(self, pool):
+        self._pool = pool
+        async with pool.acquire() as conn:
+            fila = await conn.fetch_one("""
+                SELECT id FROM outbox WHERE created_at < NOW(3) - INTERVAL %s SECOND
+                ORDER BY created_at DESC LIMIT 1
+            """, (self.gap_timeout,))
+            if fila is None:
+                fila = await conn.fetch_one("SELECT COALESCE(MIN(id), 1) - 1 AS id FROM outbox")
+        self._ultimo = fila["id"]
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        return {
+            "relay": self.name,
+            "last_id": self._ultimo,
+            "delivered": self._delivered,
+            "retries": self._retries,
+            "gaps_skipped": self._gaps_skipped,
+            "gaps_pending": len(self._huecos),
+            "gaps_recovered": self._gaps_recovered,
+            "gaps_expired": self._gaps_expired,
+            "lag_s": round(self._lag, 3),
+        }
@@ -0,0 +1,49 @@
+# Paginación por conjunto de claves (keyset) con cursores opacos
+# Cada página continúa desde la última fila entregada, así su costo no depende de cuántas páginas hay antes
+import base64                                                      # Cursor opaco y seguro para URLs
+import json                                                        # Contenido del cursor
+
+
+# Error lanzado cuando el cursor recibido no es válido; los servicios responden 400
+class InvalidCursor(ValueError):
+    pass
+
+
+# Codifica los valores de la última fila entregada (por ejemplo fecha e id)
+def encode_cursor(values):
+    raw = json.dumps(list(values), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+# Decodifica un cursor aplicando a cada valor su conversión (por ejemplo date.fromisoformat, int)
+def decode_cursor(cursor, converters):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(converters):
+            raise ValueError
+        return tuple(convert(value) for convert, value in zip(converters, values))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Cursor inválido.")
+
+
+# Condición SQL para continuar después del cursor; devuelve (sql, parámetros)
+# Si todas las columnas son ascendentes usa "(col1, col2) > (%s, %s)", que MySQL resuelve con un rango del índice
+def keyset_condition(columns, values, descending=()):
+    if not descending:
+        placeholders = ", ".join(["%s"] * len(columns))
+        return f"({', '.join(columns)}) > ({placeholders})", list(values)
+    parts, params = [], []
+    for i, column in enumerate(columns):
+        operator = "<" if column in descending else ">"
+        parts.append("(" + " AND ".join([f"{prev} = %s" for prev in columns[:i]] + [f"{column} {operator} %s"]) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(parts) + ")", params
+
+
+# Recorta la página (se consulta limit + 1 filas) y arma el cursor de la siguiente
+def split_page(rows, limit, columns):
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor([page[-1][column] for column in columns])
@@ -0,0 +1,106 @@
+# Arranque no bloqueante de los servicios y sondas de liveness/readiness
+# El servidor empieza a aceptar peticiones de inmediato: la conexión a MySQL, las migraciones y la
+# inicialización propia de cada servicio corren en segundo plano, reintentando con espera exponencial
+# y jitter. /health (liveness) responde siempre; /ready solo cuando todo terminó y la base responde
+import asyncio                                                     # Tarea de arranque en segundo plano
+import os                                                          # Configuración desde variables de entorno
+import random                                                      # Jitter de los reintentos
+import time                                                        # Duración de cada fase del arranque
+from starlette.concurrency import run_in_threadpool                # Las migraciones usan el driver síncrono
+from common.db import DatabaseUnavailable                          # Pool sin conexiones disponibles
+from common.migrations import migrate, verificar_esquema           # Esquema al día antes de atender
+
+STARTUP_BACKOFF_BASE = float(os.getenv("STARTUP_BACKOFF_BASE", "0.5"))   # Primera espera entre intentos (s)
+STARTUP_BACKOFF_MAX = float(os.getenv("STARTUP_BACKOFF_MAX", "15"))      # Espera máxima entre intentos (s)
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "1"))                   # Límite de la consulta de /ready (s)
+# 1 = aplica las migraciones pendientes al iniciar; 0 = solo verifica la versión (las aplica un job aparte)
+MIGRATE_ON_START = os.getenv("MIGRATE_ON_START", "1") == "1"
+
+# Momento de importación del módulo: aproxima el inicio del proceso para medir el arranque en frío
+_INICIO = time.monotonic()
+
+
+class ServiceStartup:
+    def __init__(self, name, pool, pasos=()):
+        self.name = name
+        self.pool = pool
+        self.pasos = list(pasos)        # Corrutinas (sin argumentos) que inicializan el servicio, en orden
+        self.listo = False
+        self.error = None               # Último error del arranque, visible en /ready
+        self.intentos = 0
+        self.fases = {}                 # Fase -> segundos
+        self._abierto = False
+        self._migrado = False
+        self._hechos = 0                # Pasos ya completados (no se repiten al reintentar)
+        self._task = None
+
+    # Espera antes del intento n: exponencial con jitter completo, para no sincronizar réplicas
+    def _espera(self, intento):
+        return random.uniform(0, min(STARTUP_BACKOFF_MAX, STARTUP_BACKOFF_BASE * 2 ** intento))
+
+    async def _fase(self, nombre, corrutina):
+        started = time.monotonic()
+        await corrutina
+        self.fases[nombre] = round(time.monotonic() - started, 3)
+
+    async def _arrancar(self):
+        if not self._abierto:
+            await self._fase("connect_s", self.pool.open(retries=1, delay=0))
+            self._abierto = True
+        if not self._migrado:
+            if MIGRATE_ON_START:
+                await self._fase("migrate_s", run_in_threadpool(migrate, nombre=self.name))
+            else:
+                await self._fase("migrate_s", run_in_threadpool(verificar_esquema, nombre=self.name))
+            self._migrado = True
+        while self._hechos < len(self.pasos):
+            paso = self.pasos[self._hechos]
+            await self._fase(f"{paso.__name__}_s", paso())
+            self._hechos += 1
+
+    async def _run(self):
+        while True:
+            self.intentos += 1
+            try:
+                await self._arrancar()
+            except Exception as exc:
+                self.error = f"{type(exc).__name__}: {exc}"
+                espera = self._espera(self.intentos - 1)
+                print(f"[{self.name}] Arranque incompleto ({self.error}); reintento en {espera:.1f} s.")
+                await asyncio.sleep(espera)
+                continue
+            self.error = None
+            self.listo = True
+            self.fases["ready_s"] = round(time.monotonic() - _INICIO, 3)
+            print(f"[{self.name}] Listo en {self.fases['ready_s']} s ({self.intentos} intento(s)).")
+            return
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # Estado para /ready: (listo, detalle). Además del arranque, la base debe responder dentro de READY_TIMEOUT
+    async def ready(self):
+        estado = {"service": self.name, "ready": False, "attempts": self.intentos, "phases": self.fases,
+                  "pool": self.pool.stats()}
+        if not self.listo:
+            estado["reason"] = self.error or "iniciando"
+            return False, estado
+        try:
+            async def ping():
+                async with self.pool.acquire() as conn:
+                    await conn.fetch_one("SELECT 1 AS ok")
+            await asyncio.wait_for(ping(), READY_TIMEOUT)
+        except (DatabaseUnavailable, asyncio.TimeoutError) as exc:
+            estado["reason"] = str(exc) or "la base de datos no respondió a tiempo"
+            return False, estado
+        estado["ready"] = True
+        return True, estado
+
+    def stats(self):
+        return {"service": self.name, "ready": int(self.listo), "attempts": self.intentos, **self.fases}
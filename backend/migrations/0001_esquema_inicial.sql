@@ -0,0 +1,39 @@
+-- Esquema base de MasterCook: las tablas que antes creaba cada servicio al iniciar
+-- "IF NOT EXISTS" permite aplicarla sobre bases creadas con mysql-init/init.sql o por versiones anteriores
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100) UNIQUE,
+    password VARCHAR(255)
+);
+
+-- Usuario de prueba para el login inicial (contraseña cifrada con bcrypt)
+INSERT IGNORE INTO users (name, email, password)
+VALUES ('Admin', 'admin@mastercook.com', '$2b$12$sQpDdb0.V9OgTQ2SKc9Zp.HKmIwLJkkQaA3E3S4dEymO6pT5Es2n2');
+
+CREATE TABLE IF NOT EXISTS workshops (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    title VARCHAR(100),
+    description TEXT,
+    category VARCHAR(50),
+    date DATE,
+    max_participants INT,
+    current_participants INT DEFAULT 0,
+    price DECIMAL(10,2) NOT NULL DEFAULT 0.00,
+    FULLTEXT INDEX ft_workshops_texto (title, description)
+) DEFAULT CHARSET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_email VARCHAR(100),
+    workshop_id INT,
+    status ENUM('Confirmada', 'Cancelada', 'Completada') DEFAULT 'Confirmada',
+    payment_status ENUM('Pendiente', 'Pagado') DEFAULT 'Pendiente',
+    UNIQUE(user_email, workshop_id),
+    FOREIGN KEY (user_email) REFERENCES users(email) ON DELETE CASCADE,
+    FOREIGN KEY (workshop_id) REFERENCES workshops(id) ON DELETE CASCADE
+);
+
+-- Bases creadas antes del índice FULLTEXT (la sentencia se omite si ya existe)
+ALTER TABLE workshops ADD FULLTEXT INDEX ft_workshops_texto (title, description);
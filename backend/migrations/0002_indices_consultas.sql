@@ -0,0 +1,20 @@
+-- Índices para las consultas más frecuentes (ver benchmarks/check_explain.py)
+
+-- Título único: crear_taller inserta directamente y responde 409 ante ER_DUP_ENTRY
+-- Falla si ya hay títulos repetidos; deben corregirse antes de aplicar la migración
+ALTER TABLE workshops ADD UNIQUE INDEX uq_workshops_title (title);
+
+-- Columna generada "con cupo": el catálogo y la búsqueda filtran por ella y ordenan por (date, id)
+-- sin recorrer la tabla completa ni ordenar en memoria
+ALTER TABLE workshops
+    ADD COLUMN has_seats BOOLEAN AS (current_participants < max_participants) VIRTUAL;
+ALTER TABLE workshops ADD INDEX idx_workshops_cupo_fecha (has_seats, date);
+
+-- Búsqueda por categoría con cupo, en el mismo orden del catálogo
+ALTER TABLE workshops ADD INDEX idx_workshops_categoria (category, has_seats, date);
+
+-- Reemplazado por idx_workshops_cupo_fecha
+ALTER TABLE workshops DROP INDEX idx_workshops_date;
+
+-- Reservas de un taller (conteos, lista de espera, conciliación de cupos)
+ALTER TABLE bookings ADD INDEX idx_bookings_workshop (workshop_id, status);
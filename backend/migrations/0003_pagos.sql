@@ -0,0 +1,24 @@
+-- Pagos de reservas (payment-service)
+-- idempotency_key es único: un reintento con la misma clave devuelve el pago existente sin cobrar otra vez
+-- booking_activo solo tiene valor mientras el pago no fue rechazado; su índice UNIQUE impide dos cobros
+-- de la misma reserva con claves distintas, pero permite reintentar después de un rechazo
+
+CREATE TABLE IF NOT EXISTS payments (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    idempotency_key VARCHAR(100) NOT NULL,
+    booking_id INT NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    status ENUM('Pendiente', 'Pagado', 'Rechazado') NOT NULL DEFAULT 'Pendiente',
+    provider_ref VARCHAR(100),
+    error VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    booking_activo INT AS (IF(status = 'Rechazado', NULL, booking_id)) STORED,
+    UNIQUE INDEX uq_payments_idempotency (idempotency_key),
+    UNIQUE INDEX uq_payments_booking_activo (booking_activo),
+    INDEX idx_payments_booking (booking_id),
+    INDEX idx_payments_status (status),
+    -- Sin ON DELETE CASCADE: MySQL no lo permite sobre la base de una columna generada almacenada,
+    -- y un pago registrado no debe desaparecer al borrar la reserva
+    FOREIGN KEY (booking_id) REFERENCES bookings(id)
+);
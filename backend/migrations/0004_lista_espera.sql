@@ -0,0 +1,22 @@
+-- Lista de espera de talleres sin cupo (reservation-service)
+-- La cola de cada taller se ordena por prioridad (mayor primero) y luego por orden de llegada (id)
+-- espera_activa solo tiene valor mientras la entrada espera: un usuario no puede estar dos veces
+-- en la cola del mismo taller, pero puede volver a anotarse después de salir o ser promovido
+-- Sin ON DELETE CASCADE en las claves foráneas: MySQL no lo permite sobre la base de una columna generada almacenada
+
+CREATE TABLE IF NOT EXISTS waitlist (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    workshop_id INT NOT NULL,
+    user_email VARCHAR(100) NOT NULL,
+    priority TINYINT NOT NULL DEFAULT 0,
+    status ENUM('Esperando', 'Promovido', 'Cancelado') NOT NULL DEFAULT 'Esperando',
+    booking_id INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    espera_activa INT AS (IF(status = 'Esperando', workshop_id, NULL)) STORED,
+    UNIQUE INDEX uq_waitlist_espera (espera_activa, user_email),
+    INDEX idx_waitlist_cola (workshop_id, status, priority DESC, id),
+    INDEX idx_waitlist_usuario (user_email),
+    FOREIGN KEY (workshop_id) REFERENCES workshops(id),
+    FOREIGN KEY (user_email) REFERENCES users(email)
+);
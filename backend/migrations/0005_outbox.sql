@@ -0,0 +1,13 @@
+-- Bandeja de salida (outbox) de eventos entre servicios
+-- Cada servicio inserta aquí sus eventos en la misma transacción que el cambio que describen;
+-- los relés de los servicios suscritos la leen en orden de id y reparten los eventos (common/outbox.py)
+-- aggregate_id es el taller afectado: los consumidores actualizan solo esos talleres
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    aggregate_id INT NOT NULL,
+    payload JSON NOT NULL,
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_outbox_creado (created_at)
+);
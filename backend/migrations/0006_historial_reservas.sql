@@ -0,0 +1,3 @@
+-- Historial de reservas de un usuario paginado por id descendente (GET /api/booking/usuario/{email}?cursor=)
+-- Con (user_email, id) cada página es un rango del índice, sin ordenar en memoria
+ALTER TABLE bookings ADD INDEX idx_bookings_usuario (user_email, id);
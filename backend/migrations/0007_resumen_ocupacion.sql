@@ -0,0 +1,30 @@
+-- Resumen de ocupación e ingresos por (categoría, fecha) para GET /api/booking/analitica
+-- Lo mantienen incrementalmente, en la misma transacción que el cambio, quienes crean talleres, cambian
+-- current_participants o confirman pagos (common/analytics.py); los reportes leen O(grupos) en lugar de
+-- agrupar todas las reservas. "python -m common.analytics" lo reconstruye desde cero
+--   workshops / capacity: talleres y suma de max_participants
+--   booked: suma de current_participants (reservas no canceladas; con el contador de cupos, las ya escritas)
+--   paid / revenue: reservas no canceladas con pago confirmado y la suma de sus precios
+-- Los talleres sin categoría o sin fecha no entran en el resumen
+
+CREATE TABLE IF NOT EXISTS occupancy_stats (
+    category VARCHAR(50) NOT NULL,
+    date DATE NOT NULL,
+    workshops INT NOT NULL DEFAULT 0,
+    capacity INT NOT NULL DEFAULT 0,
+    booked INT NOT NULL DEFAULT 0,
+    paid INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    PRIMARY KEY (category, date),
+    INDEX idx_occupancy_fecha (date)
+) DEFAULT CHARSET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci;
+
+-- Carga inicial con los datos existentes (la tabla recién creada está vacía)
+INSERT IGNORE INTO occupancy_stats (category, date, workshops, capacity, booked, paid, revenue)
+SELECT w.category, w.date, COUNT(*), SUM(COALESCE(w.max_participants, 0)), SUM(COALESCE(w.current_participants, 0)),
+       COALESCE(SUM(p.pagadas), 0), COALESCE(SUM(p.pagadas * w.price), 0)
+FROM workshops w
+LEFT JOIN (SELECT workshop_id, COUNT(*) AS pagadas FROM bookings
+           WHERE status <> 'Cancelada' AND payment_status = 'Pagado' GROUP BY workshop_id) p ON p.workshop_id = w.id
+WHERE w.category IS NOT NULL AND w.date IS NOT NULL
+GROUP BY w.category, w.date;
@@ -0,0 +1,12 @@
+-- Reservas reactivadas desde la lista de espera: el índice único (user_email, workshop_id) obliga a reutilizar
+-- la fila de una reserva cancelada, así que cada reactivación aumenta bookings.activacion
+-- Cada pago guarda la activación que cobra y la unicidad de pagos vigentes pasa a ser por (reserva, activación):
+-- el pago de una activación anterior (por ejemplo, pagada y luego cancelada) ya no impide pagar la reactivada,
+-- y un cobro que se confirma tarde no marca como pagada una activación posterior
+
+ALTER TABLE bookings ADD COLUMN activacion INT NOT NULL DEFAULT 1;
+
+ALTER TABLE payments ADD COLUMN booking_activacion INT NOT NULL DEFAULT 1;
+
+ALTER TABLE payments DROP INDEX uq_payments_booking_activo,
+    ADD UNIQUE INDEX uq_payments_booking_activo (booking_activo, booking_activacion);
@@ -0,0 +1,6 @@
+-- Pagos que se confirman cuando su reserva (o la activación que cobraban) ya fue cancelada: el dinero se cobró
+-- pero la reserva no pasa a pagada, así que el pago queda en "Reembolsar" para devolverlo o revisarlo a mano
+-- booking_activo se mantiene: la activación cancelada no se vuelve a pagar
+
+ALTER TABLE payments MODIFY COLUMN status ENUM('Pendiente', 'Pagado', 'Rechazado', 'Reembolsar')
+    NOT NULL DEFAULT 'Pendiente';
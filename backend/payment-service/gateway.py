@@ -0,0 +1,66 @@
+# Pasarelas de pago intercambiables; PAYMENT_GATEWAY elige la implementación (por defecto la simulada)
+# Cada cobro lleva la clave de idempotencia del pago: si se reintenta, la pasarela no vuelve a cobrar
+import abc                                                         # Interfaz común de las pasarelas
+import asyncio                                                     # Latencia simulada sin bloquear el event loop
+import os                                                          # Configuración desde variables de entorno
+import random                                                      # Rechazos y fallos simulados
+import uuid                                                        # Referencia del cobro en la pasarela
+
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "fake")
+FAKE_GATEWAY_LATENCY_MS = float(os.getenv("FAKE_GATEWAY_LATENCY_MS", "50"))     # Latencia de cada cobro
+FAKE_GATEWAY_DECLINE_RATE = float(os.getenv("FAKE_GATEWAY_DECLINE_RATE", "0"))  # Fracción de cobros rechazados
+FAKE_GATEWAY_ERROR_RATE = float(os.getenv("FAKE_GATEWAY_ERROR_RATE", "0"))      # Fracción de fallos temporales
+
+
+# La pasarela no respondió o falló temporalmente: el cobro se puede reintentar con la misma clave
+class GatewayError(Exception):
+    pass
+
+
+# La pasarela rechazó el cobro (por ejemplo fondos insuficientes): el pago termina como "Rechazado"
+class PaymentDeclined(Exception):
+    pass
+
+
+# Interfaz que implementa cada pasarela
+class Gateway(abc.ABC):
+    # Cobra "amount" y devuelve la referencia del cobro en la pasarela
+    @abc.abstractmethod
+    async def charge(self, idempotency_key, amount):
+        ...
+
+
+# Pasarela local para desarrollo, pruebas y benchmarks; recuerda cada clave como lo haría un proveedor real
+class FakeGateway(Gateway):
+    def __init__(self, latency_ms=FAKE_GATEWAY_LATENCY_MS, decline_rate=FAKE_GATEWAY_DECLINE_RATE,
+                 error_rate=FAKE_GATEWAY_ERROR_RATE):
+        self.latency = latency_ms / 1000
+        self.decline_rate = decline_rate
+        self.error_rate = error_rate
+        self._charges = {}            # Clave de idempotencia -> referencia o PaymentDeclined
+        self.calls = 0
+
+    async def charge(self, idempotency_key, amount):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if idempotency_key not in self._charges:
+            if random.random() < self.error_rate:
+                raise GatewayError("La pasarela no respondió.")
+            if random.random() < self.decline_rate:
+                self._charges[idempotency_key] = PaymentDeclined("Pago rechazado por la pasarela.")
+            else:
+                self._charges[idempotency_key] = f"fake_{uuid.uuid4().hex[:16]}"
+        result = self._charges[idempotency_key]
+        if isinstance(result, PaymentDeclined):
+            raise result
+        return result
+
+    def stats(self):
+        return {"gateway": "fake", "calls": self.calls, "charges": len(self._charges)}
+
+
+# Crea la pasarela configurada en PAYMENT_GATEWAY
+def create_gateway(name=PAYMENT_GATEWAY):
+    if name == "fake":
+        return FakeGateway()
+    raise ValueError(f"Pasarela de pago desconocida: {name}")
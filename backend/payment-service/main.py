@@ -1,11 +1,18 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import mysql.connector
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from typing import Optional
+from fastapi.responses import JSONResponse, Response
+from common.db import DatabaseUnavailable, IntegrityViolation, ER_DUP_ENTRY
+from common.async_db import create_pool
+from common.metrics import CONTENT_TYPE, MetricsMiddleware, register_collector, render_metrics
+from common.startup import ServiceStartup
+from gateway import create_gateway
+from pipeline import PaymentPipeline, PipelineBusy
 
 # Inicialización de la aplicación FastAPI
-app = FastAPI()
+app = FastAPI(title="Payment Service", version="1.0")
 
 # Orígenes permitidos para CORS
 origins = ["http://localhost:3000"]
@@ -19,7 +26,161 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Middleware de métricas: latencia por ruta y peticiones en curso (se exponen en /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Modelo de entrada para pagar una reserva; el monto se toma del precio del taller, no del cliente
+class PaymentCreate(BaseModel):
+    booking_id: int = Field(..., gt=0)
+
+# Modelo de salida de un pago
+class Payment(BaseModel):
+    id: int
+    idempotency_key: str
+    booking_id: int
+    amount: float
+    status: str
+    provider_ref: Optional[str] = None
+    error: Optional[str] = None
+
+# Pool de conexiones del servicio (driver y tamaño configurables por variables de entorno)
+pool = create_pool("payment-service")
+
+# Pasarela de pago (PAYMENT_GATEWAY) y pipeline de cobro con escrituras por lotes
+pipeline = PaymentPipeline("payment-service", create_gateway())
+
+# Estadísticas del pool y del pipeline incluidas en /metrics
+register_collector("db_pool", pool.stats, labels=("pool", "driver"))
+register_collector("payment_pipeline", pipeline.stats, labels=("pipeline",))
+
+async def iniciar_pipeline():
+    await pipeline.start(pool)
+
+# Conexión, migraciones y arranque del pipeline en segundo plano, con reintentos; /ready indica cuándo terminó
+arranque = ServiceStartup("payment-service", pool, pasos=(iniciar_pipeline,))
+register_collector("startup", arranque.stats, labels=("service",))
+
+CAMPOS_PAGO = "id, idempotency_key, booking_id, amount, status, provider_ref, error"
+
+# Si la base de datos no responde se devuelve 503 en lugar de bloquear la petición
+@app.exception_handler(DatabaseUnavailable)
+def db_unavailable_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Base de datos no disponible"})
+
+# Si la cola de pagos está llena se rechaza la petición en lugar de acumularla
+@app.exception_handler(PipelineBusy)
+def pipeline_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Servicio ocupado, intenta de nuevo"},
+                        headers={"Retry-After": "1"})
+
+# Evento que se ejecuta al iniciar el servidor: no espera a MySQL; el pool, las migraciones y el pipeline
+# (que retoma los pagos pendientes) arrancan en segundo plano
+@app.on_event("startup")
+async def startup():
+    arranque.start()
+
+# Evento que se ejecuta al apagar el servidor: guarda los resultados ya cobrados y cierra el pool
+@app.on_event("shutdown")
+async def shutdown():
+    await arranque.stop()
+    await pipeline.stop()
+    await pool.close()
+
 # Ruta de prueba
 @app.post("/api/v0/hello")
 async def hello_world():
     return {"message": "Hello World"}
+
+# Motivo por el que una reserva no se puede pagar (None si se puede)
+def validar_reserva(reserva):
+    if reserva is None:
+        return HTTPException(status_code=404, detail="Reserva no encontrada")
+    if reserva["status"] != "Confirmada":
+        return HTTPException(status_code=409, detail="La reserva no está confirmada")
+    if reserva["payment_status"] == "Pagado":
+        return HTTPException(status_code=409, detail="La reserva ya está pagada")
+    return None
+
+# Ruta para registrar el pago de una reserva
+# El encabezado Idempotency-Key identifica el intento: repetir la petición devuelve el mismo pago (200)
+# sin volver a cobrar; un pago nuevo se acepta con 202 y se cobra en segundo plano
+@app.post("/api/payment/pagos", response_model=Payment, status_code=202, summary="Pagar una reserva")
+async def crear_pago(data: PaymentCreate,
+                     idempotency_key: str = Header(..., alias="Idempotency-Key", min_length=1, max_length=100)):
+    if pipeline.busy():
+        raise PipelineBusy("La cola de pagos está llena.")
+
+    async with pool.acquire() as conn:
+        reserva = await conn.fetch_one("""
+            SELECT b.status, b.payment_status, b.activacion, w.price FROM bookings b
+            JOIN workshops w ON w.id = b.workshop_id WHERE b.id = %s
+        """, (data.booking_id,))
+        error = validar_reserva(reserva)
+        if error is None:
+            try:
+                # El pago queda asociado a la activación vigente de la reserva (ver migración 0008)
+                await conn.execute(
+                    "INSERT INTO payments (idempotency_key, booking_id, booking_activacion, amount) "
+                    "VALUES (%s, %s, %s, %s)",
+                    (idempotency_key, data.booking_id, reserva["activacion"], reserva["price"]))
+                pago_id = conn.lastrowid
+            except IntegrityViolation as exc:
+                # Clave ya usada o reserva con otro pago en curso (índices UNIQUE de payments)
+                if exc.code != ER_DUP_ENTRY:
+                    raise
+                error = HTTPException(status_code=409, detail="La reserva ya tiene un pago en curso o realizado")
+
+        if error is not None:
+            # Un reintento con la misma clave devuelve el pago original, aunque la reserva ya figure pagada
+            existente = await conn.fetch_one(
+                f"SELECT {CAMPOS_PAGO} FROM payments WHERE idempotency_key = %s", (idempotency_key,))
+            if existente is None:
+                raise error
+            if existente["booking_id"] != data.booking_id:
+                raise HTTPException(status_code=422, detail="La clave de idempotencia ya se usó con otra reserva")
+            return JSONResponse(status_code=200, content=jsonable_encoder(Payment(**existente)))
+
+        # busy() es solo un atajo: la cola pudo llenarse durante las consultas. Si no entra, el pago se borra
+        # para que un reintento con la misma clave lo registre y encole de nuevo en lugar de quedar sin cobrar
+        try:
+            await pipeline.submit(pago_id, idempotency_key, reserva["price"])
+        except PipelineBusy:
+            await conn.execute("DELETE FROM payments WHERE id = %s AND status = 'Pendiente'", (pago_id,))
+            raise
+    return {"id": pago_id, "idempotency_key": idempotency_key, "booking_id": data.booking_id,
+            "amount": reserva["price"], "status": "Pendiente"}
+
+# Ruta para consultar el estado de un pago
+@app.get("/api/payment/pagos/{pago_id}", response_model=Payment, summary="Consultar un pago")
+async def obtener_pago(pago_id: int):
+    async with pool.acquire() as conn:
+        pago = await conn.fetch_one(f"SELECT {CAMPOS_PAGO} FROM payments WHERE id = %s", (pago_id,))
+    if not pago:
+        raise HTTPException(status_code=404, detail="Pago no encontrado")
+    return pago
+
+# Ruta para verificar que el servicio está activo
+@app.get("/api/payment/health")
+async def health():
+    return {"status": "payment-service ok"}
+
+# Ruta de readiness: 200 solo con el esquema al día, el pipeline en marcha y la base respondiendo
+@app.get("/api/payment/ready")
+async def ready():
+    listo, estado = await arranque.ready()
+    return JSONResponse(status_code=200 if listo else 503, content=estado)
+
+# Ruta con las estadísticas del pool de conexiones (en uso, en espera, latencia de préstamo)
+@app.get("/api/payment/pool")
+async def pool_stats():
+    return pool.stats()
+
+# Ruta con el estado del pipeline de pagos (cola, cobros en curso, tamaño de los lotes escritos)
+@app.get("/api/payment/pipeline")
+async def pipeline_stats():
+    return {**pipeline.stats(), **pipeline.gateway.stats()}
+
+# Ruta con las métricas del servicio en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
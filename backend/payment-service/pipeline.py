@@ -0,0 +1,204 @@
+# Procesamiento asíncrono de pagos: una cola acotada, un pool de workers que llaman a la pasarela
+# y una tarea que escribe los resultados por lotes (un UPDATE de pagos y uno de reservas por lote,
+# junto con los ingresos del resumen de ocupación)
+import asyncio                                                     # Cola, workers y espera entre escrituras
+import os                                                          # Configuración desde variables de entorno
+import time                                                        # Medición de latencias
+from collections import Counter                                    # Reservas pagadas por taller
+from common.analytics import registrar                             # Resumen de ocupación e ingresos
+from gateway import GatewayError, PaymentDeclined                  # Resultados posibles de un cobro
+
+PAYMENT_WORKERS = int(os.getenv("PAYMENT_WORKERS", "64"))                     # Llamadas a la pasarela en paralelo
+PAYMENT_QUEUE_SIZE = int(os.getenv("PAYMENT_QUEUE_SIZE", "20000"))            # Pagos esperando ser procesados
+PAYMENT_BATCH_SIZE = int(os.getenv("PAYMENT_BATCH_SIZE", "500"))              # Resultados por escritura
+PAYMENT_FLUSH_INTERVAL = float(os.getenv("PAYMENT_FLUSH_INTERVAL", "0.05"))   # Segundos máximos entre escrituras
+PAYMENT_MAX_ATTEMPTS = int(os.getenv("PAYMENT_MAX_ATTEMPTS", "5"))            # Intentos ante fallos temporales
+
+
+# Error lanzado cuando la cola de pagos está llena; el servicio responde 503
+class PipelineBusy(Exception):
+    pass
+
+
+class PaymentPipeline:
+    def __init__(self, name, gateway, workers=PAYMENT_WORKERS, queue_size=PAYMENT_QUEUE_SIZE,
+                 batch_size=PAYMENT_BATCH_SIZE, flush_interval=PAYMENT_FLUSH_INTERVAL,
+                 max_attempts=PAYMENT_MAX_ATTEMPTS):
+        self.name = name
+        self.gateway = gateway
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._results = []                  # (id del pago, estado, referencia, error) pendientes de escribir
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._pool = None
+        self._tasks = []
+        self._in_flight = 0
+        self._paid = 0
+        self._declined = 0
+        self._retries = 0
+        self._unresolved = 0
+        self._errors = 0                    # Cobros interrumpidos por errores inesperados
+        self._refunds = 0                   # Cobros de reservas ya canceladas, marcados "Reembolsar"
+        self._batches = 0
+        self._rows_written = 0
+        self._charges = 0
+        self._charge_time_total = 0.0
+
+    def busy(self):
+        return self._queue.full()
+
+    # Encola un pago ya registrado como "Pendiente"; no espera: con la cola llena lanza PipelineBusy
+    async def submit(self, payment_id, idempotency_key, amount):
+        try:
+            self._queue.put_nowait((payment_id, idempotency_key, amount))
+        except asyncio.QueueFull:
+            raise PipelineBusy("La cola de pagos está llena.") from None
+
+    # Cobra con reintentos; la misma clave de idempotencia garantiza un solo cobro aunque se repita la llamada
+    # Si la pasarela sigue fallando el pago queda "Pendiente" y se retoma al reiniciar el servicio
+    async def _charge(self, idempotency_key, amount):
+        for attempt in range(self.max_attempts):
+            try:
+                return "Pagado", await self.gateway.charge(idempotency_key, amount), None
+            except PaymentDeclined as exc:
+                return "Rechazado", None, str(exc)
+            except GatewayError:
+                self._retries += 1
+                await asyncio.sleep(min(0.05 * 2 ** attempt, 2.0))
+        return None
+
+    async def _worker(self):
+        while True:
+            payment_id, idempotency_key, amount = await self._queue.get()
+            self._in_flight += 1
+            started = time.monotonic()
+            try:
+                result = await self._charge(idempotency_key, amount)
+            except Exception as exc:
+                # Un error inesperado no debe terminar el worker (el pool se achicaría sin aviso hasta llenar
+                # la cola): el pago queda "Pendiente" y se retoma al reiniciar, como los que agotan los intentos
+                print(f"[{self.name}] Error inesperado al cobrar el pago {payment_id}: {exc!r}")
+                self._errors += 1
+                result = None
+            finally:
+                self._in_flight -= 1
+                self._charges += 1
+                self._charge_time_total += time.monotonic() - started
+                self._queue.task_done()
+            if result is None:
+                self._unresolved += 1
+                continue
+            self._results.append((payment_id, *result))
+            if len(self._results) >= self.batch_size:
+                self._flush_now.set()
+
+    # Escribe los resultados cada flush_interval o antes si ya se juntó un lote completo
+    async def _flusher(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._results:
+                lote, self._results = self._results[:self.batch_size], self._results[self.batch_size:]
+                try:
+                    await self._write(lote)
+                except Exception as exc:
+                    # Se reintenta en la próxima escritura; la pasarela ya no vuelve a cobrar estas claves
+                    print(f"[{self.name}] No se pudieron guardar {len(lote)} pagos: {exc}")
+                    self._results = lote + self._results
+                    return
+
+    # Un UPDATE con CASE para todos los pagos del lote y un UPDATE con JOIN para sus reservas pagadas
+    async def _write(self, lote):
+        ids = [payment_id for payment_id, _, _, _ in lote]
+        casos = " ".join(["WHEN %s THEN %s"] * len(lote))
+        marcadores = ", ".join(["%s"] * len(lote))
+        params = [valor for payment_id, status, _, _ in lote for valor in (payment_id, status)]
+        params += [valor for payment_id, _, ref, _ in lote for valor in (payment_id, ref)]
+        params += [valor for payment_id, _, _, error in lote for valor in (payment_id, error)]
+        pagados = [payment_id for payment_id, status, _, _ in lote if status == "Pagado"]
+        reembolsos = 0
+
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    f"UPDATE payments SET status = CASE id {casos} END, provider_ref = CASE id {casos} END, "
+                    f"error = CASE id {casos} END WHERE id IN ({marcadores}) AND status = 'Pendiente'",
+                    params + ids)
+                if pagados:
+                    # Reservas vigentes que pasan a pagadas: se bloquean antes del UPDATE para sumar al resumen
+                    # de ocupación exactamente las que cambian. Solo cuenta el pago de la activación vigente
+                    nuevas = await conn.fetch_all(
+                        "SELECT b.workshop_id FROM bookings b JOIN payments p ON p.booking_id = b.id "
+                        f"WHERE p.id IN ({', '.join(['%s'] * len(pagados))}) AND p.booking_activacion = b.activacion "
+                        "AND b.payment_status = 'Pendiente' AND b.status <> 'Cancelada' FOR UPDATE OF b", pagados)
+                    await conn.execute(
+                        "UPDATE bookings b JOIN payments p ON p.booking_id = b.id SET b.payment_status = 'Pagado' "
+                        f"WHERE p.id IN ({', '.join(['%s'] * len(pagados))}) "
+                        "AND p.booking_activacion = b.activacion AND b.status <> 'Cancelada'", pagados)
+                    # Cobros de reservas canceladas (o de una activación anterior) mientras el pago estaba en
+                    # curso: la reserva no cambia y el pago queda para reembolso
+                    reembolsos = await conn.execute(
+                        "UPDATE payments p JOIN bookings b ON b.id = p.booking_id SET p.status = 'Reembolsar' "
+                        f"WHERE p.id IN ({', '.join(['%s'] * len(pagados))}) AND p.status = 'Pagado' "
+                        "AND (b.status = 'Cancelada' OR p.booking_activacion <> b.activacion)", pagados)
+                    await registrar(conn, {workshop_id: (0, 0, n) for workshop_id, n in
+                                           Counter(fila["workshop_id"] for fila in nuevas).items()})
+        self._batches += 1
+        self._rows_written += len(lote)
+        self._paid += len(pagados)
+        self._declined += len(lote) - len(pagados)
+        self._refunds += reembolsos
+
+    # Arranca los workers y vuelve a encolar los pagos que quedaron pendientes (por ejemplo tras un reinicio)
+    async def start(self, pool):
+        self._pool = pool
+        async with pool.acquire() as conn:
+            pendientes = await conn.fetch_all(
+                "SELECT id, idempotency_key, amount FROM payments WHERE status = 'Pendiente' ORDER BY id LIMIT %s",
+                (self._queue.maxsize,))
+        for pago in pendientes:
+            if self._queue.full():      # Pagos recibidos mientras el servicio arrancaba ya ocupan la cola
+                break
+            self._queue.put_nowait((pago["id"], pago["idempotency_key"], pago["amount"]))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._flusher()))
+        if pendientes:
+            print(f"[{self.name}] {len(pendientes)} pagos pendientes encolados de nuevo.")
+
+    # Detiene los workers y guarda los resultados ya obtenidos; lo que quedó en cola sigue "Pendiente"
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+    def stats(self):
+        return {
+            "pipeline": self.name,
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "in_flight": self._in_flight,
+            "pending_writes": len(self._results),
+            "paid": self._paid,
+            "declined": self._declined,
+            "retries": self._retries,
+            "unresolved": self._unresolved,
+            "errors": self._errors,
+            "refunds": self._refunds,
+            "batches": self._batches,
+            "avg_batch_size": round(self._rows_written / self._batches, 1) if self._batches else 0.0,
+            "charge_ms_avg": round(self._charge_time_total / self._charges * 1000, 3) if self._charges else 0.0,
+        }
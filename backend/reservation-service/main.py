@@ -1,11 +1,20 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import mysql.connector
-from fastapi.responses import JSONResponse
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from common.db import DatabaseUnavailable, IntegrityViolation, ER_DUP_ENTRY, ER_NO_REFERENCED_ROW
+from common.async_db import create_pool
+from common.outbox import RESERVA_CANCELADA, RESERVA_CREADA, publicar
+from common.analytics import registrar
+from common.metrics import CONTENT_TYPE, MetricsMiddleware, register_collector, render_metrics
+from common.startup import ServiceStartup
+from waitlist import ListaEspera, Notificador
+import asyncio
+import os
 
 # Inicialización de la aplicación FastAPI
-app = FastAPI()
+app = FastAPI(title="Reservation Service", version="1.0")
 
 # Orígenes permitidos para CORS
 origins = ["http://localhost:3000"]
@@ -19,7 +28,328 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Middleware de métricas: latencia por ruta y peticiones en curso (se exponen en /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Segundos entre recargas de la copia en memoria desde MySQL (corrige cambios hechos por otros procesos)
+WAITLIST_RESYNC_INTERVAL = float(os.getenv("WAITLIST_RESYNC_INTERVAL", "30"))
+# Segundos entre comentarios de keep-alive en las conexiones SSE
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+# Con el contador de cupos de booking-service (mismo valor que allí) current_participants lo escribe el
+# contador: una cancelación no lo toca y el cupo se libera en el contador con el evento reserva_cancelada
+SEAT_COUNTER = os.getenv("SEAT_COUNTER", "1") == "1"
+
+# Modelo de entrada para anotarse en la lista de espera de un taller lleno
+class WaitlistRequest(BaseModel):
+    user_email: EmailStr
+    workshop_id: int = Field(..., gt=0)
+    prioridad: int = Field(0, ge=0, le=9)
+
+# Modelo de salida de una entrada de la lista de espera
+class WaitlistEntry(BaseModel):
+    id: int
+    user_email: str
+    workshop_id: int
+    prioridad: int
+    status: str
+    posicion: Optional[int] = None
+    booking_id: Optional[int] = None
+
+# Modelo de salida de la cola de un taller
+class WaitlistQueue(BaseModel):
+    workshop_id: int
+    total: int
+    entradas: List[WaitlistEntry]
+
+# Modelo de salida al cancelar una reserva; "promovido" es la entrada que recibió el cupo liberado
+class CancelResponse(BaseModel):
+    booking_id: int
+    workshop_id: int
+    status: str
+    promovido: Optional[WaitlistEntry] = None
+
+# Pool de conexiones del servicio (driver y tamaño configurables por variables de entorno)
+pool = create_pool("reservation-service")
+
+# Copia en memoria de las colas y suscriptores SSE
+lista = ListaEspera()
+notificador = Notificador()
+_resync_task = None
+
+# Estadísticas del pool, de la lista de espera y de las conexiones SSE incluidas en /metrics
+register_collector("db_pool", pool.stats, labels=("pool", "driver"))
+register_collector("waitlist", lista.stats, labels=("waitlist",))
+register_collector("sse", notificador.stats, labels=("notifier",))
+
+CAMPOS_ESPERA = "id, user_email, workshop_id, priority AS prioridad, status, booking_id"
+
+# Si la base de datos no responde se devuelve 503 en lugar de bloquear la petición
+@app.exception_handler(DatabaseUnavailable)
+def db_unavailable_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Base de datos no disponible"})
+
+# Recarga la copia en memoria con las entradas que siguen esperando
+async def sincronizar():
+    async with pool.acquire() as conn:
+        filas = await conn.fetch_all(
+            "SELECT id, workshop_id, user_email, priority FROM waitlist WHERE status = 'Esperando'")
+    lista.cargar(filas)
+
+async def resincronizar_periodicamente():
+    while True:
+        await asyncio.sleep(WAITLIST_RESYNC_INTERVAL)
+        try:
+            await sincronizar()
+        except Exception as exc:
+            print(f"[reservation-service] No se pudo sincronizar la lista de espera: {exc}")
+
+async def iniciar_lista_espera():
+    global _resync_task
+    await sincronizar()
+    _resync_task = asyncio.create_task(resincronizar_periodicamente())
+
+# Conexión, migraciones y carga de la lista de espera en segundo plano, con reintentos; /ready indica cuándo terminó
+arranque = ServiceStartup("reservation-service", pool, pasos=(iniciar_lista_espera,))
+register_collector("startup", arranque.stats, labels=("service",))
+
+# Evento que se ejecuta al iniciar el servidor: no espera a MySQL, el arranque sigue en segundo plano
+@app.on_event("startup")
+async def startup():
+    arranque.start()
+
+# Evento que se ejecuta al apagar el servidor: detiene la resincronización y cierra el pool
+@app.on_event("shutdown")
+async def shutdown():
+    await arranque.stop()
+    if _resync_task is not None:
+        _resync_task.cancel()
+    await pool.close()
+
 # Ruta de prueba
 @app.post("/api/v0/hello")
 async def hello_world():
     return {"message": "Hello World"}
+
+# Avisa su nueva posición a quienes siguen esperando en un taller
+def avisar_posiciones(workshop_id):
+    for posicion, entrada_id, email, _ in lista.cola(workshop_id):
+        notificador.publicar(email, "posicion", {"id": entrada_id, "workshop_id": workshop_id, "posicion": posicion})
+
+# Posición de una entrada: desde la copia en memoria o, si otro proceso la agregó, contando en MySQL
+async def posicion_de(conn, entrada):
+    posicion = lista.posicion(entrada["id"])
+    if posicion is None and entrada["status"] == "Esperando":
+        fila = await conn.fetch_one("""
+            SELECT COUNT(*) AS delante FROM waitlist
+            WHERE workshop_id = %s AND status = 'Esperando'
+              AND (priority > %s OR (priority = %s AND id < %s))
+        """, (entrada["workshop_id"], entrada["prioridad"], entrada["prioridad"], entrada["id"]))
+        posicion = fila["delante"] + 1
+    return posicion
+
+# Ruta para anotarse en la lista de espera de un taller sin cupos
+# Si el usuario ya está esperando se devuelve su entrada actual (200) en lugar de duplicarla
+@app.post("/api/reservation/espera", response_model=WaitlistEntry, status_code=201, summary="Anotarse en la lista de espera")
+async def anotarse(data: WaitlistRequest):
+    async with pool.acquire() as conn:
+        taller = await conn.fetch_one("SELECT has_seats FROM workshops WHERE id = %s", (data.workshop_id,))
+        if not taller:
+            raise HTTPException(status_code=404, detail="Taller no encontrado")
+        if taller["has_seats"]:
+            raise HTTPException(status_code=409, detail="El taller tiene cupos disponibles, reserva directamente")
+        if await conn.fetch_one(
+                "SELECT id FROM bookings WHERE user_email = %s AND workshop_id = %s AND status = 'Confirmada'",
+                (data.user_email, data.workshop_id)):
+            raise HTTPException(status_code=409, detail="Ya tienes una reserva para este taller")
+
+        nueva = True
+        try:
+            await conn.execute("INSERT INTO waitlist (workshop_id, user_email, priority) VALUES (%s, %s, %s)",
+                               (data.workshop_id, data.user_email, data.prioridad))
+            entrada_id = conn.lastrowid
+        except IntegrityViolation as exc:
+            if exc.code == ER_NO_REFERENCED_ROW:
+                raise HTTPException(status_code=404, detail="El usuario no está registrado")
+            if exc.code != ER_DUP_ENTRY:
+                raise
+            # Ya estaba esperando en este taller (índice único sobre la espera activa)
+            nueva = False
+            existente = await conn.fetch_one(
+                "SELECT id FROM waitlist WHERE espera_activa = %s AND user_email = %s",
+                (data.workshop_id, data.user_email))
+            if not existente:
+                raise HTTPException(status_code=409, detail="Tu entrada acaba de ser promovida o cancelada")
+            entrada_id = existente["id"]
+        entrada = await conn.fetch_one(f"SELECT {CAMPOS_ESPERA} FROM waitlist WHERE id = %s", (entrada_id,))
+        lista.agregar(entrada["id"], entrada["workshop_id"], entrada["user_email"], entrada["prioridad"])
+        entrada["posicion"] = await posicion_de(conn, entrada)
+
+    if not nueva:
+        return JSONResponse(status_code=200, content=entrada)
+    return entrada
+
+# Ruta para consultar una entrada de la lista de espera y su posición actual
+@app.get("/api/reservation/espera/entradas/{entrada_id}", response_model=WaitlistEntry, summary="Consultar posición en la lista de espera")
+async def consultar_entrada(entrada_id: int):
+    async with pool.acquire() as conn:
+        entrada = await conn.fetch_one(f"SELECT {CAMPOS_ESPERA} FROM waitlist WHERE id = %s", (entrada_id,))
+        if not entrada:
+            raise HTTPException(status_code=404, detail="Entrada no encontrada")
+        entrada["posicion"] = await posicion_de(conn, entrada)
+    return entrada
+
+# Ruta para salir de la lista de espera; quienes estaban detrás reciben su nueva posición
+@app.delete("/api/reservation/espera/entradas/{entrada_id}", response_model=WaitlistEntry, summary="Salir de la lista de espera")
+async def salir(entrada_id: int):
+    async with pool.acquire() as conn:
+        salio = await conn.execute(
+            "UPDATE waitlist SET status = 'Cancelado' WHERE id = %s AND status = 'Esperando'", (entrada_id,))
+        entrada = await conn.fetch_one(f"SELECT {CAMPOS_ESPERA} FROM waitlist WHERE id = %s", (entrada_id,))
+    if not entrada:
+        raise HTTPException(status_code=404, detail="Entrada no encontrada")
+    if not salio:
+        raise HTTPException(status_code=409, detail=f"La entrada ya no está esperando ({entrada['status']})")
+    if lista.quitar(entrada_id) is not None:
+        avisar_posiciones(entrada["workshop_id"])
+    return entrada
+
+# Ruta con la cola de espera de un taller, en el orden en que se asignarán los cupos
+@app.get("/api/reservation/espera/{workshop_id}", response_model=WaitlistQueue, summary="Lista de espera de un taller")
+async def cola_taller(workshop_id: int):
+    entradas = [
+        {"id": entrada_id, "user_email": email, "workshop_id": workshop_id, "prioridad": prioridad,
+         "status": "Esperando", "posicion": posicion}
+        for posicion, entrada_id, email, prioridad in lista.cola(workshop_id)
+    ]
+    return {"workshop_id": workshop_id, "total": len(entradas), "entradas": entradas}
+
+# Ruta para cancelar una reserva confirmada
+# En la misma transacción el cupo liberado pasa al siguiente de la lista de espera (mayor prioridad y
+# luego orden de llegada); si nadie espera, el cupo vuelve a quedar disponible
+@app.post("/api/reservation/reservas/{booking_id}/cancelar", response_model=CancelResponse, summary="Cancelar una reserva")
+async def cancelar_reserva(booking_id: int):
+    promovido = None
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            reserva = await conn.fetch_one(
+                "SELECT user_email, workshop_id FROM bookings WHERE id = %s", (booking_id,))
+            if not reserva:
+                raise HTTPException(status_code=404, detail="Reserva no encontrada")
+            workshop_id = reserva["workshop_id"]
+
+            # Sin contador se bloquea primero el taller, en el mismo orden que reservar_taller, para no crear deadlocks
+            liberados = 0
+            if not SEAT_COUNTER:
+                liberados = await conn.execute("""
+                    UPDATE workshops SET current_participants = current_participants - 1
+                    WHERE id = %s AND current_participants > 0
+                """, (workshop_id,))
+            if not await conn.execute(
+                    "UPDATE bookings SET status = 'Cancelada' WHERE id = %s AND status = 'Confirmada'", (booking_id,)):
+                raise HTTPException(status_code=409, detail="La reserva no está confirmada")
+            # Lectura con bloqueo: refleja un pago confirmado después de la primera consulta
+            pago = await conn.fetch_one("SELECT payment_status FROM bookings WHERE id = %s FOR UPDATE", (booking_id,))
+
+            # Siguiente en la cola; se omiten (y cierran) las entradas de quienes ya tienen una reserva vigente
+            # (confirmada por su cuenta o completada): solo una reserva cancelada se reactiva
+            while True:
+                siguiente = await conn.fetch_one(f"""
+                    SELECT {CAMPOS_ESPERA} FROM waitlist
+                    WHERE workshop_id = %s AND status = 'Esperando'
+                    ORDER BY priority DESC, id LIMIT 1 FOR UPDATE
+                """, (workshop_id,))
+                if not siguiente:
+                    break
+                existente = await conn.fetch_one(
+                    "SELECT id, status FROM bookings WHERE user_email = %s AND workshop_id = %s FOR UPDATE",
+                    (siguiente["user_email"], workshop_id))
+                if existente and existente["status"] != "Cancelada":
+                    await conn.execute("UPDATE waitlist SET status = 'Cancelado' WHERE id = %s", (siguiente["id"],))
+                    lista.quitar(siguiente["id"])
+                    continue
+
+                # Una reserva cancelada antes se reactiva (índice único por usuario y taller) como una activación
+                # nueva: los pagos de la activación anterior no cuentan para esta (migración 0008)
+                await conn.execute("""
+                    INSERT INTO bookings (user_email, workshop_id) VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE status = 'Confirmada', payment_status = 'Pendiente',
+                                            activacion = activacion + 1, id = LAST_INSERT_ID(id)
+                """, (siguiente["user_email"], workshop_id))
+                nueva_reserva = conn.lastrowid
+                if not SEAT_COUNTER:
+                    await conn.execute(
+                        "UPDATE workshops SET current_participants = current_participants + 1 WHERE id = %s",
+                        (workshop_id,))
+                await conn.execute("UPDATE waitlist SET status = 'Promovido', booking_id = %s WHERE id = %s",
+                                   (nueva_reserva, siguiente["id"]))
+                promovido = {**siguiente, "status": "Promovido", "booking_id": nueva_reserva}
+                break
+
+            # Resumen de ocupación: el cupo liberado (y el del promovido) y, si estaba pagada, su ingreso
+            # Con el contador, las reservadas se ajustan cuando el contador escribe current_participants
+            reservadas = 0 if SEAT_COUNTER else (promovido is not None) - liberados
+            await registrar(conn, {workshop_id: (0, reservadas, -(pago["payment_status"] == "Pagado"))})
+
+            # Eventos para los catálogos y el contador de cupos de los demás servicios
+            # cupo_liberado: el cupo no pasó a nadie de la lista de espera y el contador debe devolverlo
+            eventos = [(RESERVA_CANCELADA, workshop_id, {"booking_id": booking_id, "user_email": reserva["user_email"],
+                                                         "cupo_liberado": promovido is None})]
+            if promovido is not None:
+                eventos.append((RESERVA_CREADA, workshop_id, {"booking_id": promovido["booking_id"],
+                                                              "user_email": promovido["user_email"],
+                                                              "waitlist_id": promovido["id"]}))
+            await publicar(conn, eventos)
+
+    # Las notificaciones salen después del commit: nadie recibe un cupo que luego se deshizo
+    if promovido is not None:
+        lista.quitar(promovido["id"])
+        notificador.publicar(promovido["user_email"], "promovido",
+                             {"id": promovido["id"], "workshop_id": workshop_id, "booking_id": promovido["booking_id"]})
+        avisar_posiciones(workshop_id)
+    return {"booking_id": booking_id, "workshop_id": workshop_id, "status": "Cancelada", "promovido": promovido}
+
+# Ruta de notificaciones en vivo (Server-Sent Events) para un usuario
+# Eventos: "promovido" cuando recibe un cupo y "posicion" cuando avanza en una cola
+@app.get("/api/reservation/eventos", summary="Notificaciones de la lista de espera (SSE)")
+async def eventos(request: Request, email: EmailStr):
+    cola = notificador.suscribir(email)
+
+    async def emitir():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(cola.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            notificador.desuscribir(email, cola)
+
+    return StreamingResponse(emitir(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Ruta para verificar que el servicio está activo
+@app.get("/api/reservation/health")
+async def health():
+    return {"status": "reservation-service ok"}
+
+# Ruta de readiness: 200 solo con el esquema al día, la lista de espera cargada y la base respondiendo
+@app.get("/api/reservation/ready")
+async def ready():
+    listo, estado = await arranque.ready()
+    return JSONResponse(status_code=200 if listo else 503, content=estado)
+
+# Ruta con las estadísticas del pool de conexiones (en uso, en espera, latencia de préstamo)
+@app.get("/api/reservation/pool")
+async def pool_stats():
+    return pool.stats()
+
+# Ruta con el estado de la lista de espera en memoria y de las conexiones SSE
+@app.get("/api/reservation/espera")
+async def waitlist_stats():
+    return {**lista.stats(), **notificador.stats()}
+
+# Ruta con las métricas del servicio en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
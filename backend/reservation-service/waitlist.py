@@ -0,0 +1,98 @@
+# Copia en memoria de la lista de espera y notificaciones en vivo (Server-Sent Events)
+# MySQL es la fuente de verdad (la promoción se decide dentro de una transacción); la copia en memoria
+# responde posiciones y colas sin consultar la base y sabe a quién avisar cuando una cola avanza
+import asyncio                                                     # Colas de eventos por suscriptor
+import bisect                                                      # Inserción ordenada en la cola
+import json                                                        # Contenido de cada evento
+
+
+# Colas por taller ordenadas por (prioridad descendente, id); cada entrada es (-prioridad, id, correo)
+class ListaEspera:
+    def __init__(self):
+        self._colas = {}                    # Taller -> lista ordenada de entradas
+        self._entradas = {}                 # Id de la entrada -> (taller, clave de orden)
+
+    # Reemplaza la copia completa con las filas "Esperando" de la base
+    def cargar(self, filas):
+        self._colas = {}
+        self._entradas = {}
+        for fila in filas:
+            self.agregar(fila["id"], fila["workshop_id"], fila["user_email"], fila["priority"])
+
+    def agregar(self, entrada_id, workshop_id, email, prioridad):
+        if entrada_id in self._entradas:
+            return
+        clave = (-prioridad, entrada_id, email)
+        bisect.insort(self._colas.setdefault(workshop_id, []), clave)
+        self._entradas[entrada_id] = (workshop_id, clave)
+
+    # Quita una entrada (promovida o cancelada); devuelve su taller o None si no estaba
+    def quitar(self, entrada_id):
+        workshop_id, clave = self._entradas.pop(entrada_id, (None, None))
+        if workshop_id is None:
+            return None
+        cola = self._colas[workshop_id]
+        del cola[bisect.bisect_left(cola, clave)]
+        if not cola:
+            del self._colas[workshop_id]
+        return workshop_id
+
+    # Posición (desde 1) de una entrada en la cola de su taller, o None si ya no espera
+    def posicion(self, entrada_id):
+        workshop_id, clave = self._entradas.get(entrada_id, (None, None))
+        if workshop_id is None:
+            return None
+        return bisect.bisect_left(self._colas[workshop_id], clave) + 1
+
+    # Cola de un taller en orden: (posición, id de la entrada, correo, prioridad)
+    def cola(self, workshop_id):
+        return [(posicion, entrada_id, email, -prioridad)
+                for posicion, (prioridad, entrada_id, email) in enumerate(self._colas.get(workshop_id, []), 1)]
+
+    def stats(self):
+        return {
+            "waitlist": "memoria",
+            "workshops": len(self._colas),
+            "entries": len(self._entradas),
+            "longest_queue": max((len(cola) for cola in self._colas.values()), default=0),
+        }
+
+
+# Reparte eventos a los clientes conectados por SSE, identificados por su correo
+# Cada conexión tiene una cola acotada: si el cliente no lee, se descartan sus eventos más viejos
+class Notificador:
+    def __init__(self, max_eventos=100):
+        self.max_eventos = max_eventos
+        self._suscriptores = {}             # Correo -> conjunto de colas (una por conexión)
+        self.enviados = 0
+        self.descartados = 0
+
+    def suscribir(self, email):
+        cola = asyncio.Queue(maxsize=self.max_eventos)
+        self._suscriptores.setdefault(email, set()).add(cola)
+        return cola
+
+    def desuscribir(self, email, cola):
+        colas = self._suscriptores.get(email)
+        if colas is not None:
+            colas.discard(cola)
+            if not colas:
+                del self._suscriptores[email]
+
+    def publicar(self, email, evento, datos):
+        mensaje = f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+        for cola in self._suscriptores.get(email, ()):
+            if cola.full():
+                cola.get_nowait()
+                self.descartados += 1
+            cola.put_nowait(mensaje)
+            self.enviados += 1
+
+    def stats(self):
+        return {
+            "notifier": "sse",
+            "subscribers": sum(len(colas) for colas in self._suscriptores.values()),
+            "users": len(self._suscriptores),
+            "sent": self.enviados,
+            "dropped": self.descartados,
+        }
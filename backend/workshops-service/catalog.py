@@ -0,0 +1,120 @@
+# Instantánea en memoria del catálogo de talleres, ya serializada y con ETag fuerte
+# Se mantiene al día con los eventos de la outbox: solo se releen los talleres que cambiaron, juntando los
+# eventos de CATALOG_PATCH_INTERVAL segundos en una sola relectura y una sola serialización
+import asyncio                                                     # Lock de recarga
+import hashlib                                                     # Cálculo del ETag a partir del contenido
+import json                                                        # Serialización única por recarga
+import os                                                          # Configuración desde variables de entorno
+import time                                                        # Antigüedad de la instantánea
+from fastapi.encoders import jsonable_encoder                      # Conversión de modelos a tipos JSON
+from common.fastjson import FAST_JSON, dumps                       # Modo rápido: filas del cursor sin revalidar
+
+CATALOG_MAX_AGE = float(os.getenv("CATALOG_MAX_AGE", "300"))             # Recarga completa de respaldo
+CATALOG_PATCH_INTERVAL = float(os.getenv("CATALOG_PATCH_INTERVAL", "0.5"))  # Segundos que se juntan cambios
+
+
+class CatalogSnapshot:
+    def __init__(self, name, sql, sql_por_id, model, orden):
+        self.name = name
+        self.sql = sql                  # Consulta que produce las filas del catálogo
+        self.sql_por_id = sql_por_id    # Misma consulta para algunos ids ("{ids}"); los que no vuelven salen del catálogo
+        self.model = model              # Modelo Pydantic con el que se validan las filas una sola vez (sin FAST_JSON)
+        self.orden = orden              # Columnas por las que se ordena el catálogo
+        self.body = None                # Respuesta JSON ya serializada (bytes)
+        self._items = {}                # Id -> (clave de orden, fila validada)
+        self.etag = None
+        self.count = 0
+        self._loaded_at = 0.0
+        self._obsoleta = True           # Sin cargar todavía o marcada para recargar completa
+        self._lock = asyncio.Lock()
+        self._pendientes = set()        # Ids con cambios que todavía no se releyeron
+        self._parche = None             # Tarea que relee los pendientes al cumplirse el intervalo
+        self.refreshes = 0
+        self.patches = 0
+        self.patched_ids = 0
+
+    # No depende solo de la edad: el reloj monotónico puede valer menos que CATALOG_MAX_AGE (contenedor recién
+    # arrancado) y una instantánea nunca cargada parecería vigente
+    def _is_fresh(self):
+        return not self._obsoleta and time.monotonic() - self._loaded_at < CATALOG_MAX_AGE
+
+    # En modo rápido la fila del cursor se guarda tal cual; el codificador se encarga de DECIMAL y fechas
+    def _item(self, row):
+        return tuple(row[columna] for columna in self.orden), row if FAST_JSON else jsonable_encoder(self.model(**row))
+
+    # Serializa las filas en orden y calcula el ETag
+    def _serialize(self):
+        data = [item for _, item in sorted(self._items.values(), key=lambda par: par[0])]
+        body = dumps(data) if FAST_JSON else json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.body = body
+        self.count = len(data)
+
+    # Consulta, valida y serializa el catálogo completo
+    async def _load(self, pool):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch_all(self.sql)
+        self._items = {row["id"]: self._item(row) for row in rows}
+        self._serialize()
+        self._loaded_at = time.monotonic()
+        self._obsoleta = False
+        self.refreshes += 1
+
+    # Anota los talleres que cambiaron; se releen juntos al cumplirse CATALOG_PATCH_INTERVAL. Serializar el
+    # catálogo completo por cada lote de eventos costaría O(catálogo) por reserva con mucha escritura; así se
+    # serializa a lo sumo una vez por intervalo, a cambio de mostrar hasta ese atraso
+    async def aplicar(self, pool, ids):
+        self._pendientes.update(ids)
+        if self._parche is None:
+            self._parche = asyncio.create_task(self._parchear(pool))
+
+    # Relee solo los talleres pendientes sin volver a consultar el catálogo completo
+    # Releer es idempotente: un evento entregado dos veces deja el mismo resultado
+    async def _parchear(self, pool):
+        await asyncio.sleep(CATALOG_PATCH_INTERVAL)
+        async with self._lock:
+            ids, self._pendientes, self._parche = sorted(self._pendientes), set(), None
+            if not self._is_fresh():
+                return                  # La próxima petición carga todo
+            try:
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch_all(self.sql_por_id.format(ids=", ".join(["%s"] * len(ids))), ids)
+            except Exception as exc:
+                # El evento ya se dio por entregado: se fuerza la recarga completa en la próxima petición
+                print(f"[{self.name}] No se pudieron releer {len(ids)} talleres: {exc}")
+                self._obsoleta = True
+                return
+            for workshop_id in ids:
+                self._items.pop(workshop_id, None)
+            self._items.update((row["id"], self._item(row)) for row in rows)
+            self._serialize()
+            self.patches += 1
+            self.patched_ids += len(ids)
+
+    async def stop(self):
+        if self._parche is not None:
+            self._parche.cancel()
+            await asyncio.gather(self._parche, return_exceptions=True)
+            self._parche = None
+
+    # Devuelve la instantánea vigente; solo una petición recarga a la vez
+    async def get(self, pool):
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    await self._load(pool)
+        return self.body, self.etag
+
+    def stats(self):
+        return {
+            "catalog": self.name,
+            "fresh": self._is_fresh(),
+            "items": self.count,
+            "bytes": len(self.body) if self.body is not None else 0,
+            "etag": self.etag,
+            "age_s": round(time.monotonic() - self._loaded_at, 3) if self.body is not None else None,
+            "refreshes": self.refreshes,
+            "patches": self.patches,
+            "patched_ids": self.patched_ids,
+            "pending_ids": len(self._pendientes),
+        }
@@ -0,0 +1,108 @@
+# Lectura en streaming de archivos de importación de talleres (CSV o NDJSON)
+# El cuerpo se procesa por fragmentos: la memoria usada no depende del tamaño del archivo
+import codecs                                                      # Decodificación UTF-8 incremental
+import csv                                                         # Interpretación de cada registro CSV
+import json                                                        # Interpretación de cada línea NDJSON
+
+MAX_LARGO_REGISTRO = 1024 * 1024      # Un registro más largo que esto se considera un archivo inválido
+MAX_ERRORES_REPORTE = 1000            # Errores detallados en el reporte; el resto solo se cuenta
+
+
+# Error lanzado cuando el archivo no se puede seguir leyendo (por ejemplo, un registro demasiado largo)
+class ImportacionInvalida(Exception):
+    pass
+
+
+# Separa el flujo de bytes en líneas de texto completas
+async def _lineas(stream):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pendiente = ""
+    async for fragmento in stream:
+        pendiente += decoder.decode(fragmento)
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea.rstrip("\r")
+        if len(pendiente) > MAX_LARGO_REGISTRO:
+            raise ImportacionInvalida("Registro demasiado largo.")
+    pendiente += decoder.decode(b"", final=True)
+    if pendiente:
+        yield pendiente.rstrip("\r")
+
+
+# Registros CSV: la primera línea es el encabezado; un campo entre comillas puede ocupar varias líneas
+async def _registros_csv(stream):
+    encabezado = None
+    registro, inicio, numero = [], 0, 0
+    async for linea in _lineas(stream):
+        numero += 1
+        if not registro:
+            inicio = numero
+        registro.append(linea)
+        texto = "\n".join(registro)
+        if texto.count('"') % 2:                  # Comillas sin cerrar: el registro sigue en la próxima línea
+            if len(texto) > MAX_LARGO_REGISTRO:
+                raise ImportacionInvalida("Registro demasiado largo.")
+            continue
+        registro = []
+        if not texto.strip():
+            continue
+        valores = next(csv.reader([texto]))
+        if encabezado is None:
+            encabezado = [columna.strip() for columna in valores]
+        elif len(valores) != len(encabezado):
+            yield inicio, f"Se esperaban {len(encabezado)} columnas y hay {len(valores)}"
+        else:
+            yield inicio, dict(zip(encabezado, valores))
+    if registro:
+        yield inicio, "Comillas sin cerrar al final del archivo"
+
+
+# Registros NDJSON: un objeto JSON por línea
+async def _registros_ndjson(stream):
+    numero = 0
+    async for linea in _lineas(stream):
+        numero += 1
+        if not linea.strip():
+            continue
+        try:
+            valor = json.loads(linea)
+        except ValueError:
+            yield numero, "JSON inválido"
+            continue
+        yield numero, valor if isinstance(valor, dict) else "Se esperaba un objeto JSON"
+
+
+# Genera (número de línea, registro) donde registro es un dict o un mensaje de error
+def leer_registros(stream, formato):
+    return _registros_csv(stream) if formato == "csv" else _registros_ndjson(stream)
+
+
+# Reporte de la importación con errores por fila (acotados a MAX_ERRORES_REPORTE)
+class ReporteImportacion:
+    def __init__(self):
+        self.procesadas = 0
+        self.insertadas = 0
+        self.duplicadas = 0
+        self.invalidas = 0
+        self.errores = []
+        self.errores_omitidos = 0
+
+    def error(self, fila, mensaje, duplicada=False):
+        if duplicada:
+            self.duplicadas += 1
+        else:
+            self.invalidas += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append({"fila": fila, "error": mensaje})
+        else:
+            self.errores_omitidos += 1
+
+    def resumen(self):
+        return {
+            "procesadas": self.procesadas,
+            "insertadas": self.insertadas,
+            "duplicadas": self.duplicadas,
+            "invalidas": self.invalidas,
+            "errores": self.errores,
+            "errores_omitidos": self.errores_omitidos,
+        }
@@ -1,11 +1,23 @@
 # Importación de librerías necesarias
-from fastapi import FastAPI, HTTPException, Query                      # FastAPI para crear rutas y manejar errores
+from fastapi import FastAPI, HTTPException, Query, Request             # FastAPI para crear rutas y manejar errores
 from fastapi.middleware.cors import CORSMiddleware                    # Permite acceso desde el frontend
-from pydantic import BaseModel, Field, validator                      # Validación de datos con Pydantic
-from typing import Optional, List                                     # Tipos de datos para parámetros opcionales y listas
-import mysql.connector                                                # Conexión a base de datos MySQL
-import time                                                           # Esperas entre intentos de conexión
+from fastapi.responses import JSONResponse, Response                  # Respuestas JSON personalizadas
+from pydantic import BaseModel, Field, ValidationError, validator     # Validación de datos con Pydantic
+from typing import Optional, List, Literal                            # Tipos de datos para parámetros opcionales y listas
 from datetime import date, datetime                                   # Manejo de fechas
+from common.db import DatabaseUnavailable, IntegrityViolation, ER_DUP_ENTRY   # Errores de base de datos
+from common.async_db import create_pool                               # Pool asíncrono compartido de conexiones MySQL
+from common.startup import ServiceStartup                             # Arranque en segundo plano y /ready
+from common.metrics import (CONTENT_TYPE, MetricsMiddleware,          # Métricas Prometheus
+                            register_collector, render_metrics)
+from common.outbox import (CUPOS_ACTUALIZADOS, RESERVA_CANCELADA,  # Eventos entre servicios
+                           RESERVA_CREADA, TALLER_CREADO, OutboxRelay, publicar)
+from common.analytics import registrar                                # Resumen de ocupación por (categoría, fecha)
+from common.pagination import InvalidCursor, decode_cursor, keyset_condition, split_page   # Paginación keyset
+from common.fastjson import FAST_JSON, FastJSONResponse, respuesta_lista, respuesta_parcial   # Respuestas JSON sin revalidar filas
+from catalog import CatalogSnapshot                                   # Catálogo en memoria con ETag
+from search import COINCIDENCIA, consulta_fulltext, normalizar        # Búsqueda de texto completo
+from importer import ImportacionInvalida, ReporteImportacion, leer_registros   # Importación masiva en streaming
 
 # Instancia principal de la aplicación
 app = FastAPI(title="Workshops Service", version="1.2")
@@ -17,8 +29,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Middleware de métricas: latencia por ruta y peticiones en curso (se exponen en /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Modelo de entrada para crear un nuevo taller
 class WorkshopCreate(BaseModel):
     title: str = Field(..., min_length=4, max_length=100)
@@ -46,134 +62,347 @@ class Workshop(BaseModel):
     current_participants: int
     price: float
 
-# Función para obtener una conexión a la base de datos con reintento automático
-def get_connection():
-    for attempt in range(20):
-        try:
-            return mysql.connector.connect(
-                host="db",
-                user="root",
-                password="12345",
-                database="users_db"
-            )
-        except mysql.connector.Error:
-            print(f"[workshops-service] Intento {attempt+1} fallido, esperando...")
-            time.sleep(3)
-    raise Exception("No se pudo conectar a la base de datos.")
-
-# Evento que se ejecuta al iniciar el microservicio
-# Crea la tabla de talleres si no existe
+# Pool de conexiones del servicio (driver y tamaño configurables por variables de entorno)
+pool = create_pool("workshops-service")
+
+# Columnas que se pueden pedir con fields= y columnas que forman el cursor de paginación
+CAMPOS_TALLER = ("id", "title", "description", "category", "date", "max_participants", "current_participants", "price")
+COLUMNAS_CURSOR = ("date", "id")
+LIMITE_POR_DEFECTO = 50
+
+# Talleres con cupo: has_seats es una columna generada e indexada junto con la fecha (migración 0002)
+CON_CUPO = "has_seats = 1"
+
+# Instantánea del catálogo: talleres con cupo disponible, ordenados por fecha
+catalogo = CatalogSnapshot("workshops-service", f"""
+    SELECT {', '.join(CAMPOS_TALLER)} FROM workshops
+    WHERE {CON_CUPO}
+    ORDER BY date ASC, id ASC
+""", f"SELECT {', '.join(CAMPOS_TALLER)} FROM workshops WHERE {CON_CUPO} AND id IN ({{ids}})",
+    Workshop, COLUMNAS_CURSOR)
+
+# Eventos de otros servicios (y propios) que cambian talleres o sus cupos: se releen solo esos talleres
+relay = OutboxRelay("workshops-service")
+
+async def actualizar_catalogo(eventos):
+    await catalogo.aplicar(pool, [evento["workshop_id"] for evento in eventos])
+
+relay.suscribir((TALLER_CREADO, RESERVA_CREADA, RESERVA_CANCELADA, CUPOS_ACTUALIZADOS), actualizar_catalogo)
+
+# Estadísticas del pool, del catálogo y del relé de eventos incluidas en /metrics
+register_collector("db_pool", pool.stats, labels=("pool", "driver"))
+register_collector("catalog", catalogo.stats, labels=("catalog",))
+register_collector("outbox_relay", relay.stats, labels=("relay",))
+
+async def iniciar_eventos():
+    await relay.start(pool)
+
+# Conexión, migraciones y relé de eventos en segundo plano, con reintentos; /ready indica cuándo terminó
+arranque = ServiceStartup("workshops-service", pool, pasos=(iniciar_eventos,))
+register_collector("startup", arranque.stats, labels=("service",))
+
+# Si la base de datos no responde se devuelve 503 en lugar de bloquear la petición
+@app.exception_handler(DatabaseUnavailable)
+def db_unavailable_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Base de datos no disponible"})
+
+# Evento que se ejecuta al iniciar el microservicio: no espera a MySQL; el pool, las migraciones y el relé
+# de eventos de la outbox arrancan en segundo plano
 @app.on_event("startup")
-def create_table():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS workshops (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            title VARCHAR(100),
-            description TEXT,
-            category VARCHAR(50),
-            date DATE,
-            max_participants INT,
-            current_participants INT DEFAULT 0,
-            price DECIMAL(10,2) NOT NULL DEFAULT 0.00
-        )
-    """)
-    conn.commit()
-    cursor.close()
-    conn.close()
+async def startup():
+    arranque.start()
+
+# Evento que se ejecuta al apagar el servidor: detiene el relé y cierra las conexiones del pool
+@app.on_event("shutdown")
+async def close_pool():
+    await arranque.stop()
+    await relay.stop()
+    await catalogo.stop()
+    await pool.close()
 
 # Ruta para registrar un nuevo taller
+# Los títulos repetidos los detecta el índice UNIQUE de la columna title
+# El evento taller_creado se guarda en la misma transacción; el relé lo agrega al catálogo en memoria
 @app.post("/api/workshops", summary="Registrar un nuevo taller", response_model=Workshop)
-def crear_taller(data: WorkshopCreate):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Verificar que no exista un taller con el mismo título
-    cursor.execute("SELECT * FROM workshops WHERE title = %s", (data.title,))
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=409, detail="Ya existe un taller con este título")
-
-    # Insertar nuevo taller en la base de datos
-    cursor.execute("""
-        INSERT INTO workshops (title, description, category, date, max_participants, price)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (data.title, data.description, data.category, data.date, data.max_participants, data.price))
-    conn.commit()
-
-    # Obtener el taller recién creado
-    cursor.execute("SELECT * FROM workshops WHERE title = %s", (data.title,))
-    taller = cursor.fetchone()
-    cursor.close()
-    conn.close()
-
+async def crear_taller(data: WorkshopCreate):
+    async with pool.acquire() as conn:
+        try:
+            async with conn.transaction():
+                await conn.execute("""
+                    INSERT INTO workshops (title, description, category, date, max_participants, price)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (data.title, data.description, data.category, data.date, data.max_participants, data.price))
+                taller = {"id": conn.lastrowid, **data.dict(), "current_participants": 0}
+                await registrar(conn, {taller["id"]: (1, 0, 0)})
+                await publicar(conn, [(TALLER_CREADO, taller["id"], taller)])
+        except IntegrityViolation as exc:
+            if exc.code == ER_DUP_ENTRY:
+                raise HTTPException(status_code=409, detail="Ya existe un taller con este título")
+            raise
     return taller
 
+# Filas validadas que se insertan por cada sentencia durante la importación masiva
+FILAS_POR_LOTE_IMPORTACION = 500
+
+# Describe el primer error de validación de una fila ("campo: mensaje")
+def describir_error(exc):
+    error = exc.errors()[0]
+    campo = ".".join(str(parte) for parte in error["loc"])
+    return f"{campo}: {error['msg']}" if campo else error["msg"]
+
+# Inserta los talleres de uno en uno y devuelve los que entraron; los títulos repetidos se informan en el reporte
+async def insertar_por_fila(conn, talleres, unicos, reporte):
+    insertados = []
+    for taller in talleres:
+        try:
+            await conn.execute(
+                "INSERT INTO workshops (title, description, category, date, max_participants, price) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (taller.title, taller.description, taller.category, taller.date, taller.max_participants, taller.price))
+            insertados.append(taller)
+        except IntegrityViolation as exc:
+            if exc.code != ER_DUP_ENTRY:
+                raise
+            reporte.error(unicos[normalizar(taller.title)][0], "Ya existe un taller con este título", duplicada=True)
+    return insertados
+
+# Inserta un lote de talleres validados descartando títulos repetidos en el lote o ya existentes
+# La conexión se toma solo durante el lote, no mientras el cliente sigue enviando el archivo
+async def insertar_lote(lote, reporte):
+    unicos = {}
+    for fila, taller in lote:
+        clave = normalizar(taller.title)
+        if clave in unicos:
+            reporte.error(fila, "Título repetido en el archivo", duplicada=True)
+        else:
+            unicos[clave] = (fila, taller)
+
+    async with pool.acquire() as conn:
+        existentes = {normalizar(registro["title"]) for registro in await conn.fetch_all(
+            f"SELECT title FROM workshops WHERE title IN ({', '.join(['%s'] * len(unicos))})",
+            [taller.title for _, taller in unicos.values()])}
+        nuevos = []
+        for clave, (fila, taller) in unicos.items():
+            if clave in existentes:
+                reporte.error(fila, "Ya existe un taller con este título", duplicada=True)
+            else:
+                nuevos.append(taller)
+
+        if nuevos:
+            # Los ids se leen de vuelta por título para publicar un evento taller_creado por taller
+            async with conn.transaction():
+                try:
+                    await conn.execute(
+                        "INSERT INTO workshops (title, description, category, date, max_participants, price) VALUES "
+                        + ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(nuevos)),
+                        [valor for t in nuevos
+                         for valor in (t.title, t.description, t.category, t.date, t.max_participants, t.price)])
+                except IntegrityViolation as exc:
+                    # Otra importación o POST creó uno de los títulos después de la consulta anterior: solo se
+                    # deshizo este INSERT, así que se repite fila por fila descartando los títulos repetidos
+                    if exc.code != ER_DUP_ENTRY:
+                        raise
+                    nuevos = await insertar_por_fila(conn, nuevos, unicos, reporte)
+                if not nuevos:
+                    return
+                ids = {registro["title"]: registro["id"] for registro in await conn.fetch_all(
+                    f"SELECT id, title FROM workshops WHERE title IN ({', '.join(['%s'] * len(nuevos))})",
+                    [t.title for t in nuevos])}
+                await registrar(conn, {workshop_id: (1, 0, 0) for workshop_id in ids.values()})
+                await publicar(conn, [(TALLER_CREADO, ids[t.title], {"id": ids[t.title], **t.dict()})
+                                      for t in nuevos])
+            reporte.insertadas += len(nuevos)
+
+# Ruta para importar muchos talleres desde un archivo CSV (con encabezado) o NDJSON
+# El cuerpo se lee en streaming: cada fila se valida con WorkshopCreate y se inserta por lotes
+@app.post("/api/workshops/importar", summary="Importar talleres en lote desde CSV o NDJSON")
+async def importar_talleres(
+    request: Request,
+    formato: Optional[Literal["csv", "ndjson"]] = Query(None, description="Por defecto se deduce del Content-Type"),
+):
+    formato = formato or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    reporte = ReporteImportacion()
+    lote = []
+
+    try:
+        async for fila, registro in leer_registros(request.stream(), formato):
+            reporte.procesadas += 1
+            if isinstance(registro, str):
+                reporte.error(fila, registro)
+                continue
+            try:
+                lote.append((fila, WorkshopCreate(**registro)))
+            except ValidationError as exc:
+                reporte.error(fila, describir_error(exc))
+                continue
+            if len(lote) >= FILAS_POR_LOTE_IMPORTACION:
+                await insertar_lote(lote, reporte)
+                lote = []
+        if lote:
+            await insertar_lote(lote, reporte)
+    except ImportacionInvalida as exc:
+        raise HTTPException(status_code=400, detail={"error": str(exc), **reporte.resumen()})
+
+    return reporte.resumen()
+
+# Valida el parámetro fields= (lista separada por comas) contra las columnas del taller
+def parsear_campos(fields):
+    if fields is None:
+        return None
+    campos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+    invalidos = [campo for campo in campos if campo not in CAMPOS_TALLER]
+    if not campos or invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(invalidos) or fields}")
+    return campos
+
+# Consulta talleres continuando después del cursor y con las columnas pedidas
+# El orden es (date, id); con "busqueda" (consulta FULLTEXT) primero va la relevancia, de mayor a menor
+# Se leen limit + 1 filas para saber si existe una página siguiente
+async def consultar_talleres(condiciones, params, limit=None, cursor=None, campos=None, busqueda=None):
+    columnas = list(dict.fromkeys([*(campos or CAMPOS_TALLER), *COLUMNAS_CURSOR]))
+    params = list(params)
+    orden, conversiones, descendentes = COLUMNAS_CURSOR, (date.fromisoformat, int), ()
+
+    if busqueda:
+        # La relevancia se calcula en una subconsulta para ordenar y paginar por su alias
+        sql = (f"SELECT * FROM (SELECT {', '.join(columnas)}, {COINCIDENCIA} AS relevancia FROM workshops "
+               f"WHERE {' AND '.join(condiciones)} AND {COINCIDENCIA}) AS resultados WHERE TRUE")
+        params = [busqueda, *params, busqueda]
+        orden, conversiones, descendentes = ("relevancia", *COLUMNAS_CURSOR), (float, *conversiones), ("relevancia",)
+    else:
+        sql = f"SELECT {', '.join(columnas)} FROM workshops WHERE {' AND '.join(condiciones)}"
+
+    if cursor:
+        try:
+            valores = decode_cursor(cursor, conversiones)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        condicion, condicion_params = keyset_condition(orden, valores, descendentes)
+        sql += " AND " + condicion
+        params.extend(condicion_params)
+
+    sql += " ORDER BY " + ", ".join(f"{columna} {'DESC' if columna in descendentes else 'ASC'}" for columna in orden)
+    if limit:
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+
+    async with pool.acquire() as conn:
+        filas = await conn.fetch_all(sql, params)
+
+    pagina, siguiente = split_page(filas, limit, orden) if limit else (filas, None)
+    if campos or busqueda:
+        pagina = [{campo: fila[campo] for campo in campos or CAMPOS_TALLER} for fila in pagina]
+    return pagina, siguiente
+
+# Respuesta de una página: la lista de talleres y el cursor siguiente en el encabezado X-Next-Cursor
+# Las páginas completas se validan con el response_model (salvo FAST_JSON); con fields= las filas solo traen
+# las columnas pedidas y no pasarían la validación contra Workshop, así que se envían sin validar
+def respuesta_pagina(pagina, siguiente, response, campos):
+    headers = {"X-Next-Cursor": siguiente} if siguiente else None
+    if campos:
+        return respuesta_parcial(pagina, headers)
+    return respuesta_lista(pagina, response, headers)
+
+# Indica si el encabezado If-None-Match del cliente incluye el ETag vigente
+def etag_coincide(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip().removeprefix("W/") for valor in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
 # Ruta para listar todos los talleres con cupo disponible
+# Sin paginación se sirve desde la instantánea en memoria; con If-None-Match vigente responde 304 sin cuerpo
 @app.get("/api/workshops", response_model=List[Workshop], summary="Listar todos los talleres disponibles")
-def listar_talleres():
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Seleccionar talleres que aún tengan cupos disponibles, ordenados por fecha
-    cursor.execute("""
-        SELECT * FROM workshops
-        WHERE current_participants < max_participants
-        ORDER BY date ASC
-    """)
-    talleres = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    if not talleres:
+async def listar_talleres(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Talleres por página"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    fields: Optional[str] = Query(None, description="Columnas a devolver, separadas por comas"),
+):
+    # Con paginación o proyección se consulta solo la página pedida
+    if limit or cursor or fields:
+        campos = parsear_campos(fields)
+        pagina, siguiente = await consultar_talleres([CON_CUPO], [], limit or LIMITE_POR_DEFECTO, cursor, campos)
+        if not pagina and not cursor:
+            raise HTTPException(status_code=404, detail="No hay talleres disponibles")
+        return respuesta_pagina(pagina, siguiente, response, campos)
+
+    body, etag = await catalogo.get(pool)
+    if not catalogo.count:
         raise HTTPException(status_code=404, detail="No hay talleres disponibles")
 
-    return talleres
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # Ruta para buscar talleres por categoría y/o palabra clave
 @app.get("/api/workshops/buscar", response_model=List[Workshop], summary="Buscar talleres por categoría o palabra clave")
-def buscar_talleres(
+async def buscar_talleres(
+    response: Response,
     categoria: Optional[str] = Query(None),    # Filtro por categoría
-    palabra: Optional[str] = Query(None)       # Filtro por palabra clave en título o descripción (opcional)
+    palabra: Optional[str] = Query(None),      # Filtro por palabra clave en título o descripción (opcional)
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Talleres por página"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    fields: Optional[str] = Query(None, description="Columnas a devolver, separadas por comas"),
 ):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Construir la consulta SQL base
-    sql = """
-        SELECT * FROM workshops
-        WHERE current_participants < max_participants
-    """
+    # Condición base: talleres con cupo disponible
+    condiciones = [CON_CUPO]
     params = []
 
     # Agregar filtro por categoría si se proporciona
     if categoria:
-        sql += " AND category = %s"
+        condiciones.append("category = %s")
         params.append(categoria)
 
-    # Agregar filtro por palabra clave si se proporciona
-    if palabra:
-        sql += " AND (title LIKE %s OR description LIKE %s)"
+    # Agregar filtro por palabra clave si se proporciona: se usa el índice FULLTEXT y se ordena por relevancia
+    busqueda = consulta_fulltext(palabra) if palabra else None
+    if palabra and not busqueda:
+        # Solo palabras más cortas que las indexadas: se mantiene la búsqueda por coincidencia parcial
+        condiciones.append("(title LIKE %s OR description LIKE %s)")
         palabra_busqueda = f"%{palabra}%"
         params.extend([palabra_busqueda, palabra_busqueda])
 
-    # Ordenar resultados por fecha
-    sql += " ORDER BY date ASC"
+    # Ejecutar consulta (paginada si se pide) y devolver resultados
+    paginado = bool(limit or cursor or fields)
+    campos = parsear_campos(fields)
+    resultados, siguiente = await consultar_talleres(
+        condiciones, params, (limit or LIMITE_POR_DEFECTO) if paginado else None, cursor, campos, busqueda)
 
-    # Ejecutar consulta y devolver resultados
-    cursor.execute(sql, params)
-    resultados = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    if not resultados:
+    if not resultados and not cursor:
         raise HTTPException(status_code=404, detail="No se encontraron talleres con los filtros especificados")
 
+    if paginado:
+        return respuesta_pagina(resultados, siguiente, response, campos)
+    # En modo rápido las filas se serializan sin validarlas contra Workshop (el esquema OpenAPI no cambia)
+    if FAST_JSON:
+        return FastJSONResponse(content=resultados)
     return resultados
 
 # Ruta para comprobar si el microservicio está activo
 @app.get("/api/workshops/health", summary="Verifica si el microservicio está activo")
-def health():
+async def health():
     return {"status": "workshops-service ok"}
+
+# Ruta de readiness: 200 solo con el esquema al día, el relé en marcha y la base respondiendo
+@app.get("/api/workshops/ready", summary="Verifica si el microservicio puede atender peticiones")
+async def ready():
+    listo, estado = await arranque.ready()
+    return JSONResponse(status_code=200 if listo else 503, content=estado)
+
+# Ruta con las estadísticas del pool de conexiones (en uso, en espera, latencia de préstamo)
+@app.get("/api/workshops/pool", summary="Estadísticas del pool de conexiones")
+async def pool_stats():
+    return pool.stats()
+
+# Ruta con el estado de la instantánea del catálogo
+@app.get("/api/workshops/catalogo/estado", summary="Estado del catálogo en memoria")
+async def catalog_stats():
+    return {**catalogo.stats(), **relay.stats()}
+
+# Ruta con las métricas del servicio en formato Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,34 @@
+# Preparación de la búsqueda de texto completo (índice FULLTEXT de MySQL sobre title y description)
+import re                                                          # Separación de la consulta en palabras
+import unicodedata                                                 # Eliminación de tildes
+
+# Expresión de relevancia; la columna usa una intercalación "_ai_ci" (sin distinguir tildes ni mayúsculas)
+COINCIDENCIA = "MATCH(title, description) AGAINST (%s IN BOOLEAN MODE)"
+
+# Largo mínimo de palabra que indexa InnoDB (innodb_ft_min_token_size)
+LARGO_MINIMO = 3
+
+# Palabras vacías del español que no aportan a la búsqueda
+PALABRAS_VACIAS = {
+    "ante", "bajo", "con", "como", "contra", "cual", "cuando", "del", "desde", "donde", "durante", "el", "ella",
+    "ellos", "entre", "esa", "ese", "esta", "este", "estos", "estas", "hacia", "hasta", "las", "les", "los",
+    "mas", "mediante", "muy", "nos", "nuestro", "para", "pero", "por", "que", "segun", "sin", "sobre", "son",
+    "sus", "tambien", "tras", "una", "unas", "uno", "unos", "usted", "y",
+}
+
+
+# Minúsculas y sin tildes: "Pastelería" -> "pasteleria"
+def normalizar(texto):
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+# Convierte la palabra clave del usuario en una consulta booleana de FULLTEXT
+# Cada término es obligatorio y admite prefijos ("pastel" encuentra "pasteles")
+# Devuelve None si no queda ningún término indexable (por ejemplo, solo palabras de dos letras)
+def consulta_fulltext(palabra):
+    terminos = [t for t in re.findall(r"\w+", normalizar(palabra))
+                if len(t) >= LARGO_MINIMO and t not in PALABRAS_VACIAS]
+    if not terminos:
+        return None
+    return " ".join(f"+{termino}*" for termino in dict.fromkeys(terminos))